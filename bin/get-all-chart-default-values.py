@@ -7,20 +7,36 @@
 # see all values as a path like you would pass into via --set on helm
 # ./get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart --as-path
 # or just the ones that end in tag=
-# ./get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart --as-path|grep 'tag='
+# ./get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart --as-path --filter '*.tag'
+# or as JSON lines / tab separated values, filtered by a regex instead of a glob
+# ./get-all-chart-default-values.py ~/astronomer --format json --filter '\.(tag|image)$' --regex
 # or pass in some values to override from a candidate values.yaml you intend to use to make sure you got all the values you wanted to change
 # ./get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart -f ./my-values.yaml
 # ./get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart -f ./my-values.yaml --as-path
 
+# remote dependencies are downloaded once per (repository, name, version) into
+# ~/.local/share/astronomer-software/chart-cache, so later runs do not touch the network
+
 import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
 import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import requests
 import yaml
 from deepmerge import always_merger
 
+CHART_CACHE_DIR = Path(os.getenv("CHART_CACHE_DIR", Path.home() / ".local" / "share" / "astronomer-software" / "chart-cache"))
+
+# Number of dependencies of one chart downloaded and extracted at the same time
+DOWNLOAD_WORKERS = 8
+
 
 # Function to load YAML file
 def load_yaml(file_path):
@@ -37,8 +53,8 @@ def deep_merge(dict1, dict2):
     return always_merger.merge(dict1, dict2)
 
 
-# Function to download a chart using requests
-def download_chart(chart_name, version=None, repository=None, destination_dir=None):
+# Return the path of a chart archive, downloading it unless it is already in the chart cache
+def fetch_chart_archive(chart_name, version=None, repository=None):
     if repository:
         url = f"{repository}/{chart_name}-{version}.tgz" if version else f"{repository}/{chart_name}.tgz"
     else:
@@ -48,23 +64,49 @@ def download_chart(chart_name, version=None, repository=None, destination_dir=No
             else f"https://charts.helm.sh/stable/{chart_name}.tgz"
         )
 
-    destination_dir = Path(destination_dir or tempfile.mkdtemp())
+    # A released chart version never changes, so (repository, name, version) addresses its content.
+    # Without a version the URL points at whatever is latest, so it is always downloaded again.
+    key = hashlib.sha256(f"{repository}\0{chart_name}\0{version}".encode()).hexdigest()
+    chart_tgz_path = CHART_CACHE_DIR / key[:2] / f"{key}-{chart_name}.tgz"
+    if version and chart_tgz_path.is_file():
+        return chart_tgz_path
 
     response = requests.get(url, stream=True, timeout=30)
     response.raise_for_status()
 
-    chart_tgz_path = destination_dir / f"{chart_name}.tgz"
-    with chart_tgz_path.open("wb") as f:
+    # Write to a temp file and rename, so a concurrent run never extracts a partial archive
+    chart_tgz_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=chart_tgz_path.parent, prefix=".tmp-", delete=False) as f:
         for chunk in response.iter_content(chunk_size=8192):
             f.write(chunk)
+    os.replace(f.name, chart_tgz_path)
+
+    return chart_tgz_path
+
+
+# Function to download a chart using requests, through the chart cache
+def download_chart(chart_name, version=None, repository=None, destination_dir=None):
+    chart_tgz_path = fetch_chart_archive(chart_name, version, repository)
+
+    destination_dir = Path(destination_dir or tempfile.mkdtemp())
+    destination_dir.mkdir(parents=True, exist_ok=True)
 
     # Extract the chart
-    shutil.unpack_archive(str(chart_tgz_path), str(destination_dir))
-    chart_tgz_path.unlink()  # Remove the .tgz file after extraction
+    shutil.unpack_archive(str(chart_tgz_path), str(destination_dir), format="gztar")
 
     return destination_dir / chart_name
 
 
+# Download and extract the given dependencies concurrently, each into its own directory under destination_dir
+def download_charts(dependencies, destination_dir):
+    def download(index_and_dep):
+        index, dep = index_and_dep
+        return download_chart(dep["name"], dep.get("version"), dep.get("repository"), Path(destination_dir) / str(index))
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        return list(executor.map(download, enumerate(dependencies)))
+
+
 # Recursively nest values based on dotted path
 def set_nested_value(obj, path, value):
     keys = path.split(".")
@@ -116,16 +158,19 @@ def load_chart(chart_path, values=None):
     values = deep_merge(chart_values, values)
 
     # Process dependencies (subcharts)
-    if "dependencies" in chart:
-        for dep in chart["dependencies"]:
+    dependencies = chart.get("dependencies") or []
+    # Subcharts that are not vendored into charts/ are all downloaded up front, concurrently
+    remote_dependencies = [dep for dep in dependencies if not (chart_path / "charts" / dep["name"]).exists()]
+
+    # Downloaded subcharts are only needed until their values are loaded
+    with tempfile.TemporaryDirectory(prefix="chart-dependencies-") as download_dir:
+        downloaded = dict(zip((dep["name"] for dep in remote_dependencies), download_charts(remote_dependencies, download_dir)))
+
+        for dep in dependencies:
             dep_name = dep["name"]
-            dep_version = dep.get("version", None)
-            dep_repository = dep.get("repository", None)  # Handle repository field
 
-            # Check if subchart is local or needs to be downloaded
-            subchart_path = chart_path / "charts" / dep_name
-            if not subchart_path.exists():
-                subchart_path = download_chart(dep_name, dep_version, dep_repository)
+            # Check if subchart is local or was downloaded
+            subchart_path = downloaded.get(dep_name, chart_path / "charts" / dep_name)
 
             # Recursively load and merge the subchart values
             _subchart_name, subchart_values = load_chart(subchart_path, values.get(dep_name, {}))
@@ -150,16 +195,37 @@ def parse_mounts(mount_args):
     return mounts
 
 
-# Convert dictionary to foo.bar=value format
-def as_path_format(data, parent_key=""):
-    items = []
-    for k, v in data.items():
-        new_key = f"{parent_key}.{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(as_path_format(v, new_key))
+# Yield (path, value) for every leaf value, with paths like foo.bar[0].baz as you would pass to helm --set.
+# Empty dicts and lists are leaves too, so paths like resources={} are listed rather than dropped.
+def iter_paths(data, parent_key=""):
+    if isinstance(data, dict):
+        items = ((f"{parent_key}.{k}" if parent_key else str(k), v) for k, v in data.items())
+    else:
+        items = ((f"{parent_key}[{index}]", v) for index, v in enumerate(data))
+    for new_key, v in items:
+        if isinstance(v, dict | list) and v:
+            yield from iter_paths(v, new_key)
         else:
-            items.append(f"{new_key}={v}")
-    return items
+            yield new_key, v
+
+
+# Return a function telling whether a path matches any of the glob (or, with regex=True, regular expression) patterns
+def path_matcher(patterns, regex=False):
+    if not patterns:
+        return lambda path: True
+    if regex:
+        compiled = [re.compile(pattern) for pattern in patterns]
+        return lambda path: any(pattern.search(path) for pattern in compiled)
+    return lambda path: any(fnmatch.fnmatchcase(path, pattern) for pattern in patterns)
+
+
+# Format one (path, value) pair as foo.bar=value, a tab separated line, or a JSON line
+def format_path(path, value, output_format="set"):
+    if output_format == "json":
+        return json.dumps({"path": path, "value": value}, default=str)
+    if output_format == "tsv":
+        return f"{path}\t{value}"
+    return f"{path}={value}"
 
 
 # Main function to handle argparse and program flow
@@ -168,9 +234,20 @@ def main():
     parser.add_argument("chart", help="Path to the Helm chart")
     parser.add_argument("-f", "--values-file", help="Path to an external values file", default=None)
     parser.add_argument("--mount", help="Mount additional files or directories as subcharts", action="append", default=[])
-    parser.add_argument("--as-path", help="Output values in foo.bar=value format", action="store_true")
+    parser.add_argument("--as-path", help="Output values in foo.bar=value format (same as --format set)", action="store_true")
+    parser.add_argument(
+        "--format",
+        choices=["yaml", "set", "json", "tsv"],
+        default=None,
+        help="Output the merged values as yaml (default), one foo.bar[0]=value per line, JSON lines, or tab separated path and value",
+    )
+    parser.add_argument("--filter", help="Only output paths matching this glob (repeatable)", action="append", default=[])
+    parser.add_argument("--regex", help="Treat --filter patterns as regular expressions", action="store_true")
 
     args = parser.parse_args()
+    output_format = args.format or ("set" if args.as_path or args.filter else "yaml")
+    if output_format == "yaml" and args.filter:
+        parser.error("--filter only applies to path output (--as-path or --format set|json|tsv)")
 
     # Parse values.yaml once and pass relevant subsets
     user_values = load_yaml(args.values_file) if args.values_file else {}
@@ -190,10 +267,11 @@ def main():
 
     _, merged_values = load_chart(chart_path, merged_values)
 
-    if args.as_path:
-        path_values = as_path_format(merged_values)
-        for item in path_values:
-            print(item)
+    if output_format != "yaml":
+        matches = path_matcher(args.filter, regex=args.regex)
+        for path, value in iter_paths(merged_values):
+            if matches(path):
+                print(format_path(path, value, output_format))
     else:
         print(yaml.dump(merged_values, default_flow_style=False))
 
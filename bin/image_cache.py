@@ -0,0 +1,114 @@
+"""
+On-disk cache of container registry lookups, shared by replace-tags-with-sha256.py and show-docker-image-user.py.
+
+Not a standalone entry point — imported directly by those scripts, which live in this same `bin/`
+directory.
+
+Entries map a lookup key (e.g. "quay.io/astronomer/ap-nginx:1.2.3") to a JSON value. A tag can be
+moved to a different image at any time, so entries for mutable references expire after a TTL;
+anything addressed by digest (a manifest or blob fetched by its sha256) can never change, so those
+entries are stored as permanent. In offline mode every entry is served regardless of age, and a
+miss is an error instead of a reason to ask the registry.
+
+The cache is one JSON file so a recorded cache can be checked into tests/data_files and replayed.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any
+
+CACHE_FILE = Path(
+    os.getenv("IMAGE_CACHE_FILE", Path.home() / ".local" / "share" / "astronomer-software" / "image-cache" / "image-cache.json")
+)
+
+# How long entries for mutable references (tags) are trusted, in seconds
+DEFAULT_TTL = 6 * 60 * 60
+
+
+class CacheMiss(LookupError):
+    """An offline cache has no entry for a key, so the lookup cannot be answered."""
+
+
+def is_digest(reference: str) -> bool:
+    """Return True if an image reference (the part after ":" or "@") is a content digest."""
+    return reference.startswith("sha256:")
+
+
+class ImageCache:
+    """A thread-safe key -> JSON value cache persisted to a single JSON file."""
+
+    def __init__(self, path: Path = CACHE_FILE, *, ttl: float = DEFAULT_TTL, offline: bool = False, enabled: bool = True):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.offline = offline
+        self.enabled = enabled or offline
+        self.lock = threading.Lock()
+        self.entries = self._read() if self.enabled else {}
+        self.dirty = False
+
+    def _read(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for key, or None if it is missing or expired.
+
+        Raises CacheMiss instead of returning None in offline mode.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and (self.offline or entry["permanent"] or time.time() - entry["stored_at"] < self.ttl):
+            return entry["value"]
+        if self.offline:
+            raise CacheMiss(f"{key} is not in the image cache {self.path}")
+        return None
+
+    def put(self, key: str, value: Any, *, permanent: bool = False) -> None:
+        """Store value for key. Permanent entries never expire."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries[key] = {"value": value, "stored_at": time.time(), "permanent": permanent}
+            self.dirty = True
+
+    def save(self) -> None:
+        """Write new entries to disk, merged with whatever other runs wrote since this one started.
+
+        Runs saving at the same time take turns on a lock file beside the cache, so none of them
+        merges from a file another is about to replace, and the file is swapped in with os.replace
+        so readers never see it half written.
+        """
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock, open(self.path.with_name(f"{self.path.name}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = {**self._read(), **self.entries}
+            with NamedTemporaryFile("w", dir=self.path.parent, prefix=".tmp-", delete=False) as tmp_file:
+                json.dump(entries, tmp_file, indent=1, sort_keys=True)
+            os.replace(tmp_file.name, self.path)
+            self.dirty = False
+
+
+def add_cache_arguments(parser) -> None:
+    """Add the cache command line options shared by the scripts that use ImageCache."""
+    parser.add_argument("--offline", action="store_true", help="answer purely from the image cache, never contact a registry")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the image cache")
+    parser.add_argument(
+        "--cache-ttl", type=float, default=DEFAULT_TTL, help=f"seconds to trust cached tag lookups (default {DEFAULT_TTL})"
+    )
+    parser.add_argument("--cache-file", type=Path, default=CACHE_FILE, help=f"image cache file (default {CACHE_FILE})")
+
+
+def from_arguments(args) -> ImageCache:
+    """Return the ImageCache described by the options added by add_cache_arguments."""
+    return ImageCache(args.cache_file, ttl=args.cache_ttl, offline=args.offline, enabled=not args.no_cache)
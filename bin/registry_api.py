@@ -0,0 +1,114 @@
+"""
+Docker Registry v2 API helpers, shared by show-docker-image-user.py and tests/utils/registry_probe.py.
+
+Not a standalone entry point — imported directly by those scripts, which put this `bin/` directory
+on sys.path.
+
+Covers the parts every registry client here needs: splitting an image reference into registry,
+repository and reference, the Accept header for manifests, and a cache of anonymous bearer tokens
+negotiated from a registry's `Www-Authenticate` challenge.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+# Accept headers covering both Docker and OCI manifest and index media types.
+MANIFEST_ACCEPT = "application/vnd.docker.distribution.manifest.v2+json, application/vnd.docker.distribution.manifest.list.v2+json, application/vnd.oci.image.manifest.v1+json, application/vnd.oci.image.index.v1+json"
+
+DEFAULT_REGISTRY = "registry-1.docker.io"
+
+# Lifetime assumed for tokens whose response has no expires_in (the distribution spec default)
+DEFAULT_TOKEN_LIFETIME = 60
+
+_challenge_param_re = re.compile(r'(\w+)="([^"]*)"')
+
+
+def parse_image_ref(image: str) -> tuple[str, str, str]:
+    """Split an image reference into (registry, repository, reference).
+
+    Handles docker.io shorthand (e.g. "nginx" -> "library/nginx" on registry-1.docker.io)
+    and explicit registries (e.g. "quay.io/astronomer/ap-commander:2.0.15").
+    """
+    # A leading component with a "." or ":" (or "localhost") is a registry host.
+    first, _, rest = image.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        registry, remainder = first, rest
+    else:
+        registry, remainder = DEFAULT_REGISTRY, image
+    if registry == "docker.io":
+        registry = DEFAULT_REGISTRY
+
+    # Separate the reference (tag or digest) from the repository path.
+    if "@" in remainder:
+        repository, _, reference = remainder.partition("@")
+    elif ":" in remainder.rsplit("/", 1)[-1]:
+        repository, _, reference = remainder.rpartition(":")
+    else:
+        repository, reference = remainder, "latest"
+
+    if registry == DEFAULT_REGISTRY and "/" not in repository:
+        repository = f"library/{repository}"
+
+    return registry, repository, reference
+
+
+def parse_www_authenticate(header: str) -> dict[str, str]:
+    """Parse a Bearer challenge header into a dict of its key="value" params."""
+    scheme, _, rest = header.partition(" ")
+    if scheme.lower() != "bearer":
+        return {}
+    return dict(_challenge_param_re.findall(rest))
+
+
+class TokenCache:
+    """Anonymous bearer tokens keyed by (registry, scope), shared by concurrent requests.
+
+    A token is negotiated once per scope rather than once per request, and is renewed shortly
+    before the lifetime the registry gave it runs out.
+    """
+
+    def __init__(self, session: requests.Session, timeout: float = 30):
+        self.session = session
+        self.timeout = timeout
+        self.tokens: dict[tuple[str, str], tuple[str, float]] = {}  # (registry, scope) -> (token, expires_at)
+        self.lock = threading.Lock()
+        self.scope_locks = defaultdict(threading.Lock)  # (registry, scope) -> lock held while negotiating its token
+
+    def get(self, registry: str, scope: str) -> str | None:
+        """Return the unexpired token for (registry, scope), or None."""
+        with self.lock:
+            token, expires_at = self.tokens.get((registry, scope), (None, 0))
+        return token if time.monotonic() < expires_at else None
+
+    def negotiate(self, registry: str, challenge_header: str, rejected_token: str | None = None) -> str | None:
+        """Return an anonymous bearer token for the realm named in the challenge header.
+
+        Concurrent callers challenged for the same scope wait for a single token request and share
+        its result. rejected_token is the token the registry just refused, which is never reused.
+        """
+        params = parse_www_authenticate(challenge_header)
+        realm = params.get("realm")
+        if not realm:
+            return None
+        scope = params.get("scope", "")
+        with self.lock:
+            scope_lock = self.scope_locks[registry, scope]
+        with scope_lock:
+            if (token := self.get(registry, scope)) and token != rejected_token:
+                return token
+            query = {key: params[key] for key in ("service", "scope") if params.get(key)}
+            response = self.session.get(realm, params=query, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            token = data.get("token") or data.get("access_token")
+            lifetime = data.get("expires_in") or DEFAULT_TOKEN_LIFETIME
+            with self.lock:
+                # Renew a little early so a token never expires between lookup and use
+                self.tokens[registry, scope] = (token, time.monotonic() + lifetime * 0.9)
+        return token
@@ -9,28 +9,53 @@ USAGE:
     Run this script to replace the tags with sha256 hashes
 
         cat all-values.yaml |
-        bin/replace-tags-with-sha256.py 1 > ~/sha-values.yaml
+        bin/replace-tags-with-sha256.py > ~/sha-values.yaml
+
+    Digests are cached in ~/.local/share/astronomer-software/image-cache, so re-runs only ask the
+    registries about tags looked up more than --cache-ttl seconds ago. Add --offline to answer
+    purely from that cache.
 
     Check for tags without sha256
 
-        bin/get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart -f ~/sha-values.yaml --as-path |
-        grep '\.tag='
+        bin/get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart -f ~/sha-values.yaml --filter '*.tag'
 
     Check for images without sha256
 
-        bin/get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart -f ~/sha-values.yaml --as-path |
-        grep '\.image=' |
+        bin/get-all-chart-default-values.py ~/astronomer --mount astronomer.houston.config.deployments.helm=~/airflow-chart -f ~/sha-values.yaml --filter '*.image' |
         grep -v "sha256"
 """
 
+import argparse
 import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import requests
 import yaml
 
+_BIN = Path(__file__).resolve().parent
+if str(_BIN) not in sys.path:
+    sys.path.insert(0, str(_BIN))
+
+import image_cache  # noqa: E402
+
 # Docker Hub API URL for public repositories
 DOCKER_HUB_API_URL = "https://hub.docker.com/v2/repositories/library"
 
+# Maximum number of concurrent lookups against any one registry
+MAX_LOOKUPS_PER_HOST = 8
+
+# (repository_host, repository, tag)
+ImageRef = tuple[str, str, str]
+# (digest_version, digest_value), e.g. ("sha256", "0123abcd...")
+Digest = tuple[str, str]
+
+
+class DigestLookupError(Exception):
+    """A registry could not give us the digest of an image."""
+
 
 def parse_image(image, explicit_repository_host=None):
     """
@@ -52,31 +77,26 @@ def parse_image(image, explicit_repository_host=None):
     return repository_host, repository, tag
 
 
-def lookup_digest_dockerhub(repository, tag):
+def lookup_digest_dockerhub(repository, tag, session=requests):
     """
     Look up the SHA hash for a given repository and tag using Docker Hub's public API.
     Args:
         repository (str): The repository name (e.g., "postgres")
         tag (str): The tag for which to retrieve the digest hash
+        session: requests.Session (or the requests module) to send the request with
     Returns:
-        str: The corresponding SHA digest
+        tuple: (digest_version, digest_value)
+    Raises:
+        DigestLookupError: the digest could not be retrieved
     """
-    if tag is None:
-        return None
-
     # Set the Docker Hub API URL for retrieving tag information
     repo_url = f"{DOCKER_HUB_API_URL}/{repository}/tags/{tag}/"
 
     # Send a GET request to the Docker Hub API
-    response = requests.get(repo_url, timeout=30)
+    response = session.get(repo_url, timeout=30)
 
-    # Log the URL on failure
     if response.status_code != 200:
-        print(f"Error fetching SHA for {repository}:{tag} from Docker Hub", file=sys.stderr)
-        print(f"Attempted URL: {repo_url}", file=sys.stderr)
-        print(f"Status code: {response.status_code}", file=sys.stderr)
-        print(f"Response body: {response.text}", file=sys.stderr)
-        return None
+        raise DigestLookupError(f"GET {repo_url} returned {response.status_code}: {response.text}")
 
     # Parse the response JSON to extract the SHA digest
     data = response.json()
@@ -86,19 +106,19 @@ def lookup_digest_dockerhub(repository, tag):
     return digest_version, digest_value
 
 
-def lookup_digest_v2(repository_host, repository, tag):
+def lookup_digest_v2(repository_host, repository, tag, session=requests):
     """
     Look up the SHA hash for a given repository and tag using the Docker Registry V2 API.
     Args:
         repository_host (str): The registry host (e.g., "quay.io", "registry-1.docker.io")
         repository (str): The repository name (e.g., "namespace/repo")
         tag (str): The tag for which to retrieve the SHA hash
+        session: requests.Session (or the requests module) to send the request with
     Returns:
-        str: The corresponding SHA digest
+        tuple: (digest_version, digest_value)
+    Raises:
+        DigestLookupError: the digest could not be retrieved
     """
-    if tag is None:
-        return None
-
     # Set the V2 API URL for manifest lookup
     repo_url = f"https://{repository_host}/v2/{repository}/manifests/{tag}"
 
@@ -106,39 +126,124 @@ def lookup_digest_v2(repository_host, repository, tag):
     headers = {
         "Accept": "application/vnd.docker.distribution.manifest.v2+json",  # Request V2 manifest
     }
-    response = requests.get(repo_url, headers=headers, timeout=30)
+    response = session.get(repo_url, headers=headers, timeout=30)
 
-    # Log the URL on failure
     if response.status_code != 200:
-        print(f"Error fetching SHA for {repository}:{tag} from {repository_host}", file=sys.stderr)
-        print(f"Attempted URL: {repo_url}", file=sys.stderr)
-        print(f"Status code: {response.status_code}", file=sys.stderr)
-        print(f"Response body: {response.text}", file=sys.stderr)
-        return None
+        raise DigestLookupError(f"GET {repo_url} returned {response.status_code}: {response.text}")
 
     # Parse the Docker-Content-Digest from the response headers
     raw_digest = response.headers.get("Docker-Content-Digest")
 
     if not raw_digest:
-        return None, None
+        raise DigestLookupError(f"GET {repo_url} returned no Docker-Content-Digest header")
 
     digest_version, digest_value = raw_digest.split(":", 1)
 
     return digest_version, digest_value
 
 
-def process_yaml(data, new_data):  # noqa: C901
+def lookup_host(repository_host):
+    """Return the host that lookups for images on repository_host are sent to."""
+    return "hub.docker.com" if repository_host == "docker.io" else repository_host
+
+
+def lookup_digest(image_ref: ImageRef, session=requests) -> Digest:
+    """Look up the digest of an image with whichever API its registry supports."""
+    repository_host, repository, tag = image_ref
+    if repository_host == "docker.io":
+        # Use Docker Hub public API
+        return lookup_digest_dockerhub(repository, tag, session=session)
+    # Use Docker Registry V2 API for other registries (like Quay.io)
+    return lookup_digest_v2(repository_host, repository, tag, session=session)
+
+
+def cache_key(image_ref: ImageRef) -> str:
+    repository_host, repository, tag = image_ref
+    return f"{repository_host}/{repository}:{tag}"
+
+
+def is_digest_ref(image_ref: ImageRef) -> bool:
+    """Return True if image_ref already names its image by digest (repo@sha256:... or tag sha256:...)."""
+    _, repository, tag = image_ref
+    return repository.endswith("@sha256") or image_cache.is_digest(tag)
+
+
+def resolve_digests(
+    image_refs: set[ImageRef], max_per_host: int = MAX_LOOKUPS_PER_HOST, cache: image_cache.ImageCache | None = None
+) -> tuple[dict[ImageRef, Digest], dict[ImageRef, str]]:
+    """
+    Look up the digests of image_refs concurrently.
+
+    Digests found in cache are used as is. Each registry gets its own connection-pooled session
+    and at most max_per_host lookups in flight at a time, and what they return is added to cache
+    (permanently for references that are already digests, since those cannot move).
+    Returns:
+        tuple: ({image_ref: digest} for the lookups that worked, {image_ref: error} for the ones that did not)
+    """
+    digests, failures = {}, {}
+    if cache:
+        for image_ref in sorted(image_refs):
+            try:
+                if cached := cache.get(cache_key(image_ref)):
+                    digests[image_ref] = tuple(cached)
+            except image_cache.CacheMiss as e:
+                failures[image_ref] = f"{type(e).__name__}: {e}"
+        image_refs = image_refs - set(digests) - set(failures)
+
+    hosts = {lookup_host(ref[0]) for ref in image_refs}
+    sessions = {}
+    for host in hosts:
+        sessions[host] = requests.Session()
+        sessions[host].mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=max_per_host))
+    slots = {host: threading.BoundedSemaphore(max_per_host) for host in hosts}
+
+    def resolve(image_ref: ImageRef) -> tuple[ImageRef, Digest | None, str | None]:
+        host = lookup_host(image_ref[0])
+        with slots[host]:
+            print(f"Looking up {image_ref[0]} for {image_ref[1]}:{image_ref[2]}", file=sys.stderr)
+            try:
+                return image_ref, lookup_digest(image_ref, session=sessions[host]), None
+            except (requests.RequestException, DigestLookupError, KeyError, IndexError, ValueError) as e:
+                return image_ref, None, f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, max_per_host * len(hosts))) as executor:
+        for image_ref, digest, error in executor.map(resolve, sorted(image_refs)):
+            if digest:
+                digests[image_ref] = digest
+                if cache:
+                    # A digest reference always resolves to the same digest, so it never needs looking up again
+                    cache.put(cache_key(image_ref), list(digest), permanent=is_digest_ref(image_ref))
+            else:
+                failures[image_ref] = error
+    for session in sessions.values():
+        session.close()
+    return digests, failures
+
+
+def collect_image_refs(data) -> set[ImageRef]:
+    """Return every image reference process_yaml would look up in data."""
+    image_refs = set()
+
+    def record(image_ref: ImageRef) -> None:
+        image_refs.add(image_ref)
+
+    process_yaml(data, {}, record)
+    return image_refs
+
+
+def process_yaml(data, new_data, resolve: Callable[[ImageRef], Digest | None]):  # noqa: C901
     """
     Recursively process the YAML structure, replacing image tags with SHA hashes,
     and populating the new_data object with only the tag/image changes and minimal scaffolding.
     Args:
         data (dict or list): The original YAML content to process
         new_data (dict or list): The object where changes will be stored
+        resolve (callable): Returns the (digest_version, digest_value) of an image reference, or None if unknown
     """
     for key, value in data.items():
         if isinstance(value, dict):
             temp_data = {}
-            process_yaml(value, temp_data)  # Recurse into nested dictionaries
+            process_yaml(value, temp_data, resolve)  # Recurse into nested dictionaries
             if temp_data:
                 new_data[key] = temp_data
         elif isinstance(value, list):
@@ -146,7 +251,7 @@ def process_yaml(data, new_data):  # noqa: C901
             for item in value:
                 if isinstance(item, dict):
                     temp_item = {}
-                    process_yaml(item, temp_item)
+                    process_yaml(item, temp_item, resolve)
                     if temp_item:
                         temp_list.append(temp_item)
             if temp_list:
@@ -154,50 +259,20 @@ def process_yaml(data, new_data):  # noqa: C901
         elif key == "image":
             # Parse the image into repository_host, repository, and tag
             repository_host, repository, tag = parse_image(value)
-
-            try:
-                sha_hash = None
-                if repository_host == "docker.io":
-                    # Use Docker Hub public API
-                    print(f"Looking up Docker Hub for {repository}:{tag}", file=sys.stderr)
-                    digest_version, sha_hash = lookup_digest_dockerhub(repository, tag)
-                else:
-                    # Use Docker Registry V2 API for other registries (like Quay.io)
-                    print(f"Looking up {repository_host} for {repository}:{tag}", file=sys.stderr)
-                    digest_version, sha_hash = lookup_digest_v2(repository_host, repository, tag)
-
-                if sha_hash:
-                    new_data[key] = f"{repository_host}/{repository}@{digest_version}:{sha_hash}"
-            except TypeError as e:
-                print(f"Failed to process image {repository}:{tag} - {e}", file=sys.stderr)
-                continue
+            if digest := resolve((repository_host, repository, tag)):
+                digest_version, sha_hash = digest
+                new_data[key] = f"{repository_host}/{repository}@{digest_version}:{sha_hash}"
         elif key == "defaultAirflowTag":
             if value is None:
                 continue  # Leave tags with value None unchanged
             repository_and_host = data["defaultAirflowRepository"]
-            repository = data["defaultAirflowRepository"]
             repository_host, repository, _ = parse_image(data["defaultAirflowRepository"])
-
-            try:
-                sha_hash = None
-                if repository_host == "docker.io":
-                    # Use Docker Hub public API
-                    print(f"Looking up Docker Hub for {repository}:{value}", file=sys.stderr)
-                    digest_version, sha_hash = lookup_digest_dockerhub(repository, value)
-
-                else:
-                    # Use Docker Registry V2 API for other registries (like Quay.io)
-                    print(f"Looking up {repository_host} for {repository}:{value}", file=sys.stderr)
-                    digest_version, sha_hash = lookup_digest_v2(repository_host, repository, value)
-
-                if sha_hash:
-                    new_data["defaultAirflowRepository"] = f"{repository_and_host}@{digest_version}"
-                    new_data["defaultAirflowTag"] = sha_hash
-                    if "defaultAirflowDigest" in data and data["defaultAirflowDigest"] is not None:
-                        new_data["defaultAirflowDigest"] = sha_hash
-            except TypeError as e:
-                print(f"Failed to process tag {value} for {repository} - {e}", file=sys.stderr)
-                continue
+            if digest := resolve((repository_host, repository, value)):
+                digest_version, sha_hash = digest
+                new_data["defaultAirflowRepository"] = f"{repository_and_host}@{digest_version}"
+                new_data["defaultAirflowTag"] = sha_hash
+                if "defaultAirflowDigest" in data and data["defaultAirflowDigest"] is not None:
+                    new_data["defaultAirflowDigest"] = sha_hash
         elif key == "tag":
             if value is None:
                 continue  # Leave tags with value None unchanged
@@ -207,44 +282,51 @@ def process_yaml(data, new_data):  # noqa: C901
                 # if there is a registry host prepend it to the repository
                 explicit_registry = data["registry"] if "registry" in data else None
                 repository_host, repository, _ = parse_image(data["repository"], explicit_registry)
-                try:
-                    sha_hash = None
-                    if repository_host == "docker.io":
-                        # Use Docker Hub public API
-                        print(f"Looking up Docker Hub for {repository}:{value}", file=sys.stderr)
-                        digest_version, sha_hash = lookup_digest_dockerhub(repository, value)
-
+                if digest := resolve((repository_host, repository, value)):
+                    digest_version, sha_hash = digest
+                    # tag gets the sha256 hash
+                    new_data[key] = sha_hash
+                    # repository gets the image with the sha256 hash
+                    if "registry" in data:
+                        new_data["repository"] = f"{repository}@{digest_version}"
                     else:
-                        # Use Docker Registry V2 API for other registries (like Quay.io)
-                        print(f"Looking up {repository_host} for {repository}:{value}", file=sys.stderr)
-                        digest_version, sha_hash = lookup_digest_v2(repository_host, repository, value)
-
-                    if sha_hash:
-                        # tag gets the sha256 hash
-                        new_data[key] = sha_hash
-                        # repository gets the image with the sha256 hash
-                        if "registry" in data:
-                            new_data["repository"] = f"{repository}@{digest_version}"
-                        else:
-                            new_data["repository"] = f"{repository_host}/{repository}@{digest_version}"
-                except TypeError as e:
-                    print(f"Failed to process tag {value} for {repository} - {e}", file=sys.stderr)
-                    continue
+                        new_data["repository"] = f"{repository_host}/{repository}@{digest_version}"
+
+
+def print_failures(failures: dict[ImageRef, str]) -> None:
+    """Print one summary of every image whose digest could not be looked up."""
+    if not failures:
+        return
+    print(f"\nFailed to look up {len(failures)} image(s), their tags were left unchanged:", file=sys.stderr)
+    for (repository_host, repository, tag), error in sorted(failures.items()):
+        print(f"  {repository_host}/{repository}:{tag}: {error}", file=sys.stderr)
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    image_cache.add_cache_arguments(parser)
+    args = parser.parse_args()
+    cache = image_cache.from_arguments(args)
+
     # Read YAML content from stdin (you can also use a file)
     yaml_content = yaml.safe_load(sys.stdin)
 
+    # Find every unique image first, so each one is looked up once no matter how often it is used
+    image_refs = collect_image_refs(yaml_content)
+    digests, failures = resolve_digests(image_refs, cache=cache)
+    cache.save()
+
     # Create a new object to store the changes
     new_yaml_content = {}
 
     # Process the YAML content and populate the new object with tag/image changes
-    process_yaml(yaml_content, new_yaml_content)
+    process_yaml(yaml_content, new_yaml_content, digests.get)
 
     # Output the new YAML object containing only the tag/image changes
     yaml.dump(new_yaml_content, sys.stdout)
 
+    print_failures(failures)
+
 
 if __name__ == "__main__":
     main()
@@ -11,125 +11,126 @@ A USER value of "" means the image runs as root (UID 0).
 Examples:
     bin/show-docker-image-user.py quay.io/astronomer/ap-commander:2.0.15
     bin/show-docker-images.py --with-houston | awk '{print $2}' | bin/show-docker-image-user.py
+
+Images are inspected --jobs at a time over pooled connections, reusing one anonymous bearer token
+per (registry, scope), and reported in the order they were given.
+
+Manifests and config blobs are cached in ~/.local/share/astronomer-software/image-cache (shared
+with replace-tags-with-sha256.py); add --offline to answer purely from that cache.
 """
 
 import argparse
-import json
 import sys
-import urllib.error
-import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+_BIN = Path(__file__).resolve().parent
+if str(_BIN) not in sys.path:
+    sys.path.insert(0, str(_BIN))
 
-# Accept headers covering both Docker and OCI manifest and index media types.
-MANIFEST_ACCEPT = "application/vnd.docker.distribution.manifest.v2+json, application/vnd.docker.distribution.manifest.list.v2+json, application/vnd.oci.image.manifest.v1+json, application/vnd.oci.image.index.v1+json"
+import image_cache  # noqa: E402
+from registry_api import MANIFEST_ACCEPT, TokenCache, parse_image_ref  # noqa: E402
 
-DEFAULT_REGISTRY = "registry-1.docker.io"
+# Number of images inspected at the same time
+DEFAULT_JOBS = 8
 
+# Registries spoken to over plain http, like docker does by default for local registries
+INSECURE_REGISTRY_HOSTS = ("localhost", "127.0.0.1", "[::1]")
 
-def parse_image_ref(image):
-    """Split an image reference into (registry, repository, reference).
 
-    Handles docker.io shorthand (e.g. "nginx" -> "library/nginx" on registry-1.docker.io)
-    and explicit registries (e.g. "quay.io/astronomer/ap-commander:2.0.15").
+def registry_url(registry):
+    """Return the base URL of a registry's v2 API."""
+    scheme = "http" if registry.rsplit(":", 1)[0] in INSECURE_REGISTRY_HOSTS else "https"
+    return f"{scheme}://{registry}/v2"
+
+
+class RegistryClient:
+    """Registry v2 API client shared by every image being inspected.
+
+    Holds one connection-pooled session, so requests to a registry reuse its connections, and a
+    cache of anonymous bearer tokens keyed by (registry, scope), so a token is negotiated once per
+    repository rather than once per request.
     """
-    remainder = image
-    # A leading component with a "." or ":" (or "localhost") is a registry host.
-    first, _, rest = remainder.partition("/")
-    if rest and ("." in first or ":" in first or first == "localhost"):
-        registry = first
-        remainder = rest
-    else:
-        registry = DEFAULT_REGISTRY
-
-    # Separate the reference (tag or digest) from the repository path.
-    if "@" in remainder:
-        repository, _, reference = remainder.partition("@")
-    elif ":" in remainder.rsplit("/", 1)[-1]:
-        repository, _, reference = remainder.rpartition(":")
-    else:
-        repository, reference = remainder, "latest"
-
-    if registry == DEFAULT_REGISTRY and "/" not in repository:
-        repository = f"library/{repository}"
-
-    return registry, repository, reference
-
-
-def _registry_get(url, token, accept):
-    """Perform a registry GET, returning (status, headers, body_bytes)."""
-    headers = {"Accept": accept}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    request = urllib.request.Request(url, headers=headers)  # noqa: S310
-    try:
-        with urllib.request.urlopen(request) as response:  # noqa: S310
-            return response.status, response.headers, response.read()
-    except urllib.error.HTTPError as err:
-        return err.code, err.headers, err.read()
-
-
-def _parse_www_authenticate(header):
-    """Parse a Bearer challenge header into a dict of its key="value" params."""
-    params = {}
-    scheme, _, rest = header.partition(" ")
-    if scheme.lower() != "bearer":
-        return params
-    for part in rest.split(","):
-        key, _, value = part.strip().partition("=")
-        params[key] = value.strip('"')
-    return params
-
-
-def get_token(challenge_header):
-    """Fetch an anonymous bearer token for the realm named in the challenge header."""
-    params = _parse_www_authenticate(challenge_header)
-    realm = params.get("realm")
-    if not realm:
-        return None
-    query = []
-    if params.get("service"):
-        query.append(f"service={urllib.parse.quote(params['service'])}")
-    if params.get("scope"):
-        query.append(f"scope={urllib.parse.quote(params['scope'])}")
-    url = realm + ("?" + "&".join(query) if query else "")
-    with urllib.request.urlopen(url) as response:  # noqa: S310
-        return json.load(response).get("token")
-
-
-def fetch_json(registry, path, token, accept):
-    """GET a registry path, transparently acquiring a bearer token on 401."""
-    url = f"https://{registry}/v2/{path}"
-    status, headers, body = _registry_get(url, token, accept)
-    if status == 401 and not token:
-        token = get_token(headers.get("Www-Authenticate", ""))
-        status, headers, body = _registry_get(url, token, accept)
-    if status != 200:
-        raise RuntimeError(f"{url} returned HTTP {status}: {body[:200].decode(errors='replace')}")
-    return json.loads(body), token
-
-
-def get_image_user(image, platform="linux/amd64"):
-    """Return the config.User value for the given image reference."""
-    registry, repository, reference = parse_image_ref(image)
-
-    manifest, token = fetch_json(registry, f"{repository}/manifests/{reference}", None, MANIFEST_ACCEPT)
-
-    # If this is a multi-arch index, select the manifest for the requested platform.
-    if "manifests" in manifest:
-        want_os, _, want_arch = platform.partition("/")
-        digest = None
-        for entry in manifest["manifests"]:
-            entry_platform = entry.get("platform", {})
-            if entry_platform.get("os") == want_os and entry_platform.get("architecture") == want_arch:
-                digest = entry["digest"]
-                break
-        if digest is None:
-            raise RuntimeError(f"{image}: no {platform} manifest in image index")
-        manifest, token = fetch_json(registry, f"{repository}/manifests/{digest}", token, MANIFEST_ACCEPT)
-
-    config_digest = manifest["config"]["digest"]
-    config, _ = fetch_json(registry, f"{repository}/blobs/{config_digest}", token, "application/json")
-    return config.get("config", {}).get("User", "")
+
+    def __init__(self, cache=None, pool_size=DEFAULT_JOBS, timeout=30):
+        self.cache = cache
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.tokens = TokenCache(self.session, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+    def _get(self, url, token, accept):
+        headers = {"Accept": accept}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def fetch_json(self, registry, repository, path, accept):
+        """GET a repository's registry path, transparently acquiring a bearer token on 401.
+
+        Responses are looked up in and added to the cache when there is one. Paths ending in a
+        digest can never change, so they are cached permanently; tag lookups expire after the
+        cache TTL.
+        """
+        url = f"{registry_url(registry)}/{repository}/{path}"
+        key = f"{registry}/v2/{repository}/{path}"
+        if self.cache and (cached := self.cache.get(key)) is not None:
+            return cached
+
+        token = self.tokens.get(registry, f"repository:{repository}:pull")
+        response = self._get(url, token, accept)
+        if response.status_code == 401:
+            token = self.tokens.negotiate(registry, response.headers.get("Www-Authenticate", ""), rejected_token=token)
+            response = self._get(url, token, accept)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned HTTP {response.status_code}: {response.text[:200]}")
+        data = response.json()
+        if self.cache:
+            self.cache.put(key, data, permanent=image_cache.is_digest(path.rsplit("/", 1)[-1]))
+        return data
+
+    def get_image_user(self, image, platform="linux/amd64"):
+        """Return the config.User value for the given image reference."""
+        registry, repository, reference = parse_image_ref(image)
+
+        manifest = self.fetch_json(registry, repository, f"manifests/{reference}", MANIFEST_ACCEPT)
+
+        # If this is a multi-arch index, select the manifest for the requested platform.
+        if "manifests" in manifest:
+            want_os, _, want_arch = platform.partition("/")
+            digest = None
+            for entry in manifest["manifests"]:
+                entry_platform = entry.get("platform", {})
+                if entry_platform.get("os") == want_os and entry_platform.get("architecture") == want_arch:
+                    digest = entry["digest"]
+                    break
+            if digest is None:
+                raise RuntimeError(f"{image}: no {platform} manifest in image index")
+            manifest = self.fetch_json(registry, repository, f"manifests/{digest}", MANIFEST_ACCEPT)
+
+        config_digest = manifest["config"]["digest"]
+        config = self.fetch_json(registry, repository, f"blobs/{config_digest}", "application/json")
+        return config.get("config", {}).get("User", "")
+
+
+def inspect_images(images, client, platform="linux/amd64", jobs=DEFAULT_JOBS):
+    """Inspect images concurrently, yielding (image, user, error) in the order images were given."""
+
+    def inspect(image):
+        try:
+            return image, client.get_image_user(image, platform=platform), None
+        except Exception as err:  # noqa: BLE001 - report and continue across images
+            return image, None, err
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        yield from executor.map(inspect, images)
 
 
 def main():
@@ -140,23 +141,29 @@ def main():
         help="image reference(s), e.g. quay.io/astronomer/ap-commander:2.0.15. If omitted, read one per line from stdin.",
     )
     parser.add_argument("--platform", default="linux/amd64", help="platform to inspect for multi-arch images")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=DEFAULT_JOBS, help=f"images to inspect concurrently (default {DEFAULT_JOBS})"
+    )
+    image_cache.add_cache_arguments(parser)
     args = parser.parse_args()
+    cache = image_cache.from_arguments(args)
 
     images = args.images or [line.strip() for line in sys.stdin if line.strip()]
     if not images:
         parser.error("no images provided on the command line or stdin")
 
+    client = RegistryClient(cache=cache, pool_size=args.jobs)
     width = max(len(image) for image in images)
     exit_code = 0
-    for image in images:
-        try:
-            user = get_image_user(image, platform=args.platform)
-        except Exception as err:  # noqa: BLE001 - report and continue across images
+    for image, user, err in inspect_images(images, client, platform=args.platform, jobs=args.jobs):
+        if err:
             print(f"{image:{width}}  ERROR: {err}", file=sys.stderr)
             exit_code = 1
             continue
         print(f"{image:{width}}  USER={user!r}{'  (root)' if user in ('', '0', 'root') else ''}")
 
+    client.close()
+    cache.save()
     raise SystemExit(exit_code)
 
 
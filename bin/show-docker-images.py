@@ -3,9 +3,11 @@
 
 import argparse
 import json
+import re
 import subprocess
 import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import yaml
@@ -19,6 +21,10 @@ HELM_RUNS = [
     {"label": "data", "files": ["configs/enable-all-features-data.yaml"]},
 ]
 
+# Use the libyaml C loader when pyyaml was built with it, it is many times faster.
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+DOCUMENT_SEPARATOR_RE = re.compile(r"^---[ \t]*$", re.MULTILINE)
+
 
 def get_containers_from_spec(spec):
     """Return a list of images used in a kubernetes pod spec."""
@@ -130,26 +136,44 @@ def get_images_from_houston_configmap(doc, args):
     return images
 
 
+def is_relevant_doc(doc_text):
+    """Return True if a rendered document could hold images: pod specs and the houston config."""
+    return "containers:" in doc_text or "release-name-houston-config" in doc_text
+
+
 def helm_template(args, label, files):
-    """Run helm template for the given value files and return the parsed yaml."""
+    """Run helm template for the given value files and return the parsed docs that could hold images.
+
+    Documents are filtered as text before parsing, so the bulk of the output (RBAC, services,
+    configmaps, etc.) is never parsed.
+    """
     GIT_ROOT = next(
         iter([x for x in Path(__file__).resolve().parents if (x / ".git").exists()]),
         None,
     )
 
-    command = "helm template . --set forceIncompatibleKubernetes=true"
+    command = ["helm", "template", ".", "--set", "forceIncompatibleKubernetes=true"]
     for f in files:
-        command += f" -f {f}"
+        command.extend(["-f", f])
     if args.private_registry:
-        command += (
-            " --set global.privateRegistry.repository=example.com/the-private-registry --set global.privateRegistry.enabled=True"
+        command.extend(
+            [
+                "--set",
+                "global.privateRegistry.repository=example.com/the-private-registry",
+                "--set",
+                "global.privateRegistry.enabled=True",
+            ]
         )
 
     if args.verbose:
-        print(f"Running helm template [{label}]: {command}", flush=True, file=sys.stderr)
-    output = subprocess.check_output(command, shell=True, cwd=GIT_ROOT).decode("utf-8")
+        print(f"Running helm template [{label}]: {' '.join(command)}", flush=True, file=sys.stderr)
+    output = subprocess.check_output(command, cwd=GIT_ROOT).decode("utf-8")
 
-    return list(yaml.safe_load_all(output))
+    return [
+        yaml.load(doc_text, Loader=YamlLoader)  # noqa: S506 -- YamlLoader is a safe loader
+        for doc_text in DOCUMENT_SEPARATOR_RE.split(output)
+        if is_relevant_doc(doc_text)
+    ]
 
 
 def main():
@@ -175,9 +199,10 @@ def main():
     )
     args = parser.parse_args()
 
-    docs = []
-    for run in HELM_RUNS:
-        docs.extend(helm_template(args, run["label"], run["files"]))
+    # Each helm run is independent, so run them all at once.
+    with ThreadPoolExecutor(max_workers=len(HELM_RUNS)) as executor:
+        results = executor.map(lambda run: helm_template(args, run["label"], run["files"]), HELM_RUNS)
+        docs = [doc for result in results for doc in result]
 
     containers = set()
 
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 """
 Script to sign all container images in the Astronomer release JSON using cosign.
+
+Images are first verified concurrently to find the ones that are already signed, then the rest are
+signed --jobs at a time. A table of per-image results is printed at the end, and the exit code is
+non-zero if any image could not be signed.
 """
 
 import argparse
@@ -11,9 +15,28 @@ import os
 import subprocess
 import sys
 import tempfile
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 import requests
 
+# Number of cosign processes run at the same time
+DEFAULT_JOBS = 4
+
+# Runs a command like subprocess.run(cmd, capture_output=True, text=True, env=...), without check
+Runner = Callable[..., subprocess.CompletedProcess]
+
+
+@dataclass
+class SignResult:
+    """The outcome of signing one image."""
+
+    image: str
+    sha: str
+    status: str  # "already signed", "signed" or "failed"
+    detail: str = ""
+
 
 def check_requirements():
     """Check if required tools are installed."""
@@ -54,38 +77,84 @@ def write_key_file(env_var_name, file_path):
         sys.exit(1)
 
 
-def sign_image(repo, tag, sha, key_path, password=None):
-    """Sign a container image with cosign."""
+def digest_reference(repo, tag, sha):
+    return f"{repo}:{tag}@sha256:{sha}"
+
+
+def is_signed(reference, key_path, runner: Runner = subprocess.run):
+    """Return True if cosign can verify a signature on reference with the public half of key_path."""
+    verify_cmd = ["cosign", "verify", "--key", f"{key_path}.pub", "--insecure-ignore-tlog", reference]
+    return runner(verify_cmd, capture_output=True, text=True).returncode == 0
+
+
+def sign_image(repo, tag, sha, key_path, password=None, runner: Runner = subprocess.run, verify=True):
+    """Sign a container image with cosign, unless it is already signed.
+
+    Pass verify=False when the image is already known to be unsigned.
+    """
     full_image = f"{repo}:{tag}"
-    digest_reference = f"{full_image}@sha256:{sha}"
+    reference = digest_reference(repo, tag, sha)
+
+    if verify and is_signed(reference, key_path, runner):
+        print(f"Image already signed: {full_image}")
+        return SignResult(full_image, sha, "already signed")
 
     print(f"Signing image: {full_image} with SHA: {sha}")
     env = os.environ.copy()
     if password:
         env["COSIGN_PASSWORD"] = password
 
+    sign_cmd = ["cosign", "sign", "--key", key_path, "--tlog-upload=false", reference]
     try:
-        subprocess.run(
-            ["cosign", "verify", "--key", f"{key_path}.pub", "--insecure-ignore-tlog", digest_reference],
-            check=True,
-            capture_output=True,
-        )
-        print(f"Image already signed: {full_image}")
-        return  # Skip if already signed
-    except subprocess.CalledProcessError:
-        pass  # Image is not yet signed
-
-    sign_cmd = ["cosign", "sign", "--key", key_path, "--tlog-upload=false", digest_reference]
-    try:
-        subprocess.run(sign_cmd, env=env, check=True)
-        print(f"✓ Signed {full_image}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error signing {full_image}: {e}")
+        result = runner(sign_cmd, env=env, capture_output=True, text=True)
+    except OSError as e:
+        result = subprocess.CompletedProcess(sign_cmd, 127, stdout="", stderr=str(e))
+    if result.returncode:
+        error = (result.stderr or result.stdout or "").strip().splitlines()
+        detail = error[-1] if error else f"cosign sign exited {result.returncode}"
+        print(f"Error signing {full_image}: {detail}")
+        return SignResult(full_image, sha, "failed", detail)
+    print(f"✓ Signed {full_image}")
+    return SignResult(full_image, sha, "signed")
+
+
+def sign_images(images, key_path, password=None, jobs=DEFAULT_JOBS, runner: Runner = subprocess.run):
+    """Sign every (repo, tag, sha) in images that is not signed yet, jobs at a time.
+
+    Returns one SignResult per image, in the order of images.
+    """
+    references = [digest_reference(*image) for image in images]
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        print(f"Verifying {len(images)} images...")
+        signed = list(executor.map(lambda reference: is_signed(reference, key_path, runner), references))
+
+        def sign(index):
+            repo, tag, sha = images[index]
+            if signed[index]:
+                return SignResult(f"{repo}:{tag}", sha, "already signed")
+            return sign_image(repo, tag, sha, key_path, password, runner=runner, verify=False)
+
+        print(f"{signed.count(True)} already signed, signing {signed.count(False)}...")
+        return list(executor.map(sign, range(len(images))))
+
+
+def print_results(results):
+    """Print a table of the SignResult of each image."""
+    width = max((len(result.image) for result in results), default=0)
+    print(f"\n{'IMAGE':{width}}  {'SHA256':12}  STATUS")
+    for result in results:
+        detail = f": {result.detail}" if result.detail else ""
+        print(f"{result.image:{width}}  {result.sha[:12]:12}  {result.status}{detail}")
+    failed = sum(result.status == "failed" for result in results)
+    print(f"\n{len(results)} images, {failed} failed")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Sign container images in an Astronomer release.")
     parser.add_argument("--version", "-v", help="Version tag to sign (e.g., 0.36.0)", required=False)
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=DEFAULT_JOBS, help=f"images to sign concurrently (default {DEFAULT_JOBS})"
+    )
     args = parser.parse_args()
 
     check_requirements()
@@ -139,10 +208,13 @@ def main():
                 print(f"Error: Could not find or parse local file {json_file}")
                 sys.exit(1)
         print("Signing Astronomer images...")
-        for image_data in data["astronomer"]["images"].values():
-            sign_image(image_data["repository"], image_data["tag"], image_data["sha256"], private_key_path, password)
+        images = [(image["repository"], image["tag"], image["sha256"]) for image in data["astronomer"]["images"].values()]
+        results = sign_images(images, private_key_path, password, jobs=args.jobs)
 
         print("All images have been processed.")
+        print_results(results)
+        if any(result.status == "failed" for result in results):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
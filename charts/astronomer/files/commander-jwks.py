@@ -4,19 +4,23 @@ JWKS Fetcher for Astronomer Registry
 
 This script fetches JWKS (JSON Web Key Set) from the control plane
 and creates a Kubernetes secret for registry authentication.
+
+The secret is read and written directly through the Kubernetes API with the
+pod's service account token, so the hook needs no kubectl and no packages
+beyond the standard library.
 """
 
 import base64
+import http.client
 import json
 import logging
 import os
-import subprocess
+import random
+import ssl
 import sys
 import textwrap
 import time
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlparse
-from urllib.request import Request, urlopen
 
 
 def setup_logger():
@@ -37,6 +41,116 @@ def setup_logger():
 
 logger = setup_logger()
 
+# Longest wait between fetch attempts, however many have failed
+MAX_RETRY_DELAY = 60
+
+# The validators of the last fetch are kept on the Secret, so the next hook run
+# can ask the control plane whether the key changed at all
+ETAG_ANNOTATION = "astronomer.io/jwks-etag"
+LAST_MODIFIED_ANNOTATION = "astronomer.io/jwks-last-modified"
+
+SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+FIELD_MANAGER = "commander-jwks-hook"
+
+
+class KubernetesApiError(RuntimeError):
+    """The Kubernetes API answered with an HTTP error status"""
+
+    def __init__(self, status, message):
+        super().__init__(f"Kubernetes API returned HTTP {status}: {message}")
+        self.status = status
+
+
+class HttpConnection:
+    """One keep-alive connection to the host of a URL, reopened whenever it fails
+
+    Retries and consecutive API calls then share one TCP and TLS handshake instead
+    of paying for a new one per request.
+    """
+
+    def __init__(self, url, timeout=30, context=None):
+        parsed = urlparse(url)
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.base_path = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.context = context
+        self.connection = None
+
+    def _connect(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout, context=self.context)
+        return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request and return (status, reason, headers, body)
+
+        A kept-alive connection the server has closed in the meantime is reopened
+        and the request sent once more; any other failure closes the connection,
+        so the next request starts on a fresh one.
+        """
+        reused = self.connection is not None
+        if not reused:
+            self.connection = self._connect()
+        try:
+            self.connection.request(method, self.base_path + path, body=body, headers=headers or {})
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            self.close()
+            if not reused:
+                raise
+            return self.request(method, path, body, headers)
+        except (http.client.HTTPException, OSError) as e:
+            self.close()
+            if isinstance(e, OSError):
+                raise
+            raise ConnectionError(f"Invalid HTTP response from {self.host}: {e!r}") from e
+        if response.will_close:
+            self.close()
+        return response.status, response.reason, response.headers, data
+
+
+class KubernetesClient:
+    """Minimal Kubernetes API client authenticating with a service account token"""
+
+    def __init__(self, api_url, token_path=None, ca_path=None, timeout=30):
+        self.api_url = api_url.rstrip("/")
+        self.token_path = token_path
+        self.context = ssl.create_default_context(cafile=ca_path) if ca_path else None
+        self.timeout = timeout
+        self.connection = HttpConnection(self.api_url, timeout, self.context)
+
+    @classmethod
+    def in_cluster(cls):
+        """Return a client for the API server of the cluster this pod runs in"""
+        host = os.getenv("KUBERNETES_SERVICE_HOST")
+        port = os.getenv("KUBERNETES_SERVICE_PORT", "443")
+        if not host:
+            raise RuntimeError("KUBERNETES_SERVICE_HOST is not set; the hook must run in a pod")
+        if ":" in host:
+            host = f"[{host}]"
+        return cls(f"https://{host}:{port}", f"{SERVICE_ACCOUNT_DIR}/token", f"{SERVICE_ACCOUNT_DIR}/ca.crt")
+
+    def request(self, method, path, body=None, content_type="application/json"):
+        """Send one API request and return the decoded JSON response"""
+        data = None if body is None else json.dumps(body).encode()
+        headers = {"Accept": "application/json"}
+        if data is not None:
+            headers["Content-Type"] = content_type
+        if self.token_path:
+            with open(self.token_path) as token_file:
+                headers["Authorization"] = f"Bearer {token_file.read().strip()}"
+        status, _, _, response_body = self.connection.request(method, path, data, headers)
+        if status >= 400:
+            raise KubernetesApiError(status, response_body.decode("utf-8", errors="replace"))
+        return json.loads(response_body.decode("utf-8"))
+
 
 def validate_url_scheme(url):
     """Validate that URL uses HTTPS scheme for security"""
@@ -46,8 +160,20 @@ def validate_url_scheme(url):
     return True
 
 
-def fetch_jwks_from_endpoint(endpoint, retry_attempts, retry_delay):
-    """Fetch JWKS from the control plane endpoint"""
+def backoff_delay(attempt, base_delay, max_delay=MAX_RETRY_DELAY):
+    """Exponential backoff with jitter: half of the capped delay, plus up to half again at random"""
+    delay = min(base_delay * 2 ** (attempt - 1), max_delay)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def fetch_jwks_from_endpoint(endpoint, retry_attempts, retry_delay, etag=None, last_modified=None):
+    """Fetch JWKS from the control plane endpoint
+
+    With etag or last_modified from a previous fetch, the request is conditional.
+    Returns (jwks_data, validators), where jwks_data is None if the control plane
+    answered 304 Not Modified, and validators holds the ETag and Last-Modified
+    of the response to send with the next fetch.
+    """
     control_plane_endpoint = endpoint
     jwks_url = f"{control_plane_endpoint}/v1/.well-known/jwks.json"
 
@@ -55,31 +181,44 @@ def fetch_jwks_from_endpoint(endpoint, retry_attempts, retry_delay):
 
     validate_url_scheme(jwks_url)
 
-    for attempt in range(1, retry_attempts + 1):
-        logger.info(f"Attempt {attempt} of {retry_attempts}")
+    parsed = urlparse(jwks_url)
+    connection = HttpConnection(f"{parsed.scheme}://{parsed.netloc}")
+    path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    headers = {"Accept": "application/json", "User-Agent": "Astronomer-Registry-JWKS-Hook/1.0"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
 
-        try:
-            request = Request(jwks_url)  # noqa: S310 - URL scheme validated above
-            request.add_header("Accept", "application/json")
-            request.add_header("User-Agent", "Astronomer-Registry-JWKS-Hook/1.0")
+    try:
+        for attempt in range(1, retry_attempts + 1):
+            logger.info(f"Attempt {attempt} of {retry_attempts}")
 
-            with urlopen(request, timeout=30) as response:  # noqa: S310 - URL scheme validated above
-                if response.status == 200:
-                    jwks_data = response.read().decode("utf-8")
+            try:
+                status, reason, response_headers, body = connection.request("GET", path, headers=headers)
+                if status == 200:
+                    jwks_data = body.decode("utf-8")
                     logger.info("Successfully fetched JWKS")
-                    return json.loads(jwks_data)
-                logger.warning(f"HTTP {response.status}: {response.reason}")
-
-        except (URLError, HTTPError) as e:
-            logger.error(f"Network error: {e}")
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
-        except (ValueError, OSError) as e:
-            logger.error(f"Validation or system error: {e}")
-
-        if attempt < retry_attempts:
-            logger.info(f"Retrying in {retry_delay} seconds...")
-            time.sleep(retry_delay)
+                    validators = {"etag": response_headers.get("ETag"), "last_modified": response_headers.get("Last-Modified")}
+                    return json.loads(jwks_data), validators
+                if status == 304:
+                    logger.info("JWKS not modified since the last fetch")
+                    return None, {"etag": etag, "last_modified": last_modified}
+                logger.warning(f"HTTP {status}: {reason}")
+
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decode error: {e}")
+            except OSError as e:
+                logger.error(f"Network error: {e}")
+            except ValueError as e:
+                logger.error(f"Validation or system error: {e}")
+
+            if attempt < retry_attempts:
+                delay = backoff_delay(attempt, retry_delay)
+                logger.info(f"Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+    finally:
+        connection.close()
 
     raise RuntimeError(f"Failed to fetch JWKS after {retry_attempts} attempts")
 
@@ -101,62 +240,85 @@ def validate_jwks_structure(jwks_data):
     return True
 
 
-def create_kubernetes_secret(jwks_data, endpoint, namespace, release_name, secret_name):
-    """Create Kubernetes secret with JWKS data"""
-
-    logger.info(f"Creating secret '{secret_name}' in namespace '{namespace}'")
-
+def get_existing_secret(client, namespace, secret_name):
+    """Return the current secret as a dict, or None if it does not exist"""
     try:
-        result = subprocess.run(
-            ["kubectl", "get", "secret", secret_name, "-n", namespace], capture_output=True, text=True, check=False
-        )
+        return client.request("GET", f"/api/v1/namespaces/{namespace}/secrets/{secret_name}")
+    except KubernetesApiError as e:
+        if e.status == 404:
+            return None
+        raise
+
+
+def secret_is_current(secret, signed_public_cert, validators):
+    """Return True if secret already holds this certificate and these fetch validators"""
+    if not secret:
+        return False
+    annotations = secret.get("metadata", {}).get("annotations") or {}
+    return (
+        (secret.get("data") or {}).get("tls.crt") == signed_public_cert
+        and annotations.get(ETAG_ANNOTATION) == validators.get("etag")
+        and annotations.get(LAST_MODIFIED_ANNOTATION) == validators.get("last_modified")
+    )
+
+
+def create_kubernetes_secret(client, jwks_data, endpoint, namespace, release_name, secret_name, validators=None):
+    """Create or update the Kubernetes secret with JWKS data in one server-side apply"""
+
+    logger.info(f"Applying secret '{secret_name}' in namespace '{namespace}'")
+
+    annotations = {
+        "astronomer.io/commander-sync": f"platform-release={release_name}",
+        "astronomer.io/jwks-source": f"{endpoint}/v1/.well-known/jwks.json",
+        "astronomer.io/jwks-fetched-at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    validators = validators or {}
+    if validators.get("etag"):
+        annotations[ETAG_ANNOTATION] = validators["etag"]
+    if validators.get("last_modified"):
+        annotations[LAST_MODIFIED_ANNOTATION] = validators["last_modified"]
+
+    secret = {
+        "apiVersion": "v1",
+        "kind": "Secret",
+        "metadata": {
+            "name": secret_name,
+            "namespace": namespace,
+            "labels": {
+                "tier": "astronomer",
+                "component": "commander-jwks-hook",
+                "release": release_name,
+                "app.kubernetes.io/name": "commander-jwks",
+                "app.kubernetes.io/instance": release_name,
+                "app.kubernetes.io/component": "commander-jwks",
+            },
+            "annotations": annotations,
+        },
+        "type": "Opaque",
+        "data": {"tls.crt": jwks_data},
+    }
 
-        secret_exists = result.returncode == 0
-        action = "apply" if secret_exists else "create"
-        logger.info(f"{'Updating' if secret_exists else 'Creating'} secret '{secret_name}'")
-
-        secret_yaml = f"""apiVersion: v1
-kind: Secret
-metadata:
-  name: {secret_name}
-  namespace: {namespace}
-  labels:
-    tier: astronomer
-    component: commander-jwks-hook
-    release: {release_name}
-    app.kubernetes.io/name: commander-jwks
-    app.kubernetes.io/instance: {release_name}
-    app.kubernetes.io/component: commander-jwks
-  annotations:
-    astronomer.io/commander-sync: "platform-release={release_name}"
-    astronomer.io/jwks-source: "{endpoint}/v1/.well-known/jwks.json"
-    astronomer.io/jwks-fetched-at: "{time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}"
-type: Opaque
-data:
-  tls.crt: {jwks_data}
-"""
-
-        subprocess.run(["kubectl", action, "-f", "-"], input=secret_yaml, text=True, capture_output=True, check=True)
-
-        logger.info(f"Secret '{secret_name}' {action}d successfully")
-
-        verify_result = subprocess.run(
-            ["kubectl", "get", "secret", secret_name, "-n", namespace, "-o", "jsonpath={.metadata.labels.component}"],
-            capture_output=True,
-            text=True,
-            check=True,
+    try:
+        # JSON is valid YAML, so it can be sent as an apply patch as it is
+        applied = client.request(
+            "PATCH",
+            f"/api/v1/namespaces/{namespace}/secrets/{secret_name}?fieldManager={FIELD_MANAGER}&force=true",
+            secret,
+            content_type="application/apply-patch+yaml",
         )
+    except (KubernetesApiError, OSError) as e:
+        logger.error(f"Kubernetes API error: {e}")
+        raise RuntimeError(f"Failed to create/update Kubernetes secret: {e}") from e
 
-        if verify_result.stdout.strip() == "commander-jwks-hook":
-            logger.info("Secret verification successful")
-        else:
-            logger.warning("Warning: Secret verification failed")
+    logger.info(f"Secret '{secret_name}' applied successfully")
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"kubectl error: {e}")
-        logger.error(f"stdout: {e.stdout}")
-        logger.error(f"stderr: {e.stderr}")
-        raise RuntimeError(f"Failed to create/update Kubernetes secret: {e}") from e
+    # The apply response is the stored object, so it doubles as the verification
+    applied_component = (applied.get("metadata", {}).get("labels") or {}).get("component")
+    applied_cert = (applied.get("data") or {}).get("tls.crt")
+    if applied_component == "commander-jwks-hook" and applied_cert == jwks_data:
+        logger.info("Secret verification successful")
+    else:
+        logger.warning("Warning: Secret verification failed")
 
 
 def get_base64_pem_from_jwks(jwks_data):
@@ -192,15 +354,34 @@ def main():
     logger.info(f"  Release Name: {release_name}")
 
     try:
-        jwks_data = fetch_jwks_from_endpoint(control_plane_endpoint, retry_attempts, retry_delay)
+        client = KubernetesClient.in_cluster()
+        existing_secret = get_existing_secret(client, namespace, secret_name)
+        annotations = {}
+        if existing_secret and (existing_secret.get("data") or {}).get("tls.crt"):
+            annotations = existing_secret.get("metadata", {}).get("annotations") or {}
+        jwks_data, validators = fetch_jwks_from_endpoint(
+            control_plane_endpoint,
+            retry_attempts,
+            retry_delay,
+            etag=annotations.get(ETAG_ANNOTATION),
+            last_modified=annotations.get(LAST_MODIFIED_ANNOTATION),
+        )
+        if jwks_data is None:
+            logger.info(f"Secret '{secret_name}' is up to date; nothing to do")
+            return
         signed_public_cert = get_base64_pem_from_jwks(jwks_data)
         logger.info(f"  Release Name: {release_name}")
         validate_jwks_structure(jwks_data)
 
-        create_kubernetes_secret(signed_public_cert, control_plane_endpoint, namespace, release_name, secret_name)
+        if secret_is_current(existing_secret, signed_public_cert, validators):
+            logger.info(f"Secret '{secret_name}' already holds this JWKS; nothing to do")
+            return
+        create_kubernetes_secret(
+            client, signed_public_cert, control_plane_endpoint, namespace, release_name, secret_name, validators=validators
+        )
         logger.info("JWKS hook completed successfully!")
         logger.info("Registry components can now use the 'commander-jwt-secret' for JWT validation")
-    except (RuntimeError, ValueError, subprocess.CalledProcessError) as e:
+    except (RuntimeError, ValueError, OSError) as e:
         logger.error(f"Error: {e}")
         sys.exit(1)
 
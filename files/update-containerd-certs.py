@@ -43,20 +43,53 @@ Environment variables (injected by the Helm daemonset):
                                 File is absent when the operator hasn't set
                                 `privateCaCertsAddToHost.containerdConfigToml`.
                                 Unused on 2.x.
+  CA_WATCH_MODE               - "inotify" (default) to sleep until the mounted secrets
+                                change, or "poll" to check them every second. inotify
+                                falls back to polling when the kernel can't provide it.
+  FALLBACK_POLL_SECONDS       - In inotify mode, reconcile at least this often even
+                                without events, in case one was missed (default: 300).
+  METRICS_PORT                - Serve Prometheus metrics on this port at /metrics
+                                (default: 0, disabled).
+  DRY_RUN                     - "true" to log the files the script would write or
+                                remove, and exit without changing any or
+                                restarting containerd.
+  RESTART_ROLLOUT             - How containerd restarts are spread across nodes that
+                                all see a CA change at once: "immediate" (default),
+                                "jitter" (wait a delay derived from NODE_NAME) or
+                                "lease" (hold one of RESTART_MAX_CONCURRENT Lease
+                                objects in POD_NAMESPACE for the restart).
+  NODE_NAME                   - Node name, for jitter and as the Lease holder (default: hostname).
+  RESTART_JITTER_SECONDS      - Restarts in "jitter" mode are spread over this window (default: 300).
+  RESTART_MAX_CONCURRENT      - Nodes allowed to restart at once in "lease" mode (default: 1).
+  RESTART_LEASE_NAME          - Lease name prefix; slot N is "<name>-N" (default: containerd-ca-update-restart).
+  RESTART_RECOVERY_TIMEOUT    - Seconds to wait for containerd to be active again
+                                after a restart before giving up the slot (default: 120).
 
 Requires: Python >= 3.11 (for stdlib tomllib). The DaemonSet runs this script
 with the cert-copier image's Python.
 """
 
+import ctypes
+import ctypes.util
 import hashlib
+import json
 import logging
 import os
 import re
+import select
 import shutil
+import socket
+import ssl
 import subprocess
 import sys
+import threading
 import time
 import tomllib
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 logging.basicConfig(
@@ -95,11 +128,354 @@ PLUGIN_NS = {
 
 POLL_INTERVAL_SECONDS = 1
 
+WATCH_MODE = os.environ.get("CA_WATCH_MODE", "inotify")
+FALLBACK_POLL_SECONDS = float(os.environ.get("FALLBACK_POLL_SECONDS", "300"))
+# After an event, wait until the secret directory has been quiet this long, so
+# a whole kubelet update (several creates, a rename and a delete) causes one reconcile.
+DEBOUNCE_SECONDS = 0.1
+# How long to wait before retrying a reconcile that failed
+ERROR_RETRY_SECONDS = 10
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+
+DRY_RUN = os.environ.get("DRY_RUN", "").lower() in ("1", "true", "yes")
+
+RESTART_ROLLOUT = os.environ.get("RESTART_ROLLOUT", "immediate")
+NODE_NAME = os.environ.get("NODE_NAME") or socket.gethostname()
+RESTART_JITTER_SECONDS = float(os.environ.get("RESTART_JITTER_SECONDS", "300"))
+RESTART_MAX_CONCURRENT = int(os.environ.get("RESTART_MAX_CONCURRENT", "1"))
+RESTART_LEASE_NAME = os.environ.get("RESTART_LEASE_NAME", "containerd-ca-update-restart")
+RESTART_LEASE_NAMESPACE = os.environ.get("POD_NAMESPACE", "default")
+RESTART_RECOVERY_TIMEOUT = float(os.environ.get("RESTART_RECOVERY_TIMEOUT", "120"))
+# How often to look for a free restart Lease, and for containerd to come back
+LEASE_RETRY_SECONDS = 5
+RECOVERY_POLL_SECONDS = 0.5
+SERVICE_ACCOUNT_DIR = Path("/var/run/secrets/kubernetes.io/serviceaccount")
+
 _REGISTRY_HOST_PATTERN = re.compile(
     r"^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)*[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?$"
 )
 
 
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+class Metrics:
+    """Counters, gauges and a reconcile duration histogram in the Prometheus text format.
+
+    Hand-rolled because the cert-copier image only has the standard library.
+    """
+
+    PREFIX = "containerd_ca_updater"
+    DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    HELP = {
+        "reconciles_total": ("counter", "Reconciles run after a source PEM change."),
+        "source_checks_total": ("counter", "Source PEM change checks, by whether the PEMs had to be hashed."),
+        "hosts_toml_writes_total": ("counter", "hosts.toml files written."),
+        "containerd_restarts_total": ("counter", "containerd restarts."),
+        "restart_wait_seconds": ("gauge", "Time the last restart waited for its jitter delay or Lease."),
+        "restart_recovery_seconds": ("gauge", "Time containerd took to be active again after the last restart."),
+        "errors_total": ("counter", "Failed reconciles, by stage."),
+        "last_success_timestamp_seconds": ("gauge", "Unix time of the last successful reconcile."),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: dict[tuple[str, tuple], float] = {}
+        self.duration_counts = [0] * len(self.DURATION_BUCKETS)
+        self.duration_sum = 0.0
+        self.duration_count = 0
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self.lock:
+            self.values[name, tuple(sorted(labels.items()))] = value
+
+    def observe_duration(self, seconds: float) -> None:
+        with self.lock:
+            for i, bound in enumerate(self.DURATION_BUCKETS):
+                if seconds <= bound:
+                    self.duration_counts[i] += 1
+            self.duration_sum += seconds
+            self.duration_count += 1
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, (metric_type, help_text) in self.HELP.items():
+                lines += [f"# HELP {self.PREFIX}_{name} {help_text}", f"# TYPE {self.PREFIX}_{name} {metric_type}"]
+                for (key_name, labels), value in sorted(self.values.items()):
+                    if key_name == name:
+                        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                        lines.append(
+                            f"{self.PREFIX}_{name}{{{label_text}}} {value:g}" if labels else f"{self.PREFIX}_{name} {value:g}"
+                        )
+            histogram = f"{self.PREFIX}_reconcile_duration_seconds"
+            lines += [f"# HELP {histogram} Time taken by reconciles.", f"# TYPE {histogram} histogram"]
+            for bound, count in zip(self.DURATION_BUCKETS, self.duration_counts, strict=True):
+                lines.append(f'{histogram}_bucket{{le="{bound:g}"}} {count}')
+            lines += [
+                f'{histogram}_bucket{{le="+Inf"}} {self.duration_count}',
+                f"{histogram}_sum {self.duration_sum:g}",
+                f"{histogram}_count {self.duration_count}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug("metrics: " + format, *args)
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """Serve /metrics on port from a daemon thread, so it never blocks or outlives the reconcile loop."""
+    server = ThreadingHTTPServer(("", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    log.info("Serving metrics on :%d/metrics", server.server_port)
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Restart coordination
+# ---------------------------------------------------------------------------
+class KubeApiError(Exception):
+    """The Kubernetes API answered with an HTTP error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class KubeClient:
+    """Just enough of a Kubernetes API client for Lease objects, on urllib.
+
+    Hand-rolled because the cert-copier image only has the standard library.
+    The token is re-read for every request, since kubelet rotates it.
+    """
+
+    def __init__(self, base_url: str, token_file: Path | None = None, ca_file: Path | None = None, timeout: float = 10):
+        self.base_url = base_url.rstrip("/")
+        self.token_file = token_file
+        self.context = ssl.create_default_context(cafile=str(ca_file)) if ca_file else None
+        self.timeout = timeout
+
+    @classmethod
+    def in_cluster(cls) -> "KubeClient":
+        """Return a client for the API server this pod runs under, using its service account."""
+        host = os.environ["KUBERNETES_SERVICE_HOST"]
+        port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+        if ":" in host:
+            host = f"[{host}]"
+        return cls(f"https://{host}:{port}", SERVICE_ACCOUNT_DIR / "token", SERVICE_ACCOUNT_DIR / "ca.crt")
+
+    def request(self, method: str, path: str, body: dict | None = None) -> dict:
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)  # noqa: S310 -- http(s) API server URL
+        request.add_header("Accept", "application/json")
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        if self.token_file:
+            request.add_header("Authorization", f"Bearer {self.token_file.read_text().strip()}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout, context=self.context) as response:  # noqa: S310 -- as above
+                return json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as exc:
+            raise KubeApiError(exc.code, exc.read().decode(errors="replace")) from exc
+
+
+def _micro_time(epoch: float) -> str:
+    """Format epoch as a Kubernetes MicroTime."""
+    return datetime.fromtimestamp(epoch, UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class RestartLease:
+    """Limit concurrent containerd restarts across the cluster to `slots`.
+
+    Each slot is a coordination.k8s.io Lease named "<name>-<slot>". A node
+    holds a slot by being its holderIdentity; a slot is free when it has no
+    holder, or its holder stopped renewing it more than leaseDurationSeconds
+    ago (a pod that died mid-restart). Lost races surface as HTTP 409 from the
+    resourceVersion check on create or update, and the node moves on to the
+    next slot.
+    """
+
+    def __init__(self, client: KubeClient, namespace: str, name: str, slots: int, holder: str, duration: float):
+        self.client = client
+        self.collection = f"/apis/coordination.k8s.io/v1/namespaces/{namespace}/leases"
+        self.name = name
+        self.slots = max(1, slots)
+        self.holder = holder
+        self.duration = int(duration)
+
+    def _is_free(self, lease: dict, now: float) -> bool:
+        spec = lease.get("spec") or {}
+        holder = spec.get("holderIdentity")
+        if not holder or holder == self.holder:
+            return True
+        renewed = spec.get("renewTime") or spec.get("acquireTime")
+        if not renewed:
+            return True
+        return datetime.fromisoformat(renewed).timestamp() + spec.get("leaseDurationSeconds", self.duration) < now
+
+    def try_acquire(self) -> str | None:
+        """Take a free slot and return its Lease name, or None if every slot is held."""
+        now = time.time()
+        spec = {
+            "holderIdentity": self.holder,
+            "leaseDurationSeconds": self.duration,
+            "acquireTime": _micro_time(now),
+            "renewTime": _micro_time(now),
+        }
+        for slot in range(self.slots):
+            name = f"{self.name}-{slot}"
+            try:
+                self.client.request(
+                    "POST",
+                    self.collection,
+                    {"apiVersion": "coordination.k8s.io/v1", "kind": "Lease", "metadata": {"name": name}, "spec": spec},
+                )
+                return name
+            except KubeApiError as exc:
+                if exc.status != 409:
+                    raise
+            lease = self.client.request("GET", f"{self.collection}/{name}")
+            if not self._is_free(lease, now):
+                continue
+            lease["spec"] = spec
+            try:
+                self.client.request("PUT", f"{self.collection}/{name}", lease)
+                return name
+            except KubeApiError as exc:
+                if exc.status != 409:
+                    raise
+        return None
+
+    def acquire(self) -> str:
+        """Wait for a free slot, and return the name of the Lease taken."""
+        while (name := self.try_acquire()) is None:
+            log.info("All %d restart slot(s) are held by other nodes; retrying in %ss", self.slots, LEASE_RETRY_SECONDS)
+            time.sleep(LEASE_RETRY_SECONDS)
+        return name
+
+    def release(self, name: str) -> None:
+        """Give up the slot, unless another node has already taken it over."""
+        lease = self.client.request("GET", f"{self.collection}/{name}")
+        if (lease.get("spec") or {}).get("holderIdentity") != self.holder:
+            return
+        lease["spec"]["holderIdentity"] = None
+        self.client.request("PUT", f"{self.collection}/{name}", lease)
+
+
+def node_jitter(node_name: str, window: float) -> float:
+    """Return a delay in [0, window) that is stable for node_name and spread evenly across nodes."""
+    if window <= 0:
+        return 0.0
+    fraction = int.from_bytes(hashlib.sha256(node_name.encode()).digest()[:8], "big") / 2**64
+    return fraction * window
+
+
+def wait_for_containerd(timeout: float = RESTART_RECOVERY_TIMEOUT) -> float:
+    """Wait until systemd reports containerd active, and return how long that took.
+
+    Raises:
+        RuntimeError: containerd did not come back within timeout.
+    """
+    started = time.monotonic()
+    while True:
+        result = subprocess.run(
+            [
+                "nsenter",
+                "--target",
+                "1",
+                "--mount",
+                "--uts",
+                "--ipc",
+                "--net",
+                "--pid",
+                "systemctl",
+                "is-active",
+                "--quiet",
+                "containerd",
+            ],
+            check=False,
+            timeout=10,
+        )
+        elapsed = time.monotonic() - started
+        if result.returncode == 0:
+            return elapsed
+        if elapsed >= timeout:
+            raise RuntimeError(f"containerd not active {timeout:g}s after restart")
+        time.sleep(RECOVERY_POLL_SECONDS)
+
+
+def _restart_holding_lease() -> None:
+    """Restart containerd while holding a restart Lease, falling back to jitter if the API is unusable."""
+    try:
+        lease = RestartLease(
+            KubeClient.in_cluster(),
+            RESTART_LEASE_NAMESPACE,
+            RESTART_LEASE_NAME,
+            RESTART_MAX_CONCURRENT,
+            NODE_NAME,
+            RESTART_RECOVERY_TIMEOUT + 60,
+        )
+        started = time.monotonic()
+        name = lease.acquire()
+    except (KeyError, OSError, ValueError, KubeApiError) as exc:
+        log.warning("Cannot coordinate restarts through Leases (%s); falling back to per-node jitter", exc)
+        _restart_after_jitter()
+        return
+    metrics.set("restart_wait_seconds", time.monotonic() - started)
+    log.info("Holding restart Lease %s/%s", RESTART_LEASE_NAMESPACE, name)
+    try:
+        _restart_and_wait()
+    finally:
+        try:
+            lease.release(name)
+        except (OSError, ValueError, KubeApiError) as exc:
+            log.warning("Failed to release restart Lease %s (it expires on its own): %s", name, exc)
+
+
+def _restart_after_jitter() -> None:
+    delay = node_jitter(NODE_NAME, RESTART_JITTER_SECONDS)
+    log.info("Delaying containerd restart by %.1fs to spread restarts across nodes", delay)
+    time.sleep(delay)
+    metrics.set("restart_wait_seconds", delay)
+    _restart_and_wait()
+
+
+def _restart_and_wait() -> None:
+    log.info("Restarting containerd on host...")
+    subprocess.run(
+        ["nsenter", "--target", "1", "--mount", "--uts", "--ipc", "--net", "--pid", "systemctl", "restart", "containerd"],
+        check=True,
+        timeout=60,
+    )
+    metrics.inc("containerd_restarts_total")
+    recovery = wait_for_containerd()
+    metrics.set("restart_recovery_seconds", recovery)
+    log.info("containerd restarted; active again after %.1fs.", recovery)
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -194,14 +570,14 @@ def checksum_of_files(*paths: Path) -> str:
 
 
 def restart_containerd() -> None:
-    """Restart the containerd service on the host via nsenter."""
-    log.info("Restarting containerd on host...")
-    subprocess.run(
-        ["nsenter", "--target", "1", "--mount", "--uts", "--ipc", "--net", "--pid", "systemctl", "restart", "containerd"],
-        check=True,
-        timeout=60,
-    )
-    log.info("containerd restarted.")
+    """Restart the containerd service on the host via nsenter, spread across
+    nodes as configured by RESTART_ROLLOUT, and wait for it to come back."""
+    if RESTART_ROLLOUT == "lease":
+        _restart_holding_lease()
+    elif RESTART_ROLLOUT == "jitter":
+        _restart_after_jitter()
+    else:
+        _restart_and_wait()
 
 
 def backup_config_toml() -> None:
@@ -225,9 +601,18 @@ def _parse_config_toml(path: Path) -> dict:
             config.toml means we cannot make structural decisions about it.
     """
     try:
-        with path.open("rb") as fh:
-            return tomllib.load(fh)
-    except (OSError, tomllib.TOMLDecodeError) as exc:
+        text = path.read_text()
+    except OSError as exc:
+        log.error("Failed to parse %s: %s", path, exc)
+        raise RuntimeError(f"cannot parse {path}") from exc
+    return _parse_config_text(text, path)
+
+
+def _parse_config_text(text: str, path: Path) -> dict:
+    """Parse config.toml text already read from path. Raises like _parse_config_toml."""
+    try:
+        return tomllib.loads(text)
+    except tomllib.TOMLDecodeError as exc:
         log.error("Failed to parse %s: %s", path, exc)
         raise RuntimeError(f"cannot parse {path}") from exc
 
@@ -336,14 +721,14 @@ def _generate_passthrough_hosts_toml(registry: str, endpoints: list[str]) -> str
     return content
 
 
-def _write_preserved_mirrors(mirrors: dict[str, list[str]]) -> None:
-    """For each inline `mirrors.<host>` block discovered in config.toml, write a
+def _plan_preserved_mirrors(mirrors: dict[str, list[str]]) -> list["PlannedFile"]:
+    """For each inline `mirrors.<host>` block discovered in config.toml, plan a
     `certs.d/<host>/hosts.toml` that preserves the cloud-provider mirror
     behavior (e.g. a pull-through cache the provider ships by default).
 
     Skips:
       * <host> == REGISTRY_HOST — the private-registry hosts.toml is written
-        by `_apply_v2_hosts_toml()` with the customer CA. Translating the
+        by the reconcile loop (plan_reconcile()) with the customer CA. Translating the
         inline block here would clobber that file with a no-`ca` version.
       * Hosts where certs.d/<host>/hosts.toml already exists — respect any
         hand-authored or operator-supplied file.
@@ -352,24 +737,17 @@ def _write_preserved_mirrors(mirrors: dict[str, list[str]]) -> None:
     knowledge is hard-coded. Whatever the cloud provider's default config
     declared is what gets carried over.
     """
+    plan = []
     for host, endpoints in mirrors.items():
         if host == REGISTRY_HOST:
             continue
-        host_dir = CONTAINERD_HOST_PATH / "certs.d" / host
-        hosts_toml = host_dir / "hosts.toml"
+        hosts_toml = CONTAINERD_HOST_PATH / "certs.d" / host / "hosts.toml"
         if hosts_toml.exists():
             log.info("Skipping mirror passthrough for %s: hosts.toml already exists", host)
             continue
-        host_dir.mkdir(parents=True, exist_ok=True)
         content = _generate_passthrough_hosts_toml(host, endpoints)
-        hosts_toml.write_text(content)
-        log.info(
-            "Preserved inline mirror for %s -> %s as %s. Content:\n%s",
-            host,
-            list(endpoints),
-            hosts_toml,
-            content,
-        )
+        plan.append(PlannedFile(hosts_toml, content.encode(), f"preserve inline mirror for {host} -> {list(endpoints)}"))
+    return plan
 
 
 def _strip_registry_mirrors_blocks(text: str) -> str:
@@ -417,15 +795,105 @@ def _config_has_legacy_mirrors(config: dict) -> bool:
     return False
 
 
-def inject_config_path(containerd_version: int) -> None:
-    """Add config_path under the correct plugin namespace and restart containerd once.
+@dataclass(frozen=True)
+class PlannedFile:
+    """A file a reconcile wants on disk: its full content and why it is needed.
 
-    Primarily the containerd 2.x strategy. See module docstring for why 1.x uses
-    a different path.
+    A content of None means the file should be removed. When the sha256 of the
+    content is known, an unchanged file is recognised without reading it (see
+    _dest_matches).
+    """
+
+    path: Path
+    content: bytes | None
+    reason: str
+    sha256: str | None = None
+
+    def differs_from_disk(self) -> bool:
+        if self.content is None:
+            return self.path.exists()
+        if self.sha256 is not None:
+            return not _dest_matches(self.path, len(self.content), self.sha256)
+        try:
+            return self.path.read_bytes() != self.content
+        except OSError:
+            return True
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+    """Replace path with content by writing a temp file next to it and renaming
+    it into place, so containerd never reads a partially written file. Keeps
+    the mode of the file being replaced (0644 for new files)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    try:
+        with tmp.open("wb") as fh:
+            fh.write(content)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def apply_plan(plan: list[PlannedFile], dry_run: bool = False) -> list[Path]:
+    """Write each planned file whose content differs from what is on disk, and
+    remove each planned removal that still exists.
+
+    Returns the paths that changed (or, in a dry run, would have changed). A
+    dry run logs the plan and changes nothing.
+    """
+    changed = []
+    for planned in plan:
+        if not planned.differs_from_disk():
+            log.debug("Unchanged: %s", planned.path)
+        elif dry_run:
+            changed.append(planned.path)
+            if planned.content is None:
+                log.info("[dry run] Would remove %s (%s)", planned.path, planned.reason)
+            else:
+                log.info(
+                    "[dry run] Would write %s (%s). Content:\n%s",
+                    planned.path,
+                    planned.reason,
+                    planned.content.decode(errors="replace"),
+                )
+        elif planned.content is None:
+            changed.append(planned.path)
+            planned.path.unlink(missing_ok=True)
+            log.info("Removed %s (%s)", planned.path, planned.reason)
+        else:
+            changed.append(planned.path)
+            write_atomic(planned.path, planned.content)
+            if planned.path.name == "hosts.toml":
+                metrics.inc("hosts_toml_writes_total")
+            log.info("Wrote %s (%s)", planned.path, planned.reason)
+
+        if dry_run:
+            continue
+        if planned.content is None:
+            _dest_pem_state.pop(planned.path, None)
+        elif planned.sha256 is not None:
+            _dest_pem_state[planned.path] = (len(planned.content), planned.sha256)
+    return changed
+
+
+def plan_config_path_injection(containerd_version: int) -> list[PlannedFile]:
+    """Plan the files needed for `config_path` to take effect under the correct plugin namespace.
+
+    config.toml is read and parsed once. The plan holds a hosts.toml for each
+    inline mirror being carried over, and the new config.toml with the mirrors
+    stripped and `config_path` added; it is empty if there is nothing to do.
     """
     plugin = PLUGIN_NS[containerd_version]
     keypath = plugin["keypath"]
-    parsed = _parse_config_toml(CONFIG_TOML)
+    source_text = CONFIG_TOML.read_text()
+    parsed = _parse_config_text(source_text, CONFIG_TOML)
     subtree = _registry_subtree(parsed, containerd_version)
 
     has_config_path = subtree is not None and "config_path" in subtree
@@ -436,15 +904,14 @@ def inject_config_path(containerd_version: int) -> None:
             "config_path already set under [%s] and no legacy mirrors to strip; nothing to do.",
             plugin["header"],
         )
-        return
+        return []
 
-    _write_preserved_mirrors(_extract_legacy_mirrors(parsed))
+    plan = _plan_preserved_mirrors(_extract_legacy_mirrors(parsed))
 
-    source_text = CONFIG_TOML.read_text()
     stripped_text = _strip_registry_mirrors_blocks(source_text)
     if stripped_text != source_text:
         log.info(
-            "Stripped legacy `registry.mirrors.*` block(s) from config.toml (incompatible with config_path under containerd 2.x)."
+            "Stripping legacy `registry.mirrors.*` block(s) from config.toml (incompatible with config_path under containerd 2.x)."
         )
 
     # Only append config_path if it isn't already there — avoids producing
@@ -471,27 +938,26 @@ def inject_config_path(containerd_version: int) -> None:
         log.error("Post-inject parse did not find config_path=%r under %s", CERT_CONFIG_PATH, keypath)
         raise RuntimeError("post-inject validation: config_path missing or wrong value")
 
-    CONFIG_TOML.write_text(candidate)
-    log.info("Reconciled config.toml: config_path=%s, mirrors removed.", CERT_CONFIG_PATH)
-    restart_containerd()
-
+    plan.append(PlannedFile(CONFIG_TOML, candidate.encode(), f"config_path={CERT_CONFIG_PATH}, mirrors removed"))
+    return plan
 
-def write_customer_config_toml(blob: str) -> bool:
-    """Append an operator-supplied TOML blob to config.toml, containerd 1.x style.
 
-    This is the containerd 1.x strategy. We do NOT generate registry-trust TOML
-    ourselves here; the operator supplies the fragment via the Helm value
-    `privateCaCertsAddToHost.containerdConfigToml`, and we paste it verbatim
-    into config.toml.
+def inject_config_path(containerd_version: int, dry_run: bool = False) -> None:
+    """Add config_path under the correct plugin namespace and restart containerd once.
 
-    The typical blob looks like:
+    Primarily the containerd 2.x strategy. See module docstring for why 1.x uses
+    a different path. Preserved-mirror hosts.toml files are written before
+    config.toml, so containerd never runs with the mirrors stripped but their
+    hosts.toml replacements missing.
+    """
+    changed = apply_plan(plan_config_path_injection(containerd_version), dry_run=dry_run)
+    if CONFIG_TOML in changed and not dry_run:
+        log.info("Reconciled config.toml: config_path=%s, mirrors removed.", CERT_CONFIG_PATH)
+        restart_containerd()
 
-        [plugins."io.containerd.grpc.v1.cri".registry.configs."<registry>".tls]
-          ca_file = "/etc/containerd/certs.d/<registry>/<ca>.pem"
 
-    Raises:
-        RuntimeError: blob is empty (nothing to apply) or produces invalid TOML.
-    """
+def _customer_config_candidate(blob: str, base: str) -> str:
+    """Return config.toml with blob appended to base, validated as TOML."""
     if not blob.strip():
         log.error(
             "CONTAINERD_CONFIG_TOML is empty. On containerd 1.x, the operator "
@@ -504,7 +970,7 @@ def write_customer_config_toml(blob: str) -> bool:
 
     # Ensure the appended blob starts on a fresh line so it can't accidentally
     # merge into a pre-existing key on the last line of config.toml.
-    candidate = CONFIG_TOML_BAK.read_text().rstrip() + "\n\n" + blob.rstrip() + "\n"
+    candidate = base.rstrip() + "\n\n" + blob.rstrip() + "\n"
 
     try:
         tomllib.loads(candidate)
@@ -515,15 +981,7 @@ def write_customer_config_toml(blob: str) -> bool:
             exc,
         )
         raise RuntimeError("containerdConfigToml produces invalid TOML") from exc
-
-    # Skip the write + restart if the file already matches — keeps steady-state
-    # ticks cheap.
-    if CONFIG_TOML.is_file() and CONFIG_TOML.read_text() == candidate:
-        return False
-
-    CONFIG_TOML.write_text(candidate)
-    log.info("Applied operator-supplied containerdConfigToml (%d bytes)", len(blob))
-    return True
+    return candidate
 
 
 def generate_hosts_toml(ca_files: list[Path]) -> str:
@@ -542,50 +1000,166 @@ def generate_hosts_toml(ca_files: list[Path]) -> str:
     )
 
 
-def copy_ca_certs() -> list[Path]:
-    """Copy each mounted CA PEM into certs.d/<registry>/ under its source filename.
-
-    `global.privateCaCerts` is a list, so customers can mount multiple CA
-    secrets. Each PEM keeps its own filename on disk so containerd sees one
-    file per CA. The hosts.toml written elsewhere in this script lists every
-    PEM under its `ca = [...]` key, which is how containerd trusts all of them.
-
-    Returns the sorted list of **host-side** PEM paths (CERTS_DIR_HOST / name).
-    Callers embed these straight into config.toml / hosts.toml, both of which
-    are read by containerd running on the host — so the paths must be what the
-    host sees, not the container mount. For filesystem I/O (checksumming the
-    written files), callers can convert via `_host_to_container_path()`.
-    """
+def _source_pems() -> list[Path]:
+    """Return the mounted CA PEMs, ordered by secret directory then filename."""
     if not PRIVATE_CA_CERTS_DIR.is_dir():
         return []
-
     sources: list[Path] = []
     for secret_dir in sorted(PRIVATE_CA_CERTS_DIR.iterdir()):
         if not secret_dir.is_dir():
             continue
         sources.extend(sorted(secret_dir.glob("*.pem")))
+    return sources
+
 
+# (size, sha256) of each PEM apply_plan() has written or verified, keyed by
+# its container-side path, so unchanged PEMs are neither rewritten nor re-read.
+_dest_pem_state: dict[Path, tuple[int, str]] = {}
+
+
+def _dest_matches(dest: Path, size: int, digest: str) -> bool:
+    """Return True if dest already holds content of this size and sha256."""
+    try:
+        dest_size = dest.stat().st_size
+    except FileNotFoundError:
+        return False
+    if dest_size != size:
+        return False
+    if _dest_pem_state.get(dest) == (size, digest):
+        return True
+    return hashlib.sha256(dest.read_bytes()).hexdigest() == digest
+
+
+def plan_ca_certs() -> tuple[list[PlannedFile], dict[Path, str]]:
+    """Plan syncing each mounted CA PEM into certs.d/<registry>/ under its source filename.
+
+    `global.privateCaCerts` is a list, so customers can mount multiple CA
+    secrets. Each PEM keeps its own filename on disk so containerd sees one
+    file per CA. The hosts.toml written elsewhere in this script lists every
+    PEM under its `ca = [...]` key, which is how containerd trusts all of them.
+
+    The plan holds a copy of every source PEM (skipped by apply_plan when the
+    destination already matches) and a removal of every PEM in
+    certs.d/<registry>/ that no longer has a source, so a CA dropped from
+    `privateCaCerts` stops being trusted; nothing is removed while no source
+    PEM is mounted at all.
+
+    Also returns {**host-side** PEM path (CERTS_DIR_HOST / name): sha256 of
+    its content}, sorted like the sources. Callers embed the paths straight
+    into config.toml / hosts.toml, both of which are read by containerd running
+    on the host — so the paths must be what the host sees, not the container
+    mount — and can use the checksums without reading the files again.
+    """
+    sources = _source_pems()
     if not sources:
-        return []
+        return [], {}
 
-    CERTS_DIR_CONTAINER.mkdir(parents=True, exist_ok=True)
-    host_paths: list[Path] = []
+    plan = []
+    checksums: dict[Path, str] = {}
     for pem_file in sources:
-        dest_container = CERTS_DIR_CONTAINER / pem_file.name
-        dest_host = CERTS_DIR_HOST / pem_file.name
-        shutil.copy2(pem_file, dest_container)
-        host_paths.append(dest_host)
-        log.info("Copied %s -> %s (host path: %s)", pem_file, dest_container, dest_host)
-    return host_paths
+        content = pem_file.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        plan.append(PlannedFile(CERTS_DIR_CONTAINER / pem_file.name, content, f"copy of {pem_file}", sha256=digest))
+        checksums[CERTS_DIR_HOST / pem_file.name] = digest
+
+    wanted = {pem_file.name for pem_file in sources}
+    plan.extend(
+        PlannedFile(stale, None, "its CA is no longer mounted")
+        for stale in sorted(CERTS_DIR_CONTAINER.glob("*.pem"))
+        if stale.name not in wanted
+    )
+    return plan, checksums
+
+
+def plan_customer_config_toml() -> PlannedFile:
+    """Plan config.toml with the operator-supplied TOML blob appended, containerd 1.x style.
+
+    This is the containerd 1.x strategy. We do NOT generate registry-trust TOML
+    ourselves here; the operator supplies the fragment via the Helm value
+    `privateCaCertsAddToHost.containerdConfigToml`, and we paste it verbatim
+    into config.toml. apply_plan skips the write (and so the main loop skips
+    the restart) if config.toml already matches.
+
+    The typical blob looks like:
+
+        [plugins."io.containerd.grpc.v1.cri".registry.configs."<registry>".tls]
+          ca_file = "/etc/containerd/certs.d/<registry>/<ca>.pem"
+
+    The blob is appended to the startup backup; a dry run skips the backup, so
+    it falls back to the current config.toml.
+
+    Raises:
+        RuntimeError: blob is empty (nothing to apply) or produces invalid TOML.
+    """
+    base = CONFIG_TOML_BAK if CONFIG_TOML_BAK.is_file() else CONFIG_TOML
+    candidate = _customer_config_candidate(_read_containerd_config_toml(), base.read_text())
+    return PlannedFile(CONFIG_TOML, candidate.encode(), "operator-supplied containerdConfigToml")
+
+
+def plan_reconcile(containerd_version: int) -> list[PlannedFile]:
+    """Plan everything one reconcile tick changes: the CA PEM copies and
+    removals, then the registry hosts.toml on 2.x, or the customer config.toml
+    on 1.x. The main loop applies this plan; the dry run logs it.
+
+    On 1.x the CA PEMs are still copied to certs.d/ (so the operator's blob can
+    reference them by path), but we don't inspect or transform them — the blob
+    owns the registry trust schema on 1.x.
+
+    Raises:
+        RuntimeError: on 1.x, the operator's containerdConfigToml is empty or
+            produces invalid TOML.
+    """
+    plan, ca_files = plan_ca_certs()
+    if containerd_version == 2:
+        hosts_content = generate_hosts_toml(list(ca_files)).encode()
+        plan.append(PlannedFile(CERTS_DIR_CONTAINER / "hosts.toml", hosts_content, f"trust CAs for {REGISTRY_HOST}"))
+    else:
+        plan.append(plan_customer_config_toml())
+    return plan
 
 
-def _host_to_container_path(host_path: Path) -> Path:
-    """Translate a host-absolute path under CERT_CONFIG_PATH to the container's
-    view through the CONTAINERD_HOST_PATH hostPath mount.
+def dry_run(containerd_version: int) -> None:
+    """Log the files startup and one reconcile would write, without writing them or restarting containerd."""
+    try:
+        startup = apply_plan(plan_config_path_injection(containerd_version), dry_run=True) if containerd_version == 2 else []
+        reconcile = apply_plan(plan_reconcile(containerd_version), dry_run=True)
+    except RuntimeError:
+        sys.exit(1)
+    log.info(
+        "[dry run] %d file(s) would change; containerd would%s be restarted.",
+        len(startup) + len(reconcile),
+        "" if CONFIG_TOML in startup + reconcile else " not",
+    )
+
+
+# The fingerprint and checksum from the last source_pem_checksum() call, and how
+# many calls were answered from the fingerprint alone vs by hashing PEM contents.
+_source_state: dict = {"fingerprint": None, "checksum": ""}
+source_check_counts = {"skipped": 0, "hashed": 0}
+
 
-    Used for filesystem I/O (checksumming) on paths returned by copy_ca_certs().
+def source_pem_fingerprint() -> tuple:
+    """Describe the PEMs under PRIVATE_CA_CERTS_DIR by metadata alone, without reading them.
+
+    Covers each PEM's (resolved) inode, ctime/mtime and size, plus where each
+    secret directory's `..data` symlink points — kubelet swaps that symlink on
+    every secret update, so a rotation always changes it even if the new files
+    happen to match the old ones in size and timestamps. Only the PEMs
+    directly in a secret directory count; kubelet's hidden `..<timestamp>`
+    payload directories are reached through them.
     """
-    return CERTS_DIR_CONTAINER / host_path.name
+    entries = []
+    for secret_dir in sorted(PRIVATE_CA_CERTS_DIR.iterdir()):
+        data_link = secret_dir / "..data"
+        if data_link.is_symlink():
+            entries.append((secret_dir.name, "..data", os.readlink(data_link)))
+    for pem in sorted(PRIVATE_CA_CERTS_DIR.glob("*/*.pem")):
+        try:
+            st = pem.stat()
+        except OSError:
+            continue
+        entries.append((str(pem), st.st_ino, st.st_ctime_ns, st.st_mtime_ns, st.st_size))
+    return tuple(entries)
 
 
 def source_pem_checksum() -> str:
@@ -593,88 +1167,209 @@ def source_pem_checksum() -> str:
 
     Used as a cheap "has anything changed upstream?" check so the main loop can
     skip the CA-copy + hosts.toml churn on ticks where secrets haven't rotated.
+    The PEMs are only read and hashed when source_pem_fingerprint() differs from
+    the previous call; otherwise the previous checksum is returned.
     """
     if not PRIVATE_CA_CERTS_DIR.is_dir():
         return ""
+    fingerprint = source_pem_fingerprint()
+    if fingerprint == _source_state["fingerprint"]:
+        source_check_counts["skipped"] += 1
+        metrics.inc("source_checks_total", result="skipped")
+        return _source_state["checksum"]
+
+    source_check_counts["hashed"] += 1
+    metrics.inc("source_checks_total", result="hashed")
+    log.info(
+        "Source PEM metadata changed; hashing contents (%d checks skipped by fingerprint, %d hashed so far)",
+        source_check_counts["skipped"],
+        source_check_counts["hashed"],
+    )
     pems = sorted(PRIVATE_CA_CERTS_DIR.glob("*/*.pem"))
-    return checksum_of_files(*pems)
+    _source_state["fingerprint"] = fingerprint
+    _source_state["checksum"] = checksum_of_files(*pems)
+    return _source_state["checksum"]
 
 
 # ---------------------------------------------------------------------------
-# Main loop
+# Change notification
 # ---------------------------------------------------------------------------
-def _startup(containerd_version: int) -> None:
-    """
-    One-time setup that must complete before we enter the poll loop.
-    """
-    if containerd_version != 2:
-        return
-    try:
-        inject_config_path(containerd_version)
-    except RuntimeError:
-        sys.exit(1)
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_ONLYDIR = 0x01000000
+
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
 
 
-def _apply_v2_hosts_toml(ca_files: list[Path], last_output_checksum: str) -> str:
-    """Write certs.d/<registry>/hosts.toml for the 2.x strategy. Returns the
-    checksum of what's now on disk so the loop can short-circuit next tick.
+class InotifyWatcher:
+    """Block until something changes under PRIVATE_CA_CERTS_DIR, using inotify.
 
-    `ca_files` are host-side paths (what we wrote into hosts.toml). For the
-    on-disk checksum we translate to the container view because file I/O only
-    works through the hostPath mount, not through the host-absolute path.
+    The chart mounts each CA secret as a whole directory (a subPath mount
+    would never be updated), at PRIVATE_CA_CERTS_DIR/<secret>/<secret>.pem.
+    kubelet updates a secret volume by writing the new files into a fresh
+    timestamped directory, pointing a `..data_tmp` symlink at it and renaming
+    that over `..data` (the PEMs themselves are symlinks through `..data`).
+    The PEM symlinks never change, so watching them would miss rotations;
+    instead each secret directory is watched for entries being created,
+    renamed or deleted, which catches the `..data` swap. Plain files written
+    in place (e.g. a hostPath instead of a secret) are caught by the
+    modify/close-write events on the same watch.
     """
-    hosts_content = generate_hosts_toml(ca_files)
-    hosts_toml_path = CERTS_DIR_CONTAINER / "hosts.toml"
 
-    container_paths = [_host_to_container_path(p) for p in ca_files]
-    current_checksum = checksum_of_files(*container_paths)
-    content_checksum = hashlib.sha256(hosts_content.encode()).hexdigest()
-    combined = current_checksum + content_checksum
+    def __init__(self, root: Path):
+        self.root = root
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_init1: {os.strerror(ctypes.get_errno())}")
+        self.watch_dirs()
+
+    def watch_dirs(self) -> None:
+        """Watch the root and every secret directory in it. Re-adding an existing watch is a no-op."""
+        dirs = [self.root]
+        if self.root.is_dir():
+            dirs.extend(sorted(d for d in self.root.iterdir() if d.is_dir() and not d.name.startswith("..")))
+        for directory in dirs:
+            if self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+                log.warning("Cannot watch %s: %s", directory, os.strerror(ctypes.get_errno()))
+
+    def _drain(self) -> None:
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for a change. Returns True if something changed."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        self._drain()
+        while select.select([self.fd], [], [], DEBOUNCE_SECONDS)[0]:
+            self._drain()
+        # New secret directories need watches of their own
+        self.watch_dirs()
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _make_watcher() -> InotifyWatcher | None:
+    """Return an InotifyWatcher for PRIVATE_CA_CERTS_DIR, or None to poll every POLL_INTERVAL_SECONDS."""
+    if WATCH_MODE != "inotify":
+        return None
+    try:
+        watcher = InotifyWatcher(PRIVATE_CA_CERTS_DIR)
+    except (OSError, AttributeError) as exc:
+        log.warning("inotify unavailable (%s); polling every %ss instead", exc, POLL_INTERVAL_SECONDS)
+        return None
+    log.info("Watching %s with inotify (fallback poll every %ss)", PRIVATE_CA_CERTS_DIR, FALLBACK_POLL_SECONDS)
+    return watcher
 
-    if combined != last_output_checksum:
-        hosts_toml_path.write_text(hosts_content)
-        log.info("Updated %s", hosts_toml_path)
-        return combined
-    log.debug("No change in hosts.toml or CA certs")
-    return last_output_checksum
 
+def _wait_for_change(watcher: InotifyWatcher | None) -> None:
+    """Return when it's time for the next reconcile tick."""
+    if watcher is None:
+        time.sleep(POLL_INTERVAL_SECONDS)
+    elif not watcher.wait(FALLBACK_POLL_SECONDS):
+        log.debug("No inotify events in %ss; running the fallback reconcile", FALLBACK_POLL_SECONDS)
 
-def _apply_v1_customer_toml() -> None:
-    """Append the operator-supplied TOML blob to config.toml for 1.x; restart if changed.
 
-    The CA PEMs are copied to certs.d/ by the caller (so the operator's blob
-    can reference them by path), but we don't inspect or transform them here —
-    the blob owns the registry trust schema on 1.x.
+# ---------------------------------------------------------------------------
+# Main loop
+# ---------------------------------------------------------------------------
+def _startup(containerd_version: int) -> None:
+    """
+    One-time setup that must complete before we enter the poll loop.
     """
+    if containerd_version != 2:
+        return
     try:
-        changed = write_customer_config_toml(_read_containerd_config_toml())
+        inject_config_path(containerd_version)
     except RuntimeError:
         sys.exit(1)
-    if changed:
-        restart_containerd()
 
 
 def _poll_loop(containerd_version: int) -> None:
-    """Main reconcile loop — polls mounted PEMs, applies the version-specific
-    strategy, and sleeps. Short-circuits on unchanged sources."""
+    """Main reconcile loop — checks mounted PEMs, applies plan_reconcile(), and
+    waits for the next change (see _wait_for_change). Short-circuits on
+    unchanged sources.
+
+    On 1.x containerd is restarted whenever config.toml changes, or when the
+    restart after an earlier change did not complete. On 2.x hosts.d changes
+    need no restart.
+    """
     last_source_checksum = ""
-    last_output_checksum = ""
+    restart_pending = False
+    watcher = _make_watcher()
 
     while True:
-        current_source = source_pem_checksum()
+        try:
+            current_source = source_pem_checksum()
+        except OSError:
+            log.exception("Failed to check source PEMs; retrying in %ss", ERROR_RETRY_SECONDS)
+            metrics.inc("errors_total", stage="check")
+            time.sleep(ERROR_RETRY_SECONDS)
+            continue
         if current_source == last_source_checksum:
-            time.sleep(POLL_INTERVAL_SECONDS)
+            _wait_for_change(watcher)
             continue
-        last_source_checksum = current_source
-
-        ca_files = copy_ca_certs()
 
-        if containerd_version == 2:
-            last_output_checksum = _apply_v2_hosts_toml(ca_files, last_output_checksum)
-        else:
-            _apply_v1_customer_toml()
+        started = time.monotonic()
+        metrics.inc("reconciles_total")
+        try:
+            try:
+                plan = plan_reconcile(containerd_version)
+            except RuntimeError:
+                # containerdConfigToml is missing or invalid; already logged
+                sys.exit(1)
+            changed = apply_plan(plan)
+            if containerd_version == 1 and (CONFIG_TOML in changed or restart_pending):
+                restart_containerd()
+        except (OSError, subprocess.SubprocessError):
+            # Leave last_source_checksum alone so the next tick tries again
+            log.exception("Reconcile failed; retrying in %ss", ERROR_RETRY_SECONDS)
+            metrics.inc("errors_total", stage="reconcile")
+            time.sleep(ERROR_RETRY_SECONDS)
+            continue
+        except RuntimeError:
+            # containerd did not come back in time after a restart. config.toml
+            # is already written, so remember to restart again on the retry.
+            log.exception("containerd restart failed; retrying in %ss", ERROR_RETRY_SECONDS)
+            metrics.inc("errors_total", stage="restart")
+            restart_pending = True
+            time.sleep(ERROR_RETRY_SECONDS)
+            continue
+        finally:
+            metrics.observe_duration(time.monotonic() - started)
+        last_source_checksum = current_source
+        restart_pending = False
+        metrics.set("last_success_timestamp_seconds", time.time())
 
-        time.sleep(POLL_INTERVAL_SECONDS)
+        _wait_for_change(watcher)
 
 
 def main() -> None:
@@ -693,16 +1388,24 @@ def main() -> None:
         log.error("No %s found. Is this a containerd node?", CONFIG_TOML)
         sys.exit(1)
 
-    backup_config_toml()
+    if not DRY_RUN:
+        backup_config_toml()
 
     try:
         containerd_version = detect_containerd_version()
     except RuntimeError:
         sys.exit(1)
 
+    if DRY_RUN:
+        dry_run(containerd_version)
+        return
+
     strategy = "operator-supplied containerdConfigToml" if containerd_version == 1 else "hosts.d (config_path + hosts.toml)"
     log.info("Detected containerd %d.x; using %s strategy", containerd_version, strategy)
 
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+
     _startup(containerd_version)
     _poll_loop(containerd_version)
 
@@ -0,0 +1,113 @@
+"""Tests for bin/get-all-chart-default-values.py."""
+
+import importlib.util
+import tarfile
+from http.server import SimpleHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+import yaml
+
+from tests.utils.fake_http import serve
+
+SCRIPT_PATH = Path(__file__).resolve().parents[2] / "bin" / "get-all-chart-default-values.py"
+
+
+@pytest.fixture
+def script(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("get_all_chart_default_values", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "CHART_CACHE_DIR", tmp_path / "chart-cache")
+    return module
+
+
+def write_chart(chart_dir, name, values, dependencies=()):
+    chart_dir.mkdir(parents=True)
+    (chart_dir / "Chart.yaml").write_text(yaml.safe_dump({"name": name, "version": "1.0.0", "dependencies": list(dependencies)}))
+    (chart_dir / "values.yaml").write_text(yaml.safe_dump(values))
+
+
+class ChartRepoHandler(SimpleHTTPRequestHandler):
+    """Serves the packaged charts in server.directory, recording each request."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        self.directory = self.server.directory
+        super().do_GET()
+
+
+@pytest.fixture
+def chart_repo(tmp_path):
+    """Serve packaged charts "dep" (which depends on "leaf") and "leaf" from a local chart repository."""
+    repo_dir = tmp_path / "repo"
+    repo_dir.mkdir()
+    with serve(ChartRepoHandler, directory=str(repo_dir), requests=[]) as server:
+        build_dir = tmp_path / "build"
+        write_chart(build_dir / "leaf", "leaf", {"image": {"tag": "1.2.3"}})
+        write_chart(build_dir / "dep", "dep", {"enabled": True}, [{"name": "leaf", "version": "2.0.0", "repository": server.url}])
+        for name, version in [("leaf", "2.0.0"), ("dep", "1.0.0")]:
+            with tarfile.open(repo_dir / f"{name}-{version}.tgz", "w:gz") as tgz:
+                tgz.add(build_dir / name, arcname=name)
+        yield server.url, server
+
+
+def test_remote_dependencies_are_cached_and_cleaned_up(script, chart_repo, tmp_path, monkeypatch):
+    url, server = chart_repo
+    write_chart(
+        tmp_path / "umbrella", "umbrella", {"dep": {"enabled": False}}, [{"name": "dep", "version": "1.0.0", "repository": url}]
+    )
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(script.tempfile, "tempdir", str(scratch))
+
+    expected = {"dep": {"enabled": False, "leaf": {"image": {"tag": "1.2.3"}}}}
+    assert script.load_chart(tmp_path / "umbrella") == ("umbrella", expected)
+    assert len(server.requests) == 2
+    assert list(scratch.iterdir()) == []
+
+    # A second run is answered entirely from the chart cache
+    assert script.load_chart(tmp_path / "umbrella") == ("umbrella", expected)
+    assert len(server.requests) == 2
+    assert list(scratch.iterdir()) == []
+
+
+VALUES = {
+    "houston": {"image": {"repository": "ap-houston-api", "tag": "1.0.0"}, "env": [], "config": {}},
+    "nginx": {"extraContainers": [{"name": "sidecar", "image": "busybox:1"}, "plain"], "replicas": 2},
+}
+
+
+def test_iter_paths_descends_into_lists(script):
+    assert list(script.iter_paths(VALUES)) == [
+        ("houston.image.repository", "ap-houston-api"),
+        ("houston.image.tag", "1.0.0"),
+        ("houston.env", []),
+        ("houston.config", {}),
+        ("nginx.extraContainers[0].name", "sidecar"),
+        ("nginx.extraContainers[0].image", "busybox:1"),
+        ("nginx.extraContainers[1]", "plain"),
+        ("nginx.replicas", 2),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("patterns", "regex", "expected"),
+    [
+        (["*.tag"], False, ["houston.image.tag"]),
+        (["*.image", "*.tag"], False, ["houston.image.tag", "nginx.extraContainers[0].image"]),
+        ([r"\[\d+\]\.image$"], True, ["nginx.extraContainers[0].image"]),
+    ],
+)
+def test_path_matcher(script, patterns, regex, expected):
+    matches = script.path_matcher(patterns, regex=regex)
+    assert [path for path, _ in script.iter_paths(VALUES) if matches(path)] == expected
+
+
+def test_format_path(script):
+    assert script.format_path("nginx.replicas", 2) == "nginx.replicas=2"
+    assert script.format_path("nginx.replicas", 2, "tsv") == "nginx.replicas\t2"
+    assert script.format_path("houston.env", [], "json") == '{"path": "houston.env", "value": []}'
@@ -0,0 +1,66 @@
+"""Tests for bin/image_cache.py."""
+
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).resolve().parents[2] / "bin" / "image_cache.py"
+
+
+@pytest.fixture(scope="module")
+def image_cache():
+    spec = importlib.util.spec_from_file_location("image_cache", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_tag_entries_expire_and_digest_entries_do_not(image_cache, tmp_path, monkeypatch):
+    cache = image_cache.ImageCache(tmp_path / "cache.json", ttl=60)
+    cache.put("quay.io/v2/astronomer/ap-nginx/manifests/1.2.3", {"tag": True})
+    cache.put("quay.io/v2/astronomer/ap-nginx/blobs/sha256:abc", {"digest": True}, permanent=True)
+    cache.save()
+
+    later = image_cache.time.time() + 120
+    monkeypatch.setattr(image_cache.time, "time", lambda: later)
+    reloaded = image_cache.ImageCache(tmp_path / "cache.json", ttl=60)
+    assert reloaded.get("quay.io/v2/astronomer/ap-nginx/manifests/1.2.3") is None
+    assert reloaded.get("quay.io/v2/astronomer/ap-nginx/blobs/sha256:abc") == {"digest": True}
+
+    offline = image_cache.ImageCache(tmp_path / "cache.json", ttl=60, offline=True)
+    assert offline.get("quay.io/v2/astronomer/ap-nginx/manifests/1.2.3") == {"tag": True}
+    with pytest.raises(image_cache.CacheMiss):
+        offline.get("quay.io/v2/astronomer/ap-nginx/manifests/9.9.9")
+
+
+def test_save_merges_entries_written_by_other_runs(image_cache, tmp_path):
+    first = image_cache.ImageCache(tmp_path / "cache.json")
+    second = image_cache.ImageCache(tmp_path / "cache.json")
+    first.put("a", 1)
+    first.save()
+    second.put("b", 2)
+    second.save()
+
+    assert set(image_cache.ImageCache(tmp_path / "cache.json").entries) == {"a", "b"}
+
+
+def test_concurrent_saves_from_separate_processes_keep_every_entry(image_cache, tmp_path):
+    cache_file = tmp_path / "cache.json"
+    with ProcessPoolExecutor(max_workers=4, mp_context=get_context("spawn")) as executor:
+        list(executor.map(_save_entries, [cache_file] * 8, range(8)))
+
+    assert set(image_cache.ImageCache(cache_file).entries) == {f"run-{run}-{n}" for run in range(8) for n in range(20)}
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith(".tmp-")] == []
+
+
+def _save_entries(cache_file, run):
+    spec = importlib.util.spec_from_file_location("image_cache", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for n in range(20):
+        cache = module.ImageCache(cache_file)
+        cache.put(f"run-{run}-{n}", n)
+        cache.save()
@@ -0,0 +1,57 @@
+"""Tests for bin/registry_api.py."""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+import requests
+
+from tests.utils.fake_registry import run_fake_registry
+
+SCRIPT_PATH = Path(__file__).resolve().parents[2] / "bin" / "registry_api.py"
+
+
+@pytest.fixture(scope="module")
+def registry_api():
+    spec = importlib.util.spec_from_file_location("registry_api", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize(
+    ("image", "expected"),
+    [
+        ("nginx", ("registry-1.docker.io", "library/nginx", "latest")),
+        ("docker.io/bitnami/redis:7", ("registry-1.docker.io", "bitnami/redis", "7")),
+        ("quay.io/astronomer/ap-commander:2.0.15", ("quay.io", "astronomer/ap-commander", "2.0.15")),
+        ("localhost:5000/ap-nginx@sha256:" + "a" * 64, ("localhost:5000", "ap-nginx", "sha256:" + "a" * 64)),
+        ("localhost/ap-nginx", ("localhost", "ap-nginx", "latest")),
+    ],
+)
+def test_parse_image_ref(registry_api, image, expected):
+    assert registry_api.parse_image_ref(image) == expected
+
+
+def test_parse_www_authenticate(registry_api):
+    header = 'Bearer realm="https://quay.io/v2/auth",service="quay.io",scope="repository:astronomer/ap-commander:pull"'
+
+    assert registry_api.parse_www_authenticate(header) == {
+        "realm": "https://quay.io/v2/auth",
+        "service": "quay.io",
+        "scope": "repository:astronomer/ap-commander:pull",
+    }
+    assert registry_api.parse_www_authenticate('Basic realm="registry"') == {}
+
+
+def test_token_cache_negotiates_once_per_scope_and_never_reuses_rejected_tokens(registry_api):
+    with run_fake_registry() as server, requests.Session() as session:
+        tokens = registry_api.TokenCache(session)
+        challenge = f'Bearer realm="http://127.0.0.1:{server.server_port}/token",scope="repository:a/b:pull"'
+
+        token = tokens.negotiate("registry", challenge)
+        assert tokens.negotiate("registry", challenge) == token
+        assert tokens.get("registry", "repository:a/b:pull") == token
+        assert tokens.negotiate("registry", challenge, rejected_token=token) == token
+
+        assert server.token_requests == ["repository:a/b:pull", "repository:a/b:pull"]
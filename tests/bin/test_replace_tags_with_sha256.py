@@ -0,0 +1,101 @@
+"""Tests for bin/replace-tags-with-sha256.py."""
+
+import importlib.util
+import io
+from pathlib import Path
+
+import pytest
+import yaml
+
+SCRIPT_PATH = Path(__file__).resolve().parents[2] / "bin" / "replace-tags-with-sha256.py"
+RECORDED_CACHE = Path(__file__).resolve().parents[1] / "data_files" / "image-cache.json"
+
+SHA = "0" * 64
+
+VALUES = {
+    "nginx": {"image": "quay.io/astronomer/ap-nginx:1.2.3"},
+    "houston": {"images": {"houston": {"repository": "quay.io/astronomer/ap-houston-api", "tag": "4.5.6"}}},
+    "again": {"image": "quay.io/astronomer/ap-nginx:1.2.3"},
+    "private": {"registry": "registry.example.com", "repository": "astronomer/ap-db-bootstrapper", "tag": "7.8.9"},
+    "postgres": {"image": "postgres:15"},
+    "airflow": {"defaultAirflowRepository": "quay.io/astronomer/astro-runtime", "defaultAirflowTag": "12.0.0"},
+    "unset": {"repository": "quay.io/astronomer/ap-alertmanager", "tag": None},
+    "sidecars": [{"image": "quay.io/astronomer/ap-auth-sidecar:1.0.0"}, {"name": "no-image"}],
+}
+
+
+@pytest.fixture(scope="module")
+def script():
+    spec = importlib.util.spec_from_file_location("replace_tags_with_sha256", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_collect_image_refs_deduplicates(script):
+    assert script.collect_image_refs(VALUES) == {
+        ("quay.io", "astronomer/ap-nginx", "1.2.3"),
+        ("quay.io", "astronomer/ap-houston-api", "4.5.6"),
+        ("registry.example.com", "astronomer/ap-db-bootstrapper", "7.8.9"),
+        ("docker.io", "postgres", "15"),
+        ("quay.io", "astronomer/astro-runtime", "12.0.0"),
+        ("quay.io", "astronomer/ap-auth-sidecar", "1.0.0"),
+    }
+
+
+def test_process_yaml_rewrites_resolved_images(script):
+    digests = dict.fromkeys(script.collect_image_refs(VALUES), ("sha256", SHA))
+    del digests["quay.io", "astronomer/ap-houston-api", "4.5.6"]
+    new_data = {}
+    script.process_yaml(VALUES, new_data, digests.get)
+    assert new_data == {
+        "nginx": {"image": f"quay.io/astronomer/ap-nginx@sha256:{SHA}"},
+        "again": {"image": f"quay.io/astronomer/ap-nginx@sha256:{SHA}"},
+        "private": {"repository": "astronomer/ap-db-bootstrapper@sha256", "tag": SHA},
+        "postgres": {"image": f"docker.io/postgres@sha256:{SHA}"},
+        "airflow": {"defaultAirflowRepository": "quay.io/astronomer/astro-runtime@sha256", "defaultAirflowTag": SHA},
+        "sidecars": [{"image": f"quay.io/astronomer/ap-auth-sidecar@sha256:{SHA}"}],
+    }
+
+
+def test_resolve_digests_looks_up_each_image_once(script, monkeypatch):
+    lookups = []
+
+    def fake_lookup_digest(image_ref, session):
+        lookups.append(image_ref)
+        if image_ref[0] == "registry.example.com":
+            raise script.DigestLookupError("GET returned 404")
+        return "sha256", SHA
+
+    monkeypatch.setattr(script, "lookup_digest", fake_lookup_digest)
+    image_refs = script.collect_image_refs(VALUES)
+    digests, failures = script.resolve_digests(image_refs, max_per_host=2)
+
+    assert sorted(lookups) == sorted(image_refs)
+    assert failures == {("registry.example.com", "astronomer/ap-db-bootstrapper", "7.8.9"): "DigestLookupError: GET returned 404"}
+    assert set(digests) == image_refs - set(failures)
+
+
+def test_resolve_digests_caches_digest_references_permanently(script, monkeypatch, tmp_path):
+    monkeypatch.setattr(script, "lookup_digest", lambda image_ref, session: ("sha256", SHA))
+    cache = script.image_cache.ImageCache(tmp_path / "cache.json", ttl=60)
+    by_tag = ("quay.io", "astronomer/ap-nginx", "1.2.3")
+    by_digest = ("quay.io", "astronomer/ap-nginx@sha256", SHA)
+
+    script.resolve_digests({by_tag, by_digest}, cache=cache)
+
+    assert cache.entries[script.cache_key(by_digest)]["permanent"] is True
+    assert cache.entries[script.cache_key(by_tag)]["permanent"] is False
+
+
+def test_main_offline_uses_recorded_cache(script, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["replace-tags-with-sha256.py", "--offline", "--cache-file", str(RECORDED_CACHE)])
+    monkeypatch.setattr("sys.stdin", io.StringIO(yaml.safe_dump({**VALUES, "extra": {"image": "quay.io/astronomer/uncached:1"}})))
+    monkeypatch.setattr(script.requests.Session, "send", pytest.fail)
+
+    script.main()
+
+    out, err = capsys.readouterr()
+    assert yaml.safe_load(out)["nginx"] == {"image": f"quay.io/astronomer/ap-nginx@sha256:{SHA}"}
+    assert "extra" not in yaml.safe_load(out)
+    assert "quay.io/astronomer/uncached:1: CacheMiss" in err
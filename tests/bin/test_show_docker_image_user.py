@@ -0,0 +1,60 @@
+"""Tests for bin/show-docker-image-user.py against a local fake OCI registry."""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from tests.utils.fake_registry import run_fake_registry
+
+SCRIPT_PATH = Path(__file__).resolve().parents[2] / "bin" / "show-docker-image-user.py"
+
+
+@pytest.fixture
+def fake_registry():
+    with run_fake_registry() as server:
+        yield server
+
+
+@pytest.fixture(scope="module")
+def script():
+    spec = importlib.util.spec_from_file_location("show_docker_image_user", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_inspect_images_reuses_tokens_and_keeps_order(script, fake_registry):
+    registry = f"127.0.0.1:{fake_registry.server_port}"
+    images = [
+        f"{registry}/astronomer/ap-houston-api:2.0.0",
+        f"{registry}/astronomer/ap-commander:1.0.0",
+        f"{registry}/astronomer/ap-commander:9.9.9",
+        f"{registry}/astronomer/ap-commander:1.0.1",
+        f"{registry}/astronomer/ap-houston-api@sha256:{'3' * 64}",
+    ]
+    client = script.RegistryClient(pool_size=4)
+
+    results = list(script.inspect_images(images, client, jobs=4))
+
+    assert [image for image, _, _ in results] == images
+    assert [user for _, user, _ in results] == ["1000", "1000", None, "", "1000"]
+    assert "HTTP 404" in str(results[2][2])
+    # One token per repository, however many images and requests share it
+    assert sorted(fake_registry.token_requests) == [
+        "repository:astronomer/ap-commander:pull",
+        "repository:astronomer/ap-houston-api:pull",
+    ]
+
+
+def test_cached_lookups_skip_the_registry(script, fake_registry, tmp_path):
+    registry = f"127.0.0.1:{fake_registry.server_port}"
+    image = f"{registry}/astronomer/ap-commander:1.0.0"
+    image_cache = script.image_cache.ImageCache(tmp_path / "cache.json")
+    script.RegistryClient(cache=image_cache).get_image_user(image)
+    image_cache.save()
+    requests_made = len(fake_registry.authorized_requests)
+
+    offline_cache = script.image_cache.ImageCache(tmp_path / "cache.json", offline=True)
+    assert script.RegistryClient(cache=offline_cache).get_image_user(image) == "1000"
+    assert len(fake_registry.authorized_requests) == requests_made
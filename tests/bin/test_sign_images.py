@@ -0,0 +1,76 @@
+"""Tests for bin/sign-images.py with a fake cosign."""
+
+import importlib.util
+import subprocess
+import threading
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).resolve().parents[2] / "bin" / "sign-images.py"
+
+IMAGES = [
+    ("quay.io/astronomer/ap-commander", "1.0.0", "a" * 64),
+    ("quay.io/astronomer/ap-houston-api", "2.0.0", "b" * 64),
+    ("quay.io/astronomer/ap-registry", "3.0.0", "c" * 64),
+]
+
+
+@pytest.fixture(scope="module")
+def script():
+    spec = importlib.util.spec_from_file_location("sign_images", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeCosign:
+    """Stands in for subprocess.run, recording cosign commands and answering from a set of signed references."""
+
+    def __init__(self, signed=(), failing=()):
+        self.signed = set(signed)
+        self.failing = set(failing)
+        self.commands = []
+        self.lock = threading.Lock()
+
+    def __call__(self, cmd, **kwargs):
+        assert kwargs.get("capture_output")
+        reference = cmd[-1]
+        with self.lock:
+            self.commands.append((cmd[1], reference))
+            if cmd[1] == "verify":
+                returncode = 0 if reference in self.signed else 1
+                return subprocess.CompletedProcess(cmd, returncode, stdout="", stderr="no matching signatures")
+            assert kwargs["env"]["COSIGN_PASSWORD"] == "secret"
+            if reference in self.failing:
+                return subprocess.CompletedProcess(cmd, 1, stdout="", stderr="Error: signing\nerror: 403 Forbidden")
+            self.signed.add(reference)
+            return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+
+def test_sign_images_skips_signed_and_reports_failures(script, capsys):
+    references = [script.digest_reference(*image) for image in IMAGES]
+    cosign = FakeCosign(signed=[references[0]], failing=[references[2]])
+
+    results = script.sign_images(IMAGES, "/keys/cosign.key", "secret", jobs=3, runner=cosign)
+
+    assert [(result.image, result.status, result.detail) for result in results] == [
+        ("quay.io/astronomer/ap-commander:1.0.0", "already signed", ""),
+        ("quay.io/astronomer/ap-houston-api:2.0.0", "signed", ""),
+        ("quay.io/astronomer/ap-registry:3.0.0", "failed", "error: 403 Forbidden"),
+    ]
+    # Each image is verified once, and only the unsigned ones are signed
+    assert sorted(cosign.commands) == sorted(
+        [("verify", reference) for reference in references] + [("sign", references[1]), ("sign", references[2])]
+    )
+
+    script.print_results(results)
+    assert "3 images, 1 failed" in capsys.readouterr().out
+
+
+def test_sign_image_verifies_before_signing(script):
+    reference = script.digest_reference(*IMAGES[0])
+    cosign = FakeCosign(signed=[reference])
+
+    assert script.sign_image(*IMAGES[0], "/keys/cosign.key", "secret", runner=cosign).status == "already signed"
+    assert cosign.commands == [("verify", reference)]
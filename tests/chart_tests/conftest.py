@@ -18,11 +18,12 @@
 import os
 import subprocess
 
-import docker
 import pytest
 from filelock import FileLock
 
 from tests import git_root_dir
+from tests.utils import get_all_features_chart, render_cache, render_registry
+from tests.utils.chart import session_stats
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -57,23 +58,62 @@ def upgrade_helm(tmp_path_factory, worker_id):
             flag_fn.touch()
 
 
-def docker_daemon_present():
-    try:
-        docker.from_env().ping()
-        return True
-    except docker.errors.DockerException:
-        return False
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        f"{render_registry.MARKER}(argnames, factory): parametrize with factory()'s params, rendered at collection if the test can be selected",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize tests marked with chart_params. See tests/utils/render_registry.py."""
+    render_registry.parametrize(metafunc)
+
+
+def pytest_sessionfinish(session):
+    """Hand this xdist worker's render and validation counters to the controller."""
+    if hasattr(session.config, "workeroutput"):
+        session.config.workeroutput["chart_session_stats"] = {name: dict(counter) for name, counter in session_stats.items()}
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collect render and validation counters from a finished xdist worker."""
+    for name, counts in getattr(node, "workeroutput", {}).get("chart_session_stats", {}).items():
+        session_stats[name].update(counts)
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Report render cache effectiveness and where schema validation time went for the whole session."""
+    if hasattr(terminalreporter.config, "workeroutput"):
+        return
+
+    hits, misses = render_cache.stats["hits"], render_cache.stats["misses"]
+    if hits + misses:
+        terminalreporter.write_sep("-", "helm render cache")
+        terminalreporter.write_line(
+            f"{hits} hits, {misses} misses ({hits / (hits + misses):.0%} hit rate) in {render_cache.CACHE_DIR}"
+        )
+
+    validation_seconds = session_stats["validation_seconds"]
+    validation_skipped = session_stats["validation_skipped"].total()
+    if validation_seconds or validation_skipped:
+        validation_count = session_stats["validation_count"]
+        terminalreporter.write_sep("-", "k8s schema validation time by kind")
+        for kind, seconds in validation_seconds.most_common():
+            terminalreporter.write_line(f"{seconds:8.2f}s {validation_count[kind]:7d} objects  {kind}")
+        terminalreporter.write_line(f"{validation_skipped} validations of already validated objects skipped")
 
 
 @pytest.fixture(scope="session")
-def docker_client():
-    """This is a text fixture for the docker client, should it be needed in a
-    test."""
-    if docker_daemon_present():
-        docker.from_env().ping()
-        client = docker.from_env()
-        yield client
-        client.close()
+def all_features_chart():
+    """Return get_all_features_chart, which gives the all-features chart for a kube_version as a RenderedChart.
+
+    Each kube_version is rendered and validated once per session (and worker), then shared by
+    every test that uses this fixture. RenderedChart hands out copies, so tests can't affect
+    each other by modifying the docs they get.
+    """
+    return get_all_features_chart
 
 
 @pytest.fixture(scope="function")
@@ -0,0 +1,210 @@
+"""Tests for the commander JWKS hook script, against a fake control plane and a fake Kubernetes API."""
+
+import base64
+import importlib.util
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from tests.utils.fake_http import FakeHandler, serve
+
+SCRIPT_PATH = Path(__file__).parent.parent.parent / "charts" / "astronomer" / "files" / "commander-jwks.py"
+
+
+@pytest.fixture
+def script():
+    """Load commander-jwks.py fresh for each test."""
+    spec = importlib.util.spec_from_file_location("commander_jwks", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeControlPlaneHandler(FakeHandler):
+    """Serves the JWKS key with an ETag, answering 304 to a matching If-None-Match."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        server.clients.append(self.client_address)
+        if server.failures:
+            server.failures -= 1
+            self.send_json(503)
+            return
+        etag = f'"{server.key["x5c"][0][:8]}"' if server.send_etag else None
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_json(304, headers=[("ETag", etag)])
+            return
+        self.send_json(200, server.key, [("ETag", etag)] if etag else ())
+
+
+def _jwk(der: bytes) -> dict:
+    return {"kty": "RSA", "kid": "houston", "x5c": [base64.b64encode(der).decode()]}
+
+
+@pytest.fixture
+def control_plane():
+    with serve(
+        FakeControlPlaneHandler, key=_jwk(b"first-certificate"), requests=[], clients=[], failures=0, send_etag=True
+    ) as server:
+        yield server
+
+
+class FakeKubeApiHandler(FakeHandler):
+    """Secrets of one namespace, written with server-side apply."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.clients.append(self.client_address)
+        self.server.requests.append(("GET", self.path, self.headers.get("Authorization")))
+        secret = self.server.secrets.get(self.path)
+        if secret is None:
+            self.send_json(404, {"kind": "Status", "reason": "NotFound"})
+        else:
+            self.send_json(200, secret)
+
+    def do_PATCH(self):
+        path, _, query = self.path.partition("?")
+        self.server.clients.append(self.client_address)
+        self.server.requests.append(("PATCH", self.path, self.headers.get("Authorization")))
+        if self.headers["Content-Type"] != "application/apply-patch+yaml" or "fieldManager=" not in query:
+            self.send_json(400, {"kind": "Status", "reason": "BadRequest"})
+            return
+        secret = yaml.safe_load(self.read_body())
+        secret["metadata"]["uid"] = "1234"
+        self.server.secrets[path] = secret
+        self.send_json(200, secret)
+
+
+@pytest.fixture
+def kube_api(script, monkeypatch, control_plane, tmp_path):
+    token = tmp_path / "token"
+    token.write_text("service-account-token\n")
+    monkeypatch.setenv("CONTROL_PLANE_ENDPOINT", control_plane.url)
+    monkeypatch.setenv("NAMESPACE", "astronomer")
+    monkeypatch.setenv("RETRY_DELAY", "1")
+    with serve(FakeKubeApiHandler, secrets={}, requests=[], clients=[]) as server:
+        client = script.KubernetesClient(server.url, token_path=str(token))
+        with patch.object(script.KubernetesClient, "in_cluster", return_value=client):
+            yield server
+
+
+SECRET_PATH = "/api/v1/namespaces/astronomer/secrets/astronomer-commander-jwt-secret"
+
+
+def _writes(kube_api):
+    return [request for request in kube_api.requests if request[0] == "PATCH"]
+
+
+def test_first_run_creates_secret_with_one_apply(script, control_plane, kube_api):
+    script.main()
+
+    assert [request[0] for request in kube_api.requests] == ["GET", "PATCH"]
+    assert all(request[2] == "Bearer service-account-token" for request in kube_api.requests)
+    assert "fieldManager=commander-jwks-hook" in kube_api.requests[1][1]
+    secret = kube_api.secrets[SECRET_PATH]
+    assert secret["metadata"]["labels"]["component"] == "commander-jwks-hook"
+    assert secret["metadata"]["annotations"][script.ETAG_ANNOTATION] == '"Zmlyc3Qt"'
+    pem = base64.b64decode(secret["data"]["tls.crt"]).decode()
+    assert pem.startswith("-----BEGIN CERTIFICATE-----\n")
+    assert "If-None-Match" not in control_plane.requests[0]
+
+
+def test_unchanged_jwks_is_one_conditional_request_and_no_write(script, control_plane, kube_api):
+    script.main()
+    control_plane.requests.clear()
+
+    script.main()
+
+    assert len(_writes(kube_api)) == 1
+    assert len(control_plane.requests) == 1
+    assert control_plane.requests[0]["If-None-Match"] == '"Zmlyc3Qt"'
+
+
+def test_unchanged_jwks_without_etag_support_is_not_rewritten(script, control_plane, kube_api):
+    control_plane.send_etag = False
+    script.main()
+    script.main()
+
+    assert len(_writes(kube_api)) == 1
+
+
+def test_rotated_key_updates_secret(script, control_plane, kube_api):
+    script.main()
+    first_cert = kube_api.secrets[SECRET_PATH]["data"]["tls.crt"]
+
+    control_plane.key = _jwk(b"second-certificate")
+    script.main()
+
+    assert len(_writes(kube_api)) == 2
+    secret = kube_api.secrets[SECRET_PATH]
+    assert secret["data"]["tls.crt"] != first_cert
+    assert secret["metadata"]["annotations"][script.ETAG_ANNOTATION] == '"c2Vjb25k"'
+
+
+def test_api_errors_fail_the_hook(script, kube_api):
+    with patch.object(FakeKubeApiHandler, "do_PATCH", lambda self: self.send_json(403, {"reason": "Forbidden"})):
+        with pytest.raises(SystemExit) as exc_info:
+            script.main()
+
+    assert exc_info.value.code == 1
+
+
+def test_retries_with_exponential_backoff(script, control_plane):
+    control_plane.failures = 2
+
+    with patch.object(script.time, "sleep") as sleep:
+        jwks_data, validators = script.fetch_jwks_from_endpoint(control_plane.url, 3, 10)
+
+    assert jwks_data["kid"] == "houston"
+    assert validators["etag"] == '"Zmlyc3Qt"'
+    first, second = (call.args[0] for call in sleep.call_args_list)
+    assert 5 <= first <= 10
+    assert 10 <= second <= 20
+    assert len(set(control_plane.clients)) == 1
+
+
+def test_api_calls_share_one_connection(script, control_plane, kube_api):
+    script.main()
+    script.main()
+
+    assert len(kube_api.clients) == 3
+    assert len(set(kube_api.clients)) == 1
+
+
+def test_reconnects_when_the_server_closes_the_connection(script, control_plane):
+    control_plane.failures = 1
+
+    with patch.object(FakeControlPlaneHandler, "protocol_version", "HTTP/1.0"), patch.object(script.time, "sleep"):
+        jwks_data, _ = script.fetch_jwks_from_endpoint(control_plane.url, 2, 10)
+
+    assert jwks_data["kid"] == "houston"
+    assert len(set(control_plane.clients)) == 2
+
+
+def test_backoff_delay_is_capped(script):
+    assert all(script.MAX_RETRY_DELAY / 2 <= script.backoff_delay(10, 10) <= script.MAX_RETRY_DELAY for _ in range(50))
+
+
+class DroppingKeepAliveHandler(FakeControlPlaneHandler):
+    """Closes every connection after one response without telling the client, like an idle timeout."""
+
+    def do_GET(self):
+        super().do_GET()
+        self.close_connection = True
+
+
+def test_reopens_a_kept_alive_connection_the_server_dropped(script):
+    with serve(
+        DroppingKeepAliveHandler, key=_jwk(b"first-certificate"), requests=[], clients=[], failures=0, send_etag=True
+    ) as server:
+        connection = script.HttpConnection(server.url)
+        statuses = [connection.request("GET", "/v1/.well-known/jwks.json")[0] for _ in range(3)]
+
+    assert statuses == [200, 200, 200]
+    assert len(set(server.clients)) == 3
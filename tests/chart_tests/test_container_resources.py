@@ -29,15 +29,8 @@ def init_test_pod_resources():
     return {f"{doc['chart']}_{doc['kind']}_{doc['name']}": doc["container"] for doc in pod_docs}
 
 
-test_pod_resources_configs_data = init_test_pod_resources()
-
-
 class TestPodResources:
-    @pytest.mark.parametrize(
-        "pod_resources",
-        test_pod_resources_configs_data.values(),
-        ids=test_pod_resources_configs_data.keys(),
-    )
+    @pytest.mark.chart_params("pod_resources", init_test_pod_resources)
     def test_pod_resources_configs(self, pod_resources):
         """Test that all pod containers have a resources section defined."""
         for container in pod_resources:
@@ -91,11 +91,17 @@ class TestContainerdPrivateCaDaemonset:
             },
             {
                 "name": "private-ca-cert-foo",
-                "secret": {"secretName": "private-ca-cert-foo"},
+                "secret": {
+                    "secretName": "private-ca-cert-foo",
+                    "items": [{"key": "cert.pem", "path": "private-ca-cert-foo.pem"}],
+                },
             },
             {
                 "name": "private-ca-cert-bar",
-                "secret": {"secretName": "private-ca-cert-bar"},
+                "secret": {
+                    "secretName": "private-ca-cert-bar",
+                    "items": [{"key": "cert.pem", "path": "private-ca-cert-bar.pem"}],
+                },
             },
         ]
 
@@ -113,19 +119,43 @@ class TestContainerdPrivateCaDaemonset:
             },
             {
                 "name": "private-ca-cert-foo",
-                "mountPath": "/private-ca-certs/private-ca-cert-foo/private-ca-cert-foo.pem",
-                "subPath": "cert.pem",
+                "mountPath": "/private-ca-certs/private-ca-cert-foo",
+                "readOnly": True,
             },
             {
                 "name": "private-ca-cert-bar",
-                "mountPath": "/private-ca-certs/private-ca-cert-bar/private-ca-cert-bar.pem",
-                "subPath": "cert.pem",
+                "mountPath": "/private-ca-certs/private-ca-cert-bar",
+                "readOnly": True,
             },
         ]
 
         assert volumemounts == expected_volumemounts
         assert volumes == expected_volumes
 
+    def test_containerd_privateca_secrets_mounted_without_subpath(self, kube_version):
+        """Each CA secret is mounted as a whole directory, because kubelet never
+        updates subPath mounts. Projecting cert.pem to <secret>.pem gives the
+        layout update-containerd-certs.py watches: /private-ca-certs/<secret>/
+        holding <secret>.pem as a symlink through the `..data` symlink that
+        kubelet swaps on every rotation (see _kubelet_secret_dir in
+        test_update_containerd_certs.py)."""
+        docs = render_chart(
+            kube_version=kube_version,
+            show_only=self.show_only[:1],
+            values={
+                "global": {
+                    "privateCaCerts": ["private-ca-cert-foo"],
+                    "privateCaCertsAddToHost": {"enabled": True, "addToContainerd": True},
+                }
+            },
+        )
+        pod_spec = docs[0]["spec"]["template"]["spec"]
+        mount = next(vm for vm in pod_spec["containers"][0]["volumeMounts"] if vm["name"] == "private-ca-cert-foo")
+        assert "subPath" not in mount
+        assert mount["mountPath"] == "/private-ca-certs/private-ca-cert-foo"
+        volume = next(v for v in pod_spec["volumes"] if v["name"] == "private-ca-cert-foo")
+        assert volume["secret"]["items"] == [{"key": "cert.pem", "path": "private-ca-cert-foo.pem"}]
+
     def test_containerd_privateca_defaults(self, kube_version):
         """Default daemonset env vars and ConfigMap Python script (single render_chart)."""
         docs = render_chart(
@@ -213,6 +243,70 @@ class TestContainerdPrivateCaDaemonset:
         env = get_env_vars_dict(container["env"])
         assert "CONTAINERD_CONFIG_TOML" not in env
 
+    def test_containerd_privateca_metrics(self, kube_version):
+        """Metrics are off by default; enabling them sets METRICS_PORT, exposes
+        the port and adds the prometheus scrape annotations."""
+        values = {
+            "global": {
+                "privateCaCerts": ["private-ca-cert-foo"],
+                "privateCaCertsAddToHost": {"enabled": True, "addToContainerd": True},
+            }
+        }
+        docs = render_chart(kube_version=kube_version, show_only=self.show_only[:1], values=values)
+        pod_spec = docs[0]["spec"]["template"]
+        container = pod_spec["spec"]["containers"][0]
+        assert "METRICS_PORT" not in get_env_vars_dict(container["env"])
+        assert "ports" not in container
+        assert "prometheus.io/scrape" not in pod_spec["metadata"]["annotations"]
+
+        values["global"]["privateCaCertsAddToHost"]["containerdCertCopier"] = {"metrics": {"enabled": True, "port": 9999}}
+        docs = render_chart(kube_version=kube_version, show_only=self.show_only[:1], values=values)
+        pod_spec = docs[0]["spec"]["template"]
+        container = pod_spec["spec"]["containers"][0]
+        assert get_env_vars_dict(container["env"])["METRICS_PORT"] == "9999"
+        assert container["ports"] == [{"name": "metrics", "containerPort": 9999, "protocol": "TCP"}]
+        annotations = pod_spec["metadata"]["annotations"]
+        assert annotations["prometheus.io/scrape"] == "true"
+        assert annotations["prometheus.io/port"] == "9999"
+        assert annotations["prometheus.io/path"] == "/metrics"
+
+    def test_containerd_privateca_restart_rollout(self, kube_version):
+        """Restarts are immediate by default; lease mode runs the pod as the
+        private-ca service account with a Role for one Lease per slot."""
+        show_only = [
+            "templates/trust-private-ca-on-all-nodes/containerd-daemonset.yaml",
+            "templates/trust-private-ca-on-all-nodes/containerd-restart-lease-role.yaml",
+            "templates/trust-private-ca-on-all-nodes/containerd-restart-lease-rolebinding.yaml",
+        ]
+        values = {
+            "global": {
+                "privateCaCerts": ["private-ca-cert-foo"],
+                "privateCaCertsAddToHost": {"enabled": True, "addToContainerd": True},
+            }
+        }
+        docs = render_chart(kube_version=kube_version, show_only=show_only, values=values)
+        assert [doc["kind"] for doc in docs] == ["DaemonSet"]
+        pod_spec = docs[0]["spec"]["template"]["spec"]
+        assert "serviceAccountName" not in pod_spec
+        env = get_env_vars_dict(pod_spec["containers"][0]["env"])
+        assert env["RESTART_ROLLOUT"] == "immediate"
+        assert env["RESTART_JITTER_SECONDS"] == "300"
+
+        values["global"]["privateCaCertsAddToHost"]["containerdCertCopier"] = {
+            "restartRollout": {"mode": "lease", "maxConcurrent": 2}
+        }
+        daemonset, role, rolebinding = render_chart(kube_version=kube_version, show_only=show_only, values=values)
+        pod_spec = daemonset["spec"]["template"]["spec"]
+        assert pod_spec["serviceAccountName"] == "release-name-private-ca"
+        env = get_env_vars_dict(pod_spec["containers"][0]["env"])
+        assert env["RESTART_ROLLOUT"] == "lease"
+        assert env["RESTART_MAX_CONCURRENT"] == "2"
+        assert env["RESTART_LEASE_NAME"] == "release-name-containerd-restart"
+        assert role["kind"] == "Role"
+        assert role["rules"][1]["resourceNames"] == ["release-name-containerd-restart-0", "release-name-containerd-restart-1"]
+        assert rolebinding["roleRef"]["name"] == role["metadata"]["name"]
+        assert rolebinding["subjects"][0]["name"] == "release-name-private-ca"
+
     def test_containerd_privateca_daemonset_host_path_overrides(self, kube_version):
         """Test that the daemonset is rendered with custom hostPath."""
         docs = render_chart(
@@ -1,4 +1,5 @@
 import re
+from functools import cache
 
 import pytest
 
@@ -27,6 +28,72 @@ PSS_RESTRICTED_EXEMPT = {
     "StatefulSet/release-name-elasticsearch-master": "bundled chart: privileged sysctl init container (vm.max_map_count)",
 }
 
+private_repo = "example.com/the-private-registry-repository"
+
+
+def doc_params(docs):
+    return [pytest.param(doc, id=f"{doc['kind']}/{doc['metadata']['name']}") for doc in docs]
+
+
+@cache
+def default_docs():
+    return render_chart(values=get_all_features())
+
+
+@cache
+def pod_manager_docs():
+    # global.plane.mode defaults to "unified", under which dp-link never renders: unlike every
+    # other plane-gated template (which renders for "control" OR "unified"), dp-link is the one
+    # component gated on "control" alone, by design (it links a genuinely separate data plane back
+    # to the control plane, which is meaningless in a single unified install). Render once more with
+    # plane.mode=control and fold in any pod/job managers that don't already appear in the default
+    # sweep, so dp-link gets the same coverage as everything else without re-testing components twice.
+    control_mode_values = get_all_features()
+    control_mode_values["global"]["plane"] = {"mode": "control"}
+    control_mode_docs = render_chart(values=control_mode_values)
+    return [doc for doc in default_docs() if doc["kind"] in pod_managers] + new_docs_by_kind(
+        default_docs(), control_mode_docs, pod_managers
+    )
+
+
+@cache
+def pod_manager_containers_public():
+    return {
+        f"{doc['kind']}/{doc['metadata']['name']}/{name}": container
+        for doc in pod_manager_docs()
+        for name, container in get_containers_by_name(doc, include_init_containers=True).items()
+    }
+
+
+def annotated_params():
+    return doc_params(x for x in default_docs() if x["metadata"].get("annotations"))
+
+
+def selector_pod_manager_params():
+    return doc_params(doc for doc in default_docs() if doc["kind"] in selector_kinds)
+
+
+def pod_manager_params():
+    return doc_params(pod_manager_docs())
+
+
+def private_registry_pod_manager_params():
+    private_values = get_all_features()
+    private_values["global"]["privateRegistry"] = {
+        "enabled": True,
+        "repository": private_repo,
+    }
+    private_values["global"]["authSidecar"] = {
+        **private_values["global"].get("authSidecar", {}),
+        "enabled": True,
+        "repository": f"{private_repo}/ap-auth-sidecar",
+    }
+    return doc_params(doc for doc in render_chart(values=private_values) if doc["kind"] in pod_managers)
+
+
+def env_var_params():
+    return doc_params(x for x in render_chart(values=get_all_features()) if x["kind"] in [*selector_kinds, "CronJob"])
+
 
 class TestK8sVersionConstraints:
     @pytest.mark.parametrize(
@@ -61,12 +128,9 @@ class TestK8sVersionConstraints:
 
 
 class TestAllCronJobs:
-    chart_values = get_all_features()
-
-    def test_ensure_cronjob_names_are_max_52_chars(self):
+    def test_ensure_cronjob_names_are_max_52_chars(self, all_features_chart):
         """Cronjob names must be DNS_MAX_LEN - TIMESTAMP_LEN, which is 52 chars."""
-        default_docs = render_chart(values=self.chart_values)
-        cronjobs = [doc for doc in default_docs if doc["kind"].lower() == "CronJob".lower()]
+        cronjobs = all_features_chart().of_kind("CronJob")
 
         for doc in cronjobs:
             name_len = len(doc["metadata"]["name"])
@@ -76,39 +140,13 @@ class TestAllCronJobs:
 class TestAllPodSpecContainers:
     """Test pod spec containers for some defaults."""
 
-    chart_values = get_all_features()
-
-    default_docs = render_chart(values=chart_values)
-    selector_pod_manager_docs = [doc for doc in default_docs if doc["kind"] in selector_kinds]
-    pod_manager_docs = [doc for doc in default_docs if doc["kind"] in pod_managers]
-    annotated = [x for x in default_docs if x["metadata"].get("annotations")]
-
-    # global.plane.mode defaults to "unified", under which dp-link never renders: unlike every
-    # other plane-gated template (which renders for "control" OR "unified"), dp-link is the one
-    # component gated on "control" alone, by design (it links a genuinely separate data plane back
-    # to the control plane, which is meaningless in a single unified install). Render once more with
-    # plane.mode=control and fold in any pod/job managers that don't already appear in the default
-    # sweep, so dp-link gets the same coverage as everything else without re-testing components twice.
-    control_mode_values = get_all_features()
-    control_mode_values["global"]["plane"] = {"mode": "control"}
-    control_mode_docs = render_chart(values=control_mode_values)
-    pod_manager_docs += new_docs_by_kind(default_docs, control_mode_docs, pod_managers)
-
-    @pytest.mark.parametrize(
-        "doc",
-        annotated,
-        ids=[f"{x['kind']}/{x['metadata']['name']}" for x in annotated],
-    )
+    @pytest.mark.chart_params("doc", annotated_params)
     def test_annotation_keys_are_valid(self, doc):
         """Test that our annotation keys are valid."""
         annotation_results = [bool(annotation_validator.match(a)) for a in doc["metadata"]["annotations"]]
         assert all(annotation_results), f"One of the annotation keys in {doc['kind']} {doc['metadata']['name']} is invalid."
 
-    @pytest.mark.parametrize(
-        "doc",
-        selector_pod_manager_docs,
-        ids=[f"{x['kind']}/{x['metadata']['name']}" for x in selector_pod_manager_docs],
-    )
+    @pytest.mark.chart_params("doc", selector_pod_manager_params)
     def test_selector_matches_pod_template_labels(self, doc):
         """Test that spec.selector.matchLabels is a subset of spec.template.metadata.labels.
 
@@ -127,11 +165,7 @@ class TestAllPodSpecContainers:
                 f"does not match template label value {template_labels[key]!r}"
             )
 
-    @pytest.mark.parametrize(
-        "doc",
-        pod_manager_docs,
-        ids=[f"{x['kind']}/{x['metadata']['name']}" for x in pod_manager_docs],
-    )
+    @pytest.mark.chart_params("doc", pod_manager_params)
     def test_default_chart_with_basedomain(self, doc):
         """Test that each container in each pod spec renders and has some required fields."""
         c_by_name = get_containers_by_name(doc, include_init_containers=True)
@@ -145,32 +179,7 @@ class TestAllPodSpecContainers:
             assert "cpu" in resources.get("requests")
             assert "memory" in resources.get("requests")
 
-    private_repo = "example.com/the-private-registry-repository"
-    private_values = get_all_features()
-    private_values["global"]["privateRegistry"] = {
-        "enabled": True,
-        "repository": private_repo,
-    }
-    private_values["global"]["authSidecar"] = {
-        **private_values["global"].get("authSidecar", {}),
-        "enabled": True,
-        "repository": f"{private_repo}/ap-auth-sidecar",
-    }
-    private_repo_docs = render_chart(values=private_values)
-    pod_manager_docs_private = [doc for doc in private_repo_docs if doc["kind"] in pod_managers]
-    pod_manager_docs_private_ids = [f"{doc['kind']}/{doc['metadata']['name']}" for doc in pod_manager_docs_private]
-
-    pod_manager_containers_public = {
-        f"{doc['kind']}/{doc['metadata']['name']}/{name}": container
-        for doc in pod_manager_docs
-        for name, container in get_containers_by_name(doc, include_init_containers=True).items()
-    }
-
-    @pytest.mark.parametrize(
-        "doc",
-        pod_manager_docs_private,
-        ids=pod_manager_docs_private_ids,
-    )
+    @pytest.mark.chart_params("doc", private_registry_pod_manager_params)
     def test_all_default_containers_with_private_registry(self, doc):
         """Test that each container uses the privateRegistry.
 
@@ -181,18 +190,14 @@ class TestAllPodSpecContainers:
 
         for name, container in c_by_name.items():
             pod_container = f"{doc['kind']}/{doc['metadata']['name']}/{name}"
-            assert (
-                container["image"].split("/")[-1:] == self.pod_manager_containers_public[pod_container]["image"].split("/")[-1:]
-            ), f"The spec for '{pod_container}' does not use the same image for public and private registry configurations."
-            assert container["image"].startswith(self.private_repo), (
-                f"The spec for '{pod_container}' does not use the privateRegistry repo '{self.private_repo}': {container}"
+            assert container["image"].split("/")[-1:] == pod_manager_containers_public()[pod_container]["image"].split("/")[-1:], (
+                f"The spec for '{pod_container}' does not use the same image for public and private registry configurations."
+            )
+            assert container["image"].startswith(private_repo), (
+                f"The spec for '{pod_container}' does not use the privateRegistry repo '{private_repo}': {container}"
             )
 
-    @pytest.mark.parametrize(
-        "doc",
-        pod_manager_docs,
-        ids=[f"{x['kind']}/{x['metadata']['name']}" for x in pod_manager_docs],
-    )
+    @pytest.mark.chart_params("doc", pod_manager_params)
     def test_pss_restricted_security_context(self, doc):
         """Every platform pod must render the full PSS-Restricted container securityContext (PINF-713).
 
@@ -234,7 +239,7 @@ class TestAllPodSpecContainers:
     def test_no_unexpected_default_tolerations(self):
         """Render the whole chart and assert only the documented exception has a default toleration."""
         offenders = {}
-        for doc in self.pod_manager_docs:
+        for doc in pod_manager_docs():
             doc_id = f"{doc['kind']}/{doc['metadata']['name']}"
             if doc_id in self.TOLERATION_EXEMPT:
                 continue
@@ -254,7 +259,7 @@ class TestAllPodSpecContainers:
     def test_no_containers_use_unsafe_mount_propagation(self):
         """Render the whole chart and assert no volumeMount sets an unsafe mountPropagation."""
         offenders = {}
-        for doc in self.pod_manager_docs:
+        for doc in pod_manager_docs():
             doc_id = f"{doc['kind']}/{doc['metadata']['name']}"
             for name, container in get_containers_by_name(doc, include_init_containers=True).items():
                 for mount in container.get("volumeMounts") or []:
@@ -271,22 +276,13 @@ class TestDuplicateEnvironment:
     """Parametrize all the docs that have container specs and test them for
     duplicate env vars."""
 
-    values = get_all_features()
-
-    docs = render_chart(values=values)
-    trimmed_docs = [x for x in docs if x["kind"] in [*selector_kinds, "CronJob"]]
-
     @staticmethod
     def check_env_vars_are_unique(container):
         """Return a list of env var keys that are not unique in the container env."""
         c_env_names = [x["name"] for x in container.get("env") or []]
         return [x for x in set(c_env_names) if c_env_names.count(x) > 1]
 
-    @pytest.mark.parametrize(
-        "doc",
-        trimmed_docs,
-        ids=[f"{x['kind']}/{x['metadata']['name']}" for x in trimmed_docs],
-    )
+    @pytest.mark.chart_params("doc", env_var_params)
     def test_env_vars_have_no_duplicates(self, doc):
         """Test that there are no duplicate env vars."""
         for name, container in get_containers_by_name(doc, include_init_containers=True).items():
@@ -1,8 +1,9 @@
-import docker
+from functools import cache
+
 import jmespath
 import pytest
 
-from tests.chart_tests.conftest import docker_daemon_present
+from tests.utils import registry_probe
 from tests.utils.chart import render_chart
 
 
@@ -24,15 +25,28 @@ def list_docker_images():
         if docker_image_sublist is not None:
             docker_images = docker_image_sublist + docker_images
 
-    return docker_images
+    # The same image is used by many containers, but only needs checking once
+    return list(dict.fromkeys(docker_image.replace('"', "").strip() for docker_image in docker_images))
+
+
+def docker_image_params():
+    return {docker_image: docker_image for docker_image in list_docker_images()}
 
 
-@pytest.mark.parametrize("docker_image", list_docker_images())
-@pytest.mark.skipif(not docker_daemon_present(), reason="Docker daemon not available")
-@pytest.mark.flaky(reruns=5, reruns_delay=1)
-def test_docker_image(docker_client, docker_image):
-    docker_image = docker_image.replace('"', "").strip()
+@cache
+def probe_docker_images():
+    """Probe every image of the render at once, so the tests below only look up their result."""
+    prober = registry_probe.RegistryProber()
     try:
-        docker_client.images.get_registry_data(docker_image)
-    except docker.errors.APIError as exc:
-        assert False, f"'Error reading image: {docker_image} | Error: {exc}"
+        return prober.probe_all(list_docker_images())
+    finally:
+        prober.close()
+
+
+@pytest.mark.chart_params("docker_image", docker_image_params)
+@pytest.mark.skipif(
+    not registry_probe.ENABLED, reason="Probes real registries; set REGISTRY_PROBE=true or REGISTRY_PROBE_ENDPOINTS to run"
+)
+def test_docker_image(docker_image):
+    result = probe_docker_images()[docker_image]
+    assert result.ok, f"Error reading image: {docker_image} | Error: {result.error}"
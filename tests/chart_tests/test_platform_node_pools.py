@@ -32,15 +32,8 @@ def init_test_pod_spec():
     return {f"{doc['chart']}_{doc['kind']}_{doc['name']}": doc["spec"] for doc in pod_docs}
 
 
-test_pod_resources_configs_data = init_test_pod_spec()
-
-
 class TestPodResources:
-    @pytest.mark.parametrize(
-        "pod_spec",
-        test_pod_resources_configs_data.values(),
-        ids=test_pod_resources_configs_data.keys(),
-    )
+    @pytest.mark.chart_params("pod_spec", init_test_pod_spec)
     def test_pod_resources_configs(self, pod_spec):
         """Test that all pod spec have a nodeSelector,affinity and tolerations section defined."""
         if pod_spec["containers"][0]["name"].split("release-name-")[-1] in ignore_list:
@@ -13,7 +13,7 @@ runAsNonRoot), the sibling control.
 import pytest
 
 from tests import supported_k8s_versions
-from tests.utils import get_all_features, get_pod_template
+from tests.utils import get_pod_template
 from tests.utils.chart import render_chart
 
 # Pods that do not yet set a pod-level seccomp profile. Each entry documents *why* it is
@@ -37,9 +37,9 @@ POD_MANAGER_KINDS = {"Deployment", "StatefulSet", "DaemonSet", "ReplicaSet", "Jo
 
 
 @pytest.mark.parametrize("kube_version", supported_k8s_versions)
-def test_all_platform_pods_set_seccomp_profile(kube_version):
+def test_all_platform_pods_set_seccomp_profile(kube_version, all_features_chart):
     """Every platform pod manager renders pod-level seccompProfile.type: RuntimeDefault."""
-    docs = render_chart(kube_version=kube_version, values=get_all_features())
+    docs = all_features_chart(kube_version).of_kind(*POD_MANAGER_KINDS)
 
     checked = []
     for doc in docs:
@@ -30,14 +30,7 @@ def init_test_pod_annotation_configs():
     return {f"{doc['chart']}_{doc['kind']}_{doc['name']}": doc["annotations"] for doc in pod_docs}
 
 
-test_pod_annotations_configs_data = init_test_pod_annotation_configs()
-
-
-@pytest.mark.parametrize(
-    "pod_annotations",
-    test_pod_annotations_configs_data.values(),
-    ids=test_pod_annotations_configs_data.keys(),
-)
+@pytest.mark.chart_params("pod_annotations", init_test_pod_annotation_configs)
 def test_pod_labels_configs(pod_annotations):
     """Annotations check for definition."""
     assert "astronomer" == pod_annotations["app.cloud.io"]
@@ -98,14 +98,7 @@ def get_private_registry_docs_image_pull_secrets():
     return {f"{doc['name']}_{doc['kind']}": doc["image_pull_secrets"] for doc in searched_docs}
 
 
-private_registry_docs_image_pull_secrets = get_private_registry_docs_image_pull_secrets()
-
-
-@pytest.mark.parametrize(
-    "image_pull_secrets",
-    private_registry_docs_image_pull_secrets.values(),
-    ids=private_registry_docs_image_pull_secrets.keys(),
-)
+@pytest.mark.chart_params("image_pull_secrets", get_private_registry_docs_image_pull_secrets)
 def test_private_registry_repository_image_pull_secret(image_pull_secrets):
     """Specs must contain imagePullSecrets for private repository when it is
     specified."""
@@ -1,3 +1,5 @@
+from functools import cache
+
 import pytest
 import yaml
 
@@ -16,11 +18,46 @@ customize_all_probes = yaml.safe_load(
 )
 
 
-class TestCustomProbes:
+def custom_probes_params():
     docs = render_chart(values=customize_all_probes)
-    filtered_docs = [get_containers_by_name(doc) for doc in docs if doc["kind"] in include_kind_list]
+    return [get_containers_by_name(doc) for doc in docs if doc["kind"] in include_kind_list]
+
+
+def startup_probes_params():
+    docs = render_chart(values=get_all_features())
+    return {
+        f"{doc['kind']}_{doc['metadata']['name']}_{name}": container
+        for doc in docs
+        if doc["kind"] in include_kind_list
+        and doc.get("metadata", {}).get("labels", {}).get("component") not in startup_probe_excluded_components
+        for name, container in get_containers_by_name(doc).items()
+    }
+
+
+@cache
+def default_chart_containers():
+    """Return the all-features containers for the newest supported k8s version, keyed by <pod>_<container>."""
+    kube_version = supported_k8s_versions[-1]
+    containers = get_chart_containers(kube_version, get_all_features())
+    # Trim the k8s version and release name because they're not important for this test.
+    return {k.removeprefix(f"{kube_version}_release-name-"): v for k, v in sorted(containers.items())}
+
+
+def default_probes(probe_type):
+    """Return {container: probe} for the default containers that have a probe_type."""
+    return {k: v[probe_type] for k, v in default_chart_containers().items() if v.get(probe_type)}
+
+
+def liveness_probe_params():
+    return [pytest.param(container, probe, id=container) for container, probe in default_probes("livenessProbe").items()]
+
 
-    @pytest.mark.parametrize("doc", filtered_docs)
+def readiness_probe_params():
+    return [pytest.param(container, probe, id=container) for container, probe in default_probes("readinessProbe").items()]
+
+
+class TestCustomProbes:
+    @pytest.mark.chart_params("doc", custom_probes_params)
     def test_template_probes_with_custom_values(self, doc):
         """Ensure all containers have the ability to customize liveness, readiness, and startup probes."""
 
@@ -45,16 +82,7 @@ class TestStartupProbes:
     startupProbe on non-sidecar init containers.
     """
 
-    docs = render_chart(values=get_all_features())
-    containers = {
-        f"{doc['kind']}_{doc['metadata']['name']}_{name}": container
-        for doc in docs
-        if doc["kind"] in include_kind_list
-        and doc.get("metadata", {}).get("labels", {}).get("component") not in startup_probe_excluded_components
-        for name, container in get_containers_by_name(doc).items()
-    }
-
-    @pytest.mark.parametrize("container", containers.values(), ids=list(containers.keys()))
+    @pytest.mark.chart_params("container", startup_probes_params)
     def test_every_container_has_startup_probe(self, container):
         """Every container must define a non-empty startupProbe (Gatekeeper allow-with-probes)."""
         assert "startupProbe" in container, "container is missing a startupProbe"
@@ -64,29 +92,6 @@ class TestStartupProbes:
 class TestDefaultProbes:
     """Test the default probes. This test is to ensure we keep the default probes during refactoring."""
 
-    def init_test_probes():
-        chart_values = get_all_features()
-        containers = {}
-        for k8s_version in supported_k8s_versions:
-            k8s_version_containers = get_chart_containers(k8s_version, chart_values)
-            print(f"Containers before processing: {k8s_version_containers.keys()}")
-            containers = {**containers, **k8s_version_containers}
-        return dict(sorted(containers.items()))
-
-    chart_containers = init_test_probes()
-
-    # Trim the k8s version because it's not important for this test.
-    containers = {
-        k.removeprefix(f"{supported_k8s_versions[-1]}_release-name-"): v
-        for k, v in chart_containers.items()
-        if supported_k8s_versions[-1] in k
-    }
-    print(f"Container keys after processing: {containers.keys()}")
-
-    # Show only containers that have a liveness or readiness probe.
-    current_clp = {k: v["livenessProbe"] for k, v in containers.items() if v.get("livenessProbe")}
-    current_crp = {k: v["readinessProbe"] for k, v in containers.items() if v.get("readinessProbe")}
-
     # Expected container liveness probes. This block should contain all of the expected default liveness probes.
     expected_clp = {
         "alertmanager_auth-proxy": {
@@ -318,26 +323,19 @@ class TestDefaultProbes:
         },
     }
 
-    # liveness probe data and ids
-    lp_data = zip(current_clp.keys(), current_clp.values(), expected_clp.values())
-    lp_ids = current_clp.keys()
-
     # If any other tests fail, this will not run, so they have to be commented out for this to actually show you where the problem is.
-    @pytest.mark.parametrize("current,expected", [(current_clp, expected_clp), (current_crp, expected_crp)])
-    def test_probe_lists(self, current, expected):
+    @pytest.mark.parametrize("probe_type,expected", [("livenessProbe", expected_clp), ("readinessProbe", expected_crp)])
+    def test_probe_lists(self, probe_type, expected):
         """Test that the list of probes matches between what is rendered by the current chart version and what is expected."""
-        set_difference = set(current.keys()) ^ set(expected.keys())
+        set_difference = set(default_probes(probe_type).keys()) ^ set(expected.keys())
         assert set_difference == set(), f"Containers not in both lists: {set_difference}"
 
-    @pytest.mark.parametrize("container,current,expected", lp_data, ids=lp_ids)
-    def test_individual_liveness_probes(self, container, current, expected):
+    @pytest.mark.chart_params("container,current", liveness_probe_params)
+    def test_individual_liveness_probes(self, container, current):
         """Test the default livenessProbes for each container."""
-        assert current == expected, f"container {container} has unexpected livenessProbe"
-
-    rp_data = zip(current_crp.keys(), current_crp.values(), expected_crp.values())
-    rp_ids = current_crp.keys()
+        assert current == self.expected_clp.get(container), f"container {container} has unexpected livenessProbe"
 
-    @pytest.mark.parametrize("container,current,expected", rp_data, ids=rp_ids)
-    def test_individual_readiness_probes(self, container, current, expected):
+    @pytest.mark.chart_params("container,current", readiness_probe_params)
+    def test_individual_readiness_probes(self, container, current):
         """Test the default readinessProbes for each container."""
-        assert current == expected, f"container {container} has unexpected readinessProbe"
+        assert current == self.expected_crp.get(container), f"container {container} has unexpected readinessProbe"
@@ -5,13 +5,21 @@ import yaml
 from deepmerge import always_merger
 
 from tests import git_root_dir
-from tests.utils import get_all_features, get_containers_by_name, get_pod_template
+from tests.utils import get_all_features, get_all_features_chart, get_containers_by_name, get_pod_template
 from tests.utils.chart import render_chart
 
 annotation_validator = re.compile("^([^/]+/)?(([A-Za-z0-9][-A-Za-z0-9_.]*)?[A-Za-z0-9])$")
 pod_managers = ["Deployment", "StatefulSet", "DaemonSet", "CronJob", "Job"]
 
 
+def read_only_root_pod_manager_params():
+    overrides = yaml.safe_load(
+        ((git_root_dir) / "tests" / "chart_tests" / "test_data" / "secrity_context_overrides.yaml").read_text()
+    )
+    docs = render_chart(values=always_merger.merge(get_all_features(), overrides))
+    return {f"{x['kind']}/{x['metadata']['name']}": x for x in docs if x["kind"] in pod_managers}
+
+
 class TestAllContainersReadOnlyRoot:
     """Set up a test scenario that ensures all containers have a custom configuration with readOnlyRootFilesystem: False, but the
     result is that readOnlyRootFilesystem is still true.
@@ -33,20 +41,7 @@ class TestAllContainersReadOnlyRoot:
         "StatefulSet/release-name-prometheus",
     ]
 
-    overrides = yaml.safe_load(
-        ((git_root_dir) / "tests" / "chart_tests" / "test_data" / "secrity_context_overrides.yaml").read_text()
-    )
-
-    chart_values = always_merger.merge(get_all_features(), overrides)
-
-    default_docs = render_chart(values=chart_values)
-    pod_manager_docs = [doc for doc in default_docs if doc["kind"] in pod_managers]
-
-    @pytest.mark.parametrize(
-        "doc",
-        pod_manager_docs,
-        ids=[f"{x['kind']}/{x['metadata']['name']}" for x in pod_manager_docs],
-    )
+    @pytest.mark.chart_params("doc", read_only_root_pod_manager_params)
     def test_all_containers_have_read_only_root(self, doc, request):
         """Test that every container matches our expected configs for ticket https://github.com/astronomer/issues/issues/7394."""
         param_id = request.node.callspec.id
@@ -60,17 +55,14 @@ class TestAllContainersReadOnlyRoot:
                 assert container.get("securityContext").get("dummy_key") == "dummy_value"
 
 
-class TestHoustonPodManagers:
-    chart_values = get_all_features()
+def houston_pod_manager_params():
     templates = [str(x.relative_to(git_root_dir)) for x in (git_root_dir / "charts/astronomer/templates/houston").rglob("*.yaml")]
-    docs = render_chart(values=chart_values, show_only=templates)
-    pod_manager_docs = [x for x in docs if x["kind"] in pod_managers]
+    docs = get_all_features_chart().from_template(*templates)
+    return {f"{x.get('kind', '')}/{x['metadata']['name']}": x for x in docs if x["kind"] in pod_managers}
 
-    @pytest.mark.parametrize(
-        "pod_manager_doc",
-        pod_manager_docs,
-        ids=[f"{x.get('kind', '')}/{x['metadata']['name']}" for x in pod_manager_docs],
-    )
+
+class TestHoustonPodManagers:
+    @pytest.mark.chart_params("pod_manager_doc", houston_pod_manager_params)
     def test_houston_pods_read_only_root_filesysystem_settings(self, pod_manager_doc):
         """Test that Houston pod manager docs have the correct read-only root filesystem settings."""
         pod_name = pod_manager_doc["metadata"]["name"].removeprefix("release-name-")
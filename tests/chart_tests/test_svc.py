@@ -18,14 +18,7 @@ def init_test_svc_port_configs():
     return {f"{doc['chart']}_{doc['component']}_{doc['name']}": doc["ports"] for doc in svc_docs}
 
 
-test_svc_port_configs_data = init_test_svc_port_configs()
-
-
-@pytest.mark.parametrize(
-    "svc_ports",
-    test_svc_port_configs_data.values(),
-    ids=test_svc_port_configs_data.keys(),
-)
+@pytest.mark.chart_params("svc_ports", init_test_svc_port_configs)
 def test_svc_port_configs(svc_ports):
     """Port specs must contain appProtocol in Svc definition."""
     assert svc_ports is not None
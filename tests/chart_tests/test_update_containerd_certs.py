@@ -4,13 +4,20 @@ These tests exercise the script logic against real GKE config.toml samples
 in tests/data_files (containerd 1.x / GKE 1.32 and containerd 2.x / GKE 1.33).
 """
 
+import hashlib
 import importlib.util
+import itertools
 import shutil
+import sys
 import textwrap
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
+
+from tests.utils.fake_http import FakeHandler, serve
 
 DATA_FILES_DIR = Path(__file__).parent.parent / "data_files"
 SCRIPT_PATH = Path(__file__).parent.parent.parent / "files" / "update-containerd-certs.py"
@@ -484,26 +491,34 @@ def _wire_certs_dir(script, certs_dir: Path) -> None:
     script.CERTS_DIR_HOST = certs_dir
 
 
-class TestCopyCaCerts:
-    """Tests for CA certificate copying."""
+def _sync_ca_certs(script) -> dict[Path, str]:
+    """Apply plan_ca_certs() as a reconcile tick does and return its {host-side PEM path: sha256}."""
+    plan, checksums = script.plan_ca_certs()
+    script.apply_plan(plan)
+    return checksums
+
+
+class TestPlanCaCerts:
+    """Tests for planning and applying the CA certificate copies."""
 
     def test_copies_pem_to_certs_dir(self, script, containerd_env):
         _wire_certs_dir(script, containerd_env["certs_dir"])
         script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
 
-        copied = script.copy_ca_certs()
+        copied = _sync_ca_certs(script)
 
         assert len(copied) == 1
         dest = containerd_env["certs_dir"] / "my-ca.pem"
         assert dest.is_file()
         assert "FAKECERT" in dest.read_text()
-        assert copied == [dest]
+        assert list(copied) == [dest]
+        assert copied[dest] == hashlib.sha256(dest.read_bytes()).hexdigest()
 
     def test_handles_missing_private_certs_dir(self, script, tmp_path):
         _wire_certs_dir(script, tmp_path / "certs.d" / "registry")
         script.PRIVATE_CA_CERTS_DIR = tmp_path / "nonexistent"
 
-        assert script.copy_ca_certs() == []
+        assert script.plan_ca_certs() == ([], {})
 
     def test_returns_empty_when_no_pems_present(self, script, tmp_path):
         """Directory exists but holds no PEMs — must no-op, not create empty files."""
@@ -515,7 +530,7 @@ class TestCopyCaCerts:
         _wire_certs_dir(script, certs_dir)
         script.PRIVATE_CA_CERTS_DIR = private_dir
 
-        assert script.copy_ca_certs() == []
+        assert script.plan_ca_certs() == ([], {})
         assert not certs_dir.exists()
 
     def test_copies_each_ca_to_its_own_file(self, script, containerd_env):
@@ -529,7 +544,7 @@ class TestCopyCaCerts:
         second.mkdir()
         (second / "other-ca.pem").write_text("-----BEGIN CERTIFICATE-----\nOTHERCERT\n-----END CERTIFICATE-----\n")
 
-        copied = script.copy_ca_certs()
+        copied = _sync_ca_certs(script)
 
         assert {p.name for p in copied} == {"my-ca.pem", "other-ca.pem"}
         assert "FAKECERT" in (containerd_env["certs_dir"] / "my-ca.pem").read_text()
@@ -545,10 +560,81 @@ class TestCopyCaCerts:
         second.mkdir()
         (second / "other-ca.pem").write_text("-----BEGIN CERTIFICATE-----\nOTHERCERT\n-----END CERTIFICATE-----\n")
 
-        first_run = script.copy_ca_certs()
-        second_run = script.copy_ca_certs()
+        first_run = _sync_ca_certs(script)
+        second_run = _sync_ca_certs(script)
         assert [p.name for p in first_run] == [p.name for p in second_run]
 
+    def test_skips_unchanged_pems(self, script, containerd_env):
+        _wire_certs_dir(script, containerd_env["certs_dir"])
+        script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
+        dest = containerd_env["certs_dir"] / "my-ca.pem"
+
+        first_run = _sync_ca_certs(script)
+        inode = dest.stat().st_ino
+        with patch.object(script, "write_atomic") as mock_write:
+            second_run = _sync_ca_certs(script)
+
+        mock_write.assert_not_called()
+        assert dest.stat().st_ino == inode
+        assert second_run == first_run
+
+    def test_existing_identical_pem_is_not_rewritten_after_restart(self, script, containerd_env):
+        """A fresh process has no cache yet, so it compares with the file on disk."""
+        _wire_certs_dir(script, containerd_env["certs_dir"])
+        script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
+        shutil.copy2(containerd_env["private_certs_dir"] / "my-ca" / "my-ca.pem", containerd_env["certs_dir"] / "my-ca.pem")
+
+        with patch.object(script, "write_atomic") as mock_write:
+            _sync_ca_certs(script)
+
+        mock_write.assert_not_called()
+
+    def test_rewrites_changed_and_tampered_pems(self, script, containerd_env):
+        _wire_certs_dir(script, containerd_env["certs_dir"])
+        script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
+        source = containerd_env["private_certs_dir"] / "my-ca" / "my-ca.pem"
+        dest = containerd_env["certs_dir"] / "my-ca.pem"
+        _sync_ca_certs(script)
+
+        source.write_text("-----BEGIN CERTIFICATE-----\nROTATED\n-----END CERTIFICATE-----\n")
+        _sync_ca_certs(script)
+        assert "ROTATED" in dest.read_text()
+
+        dest.write_text("truncated")
+        _sync_ca_certs(script)
+        assert dest.read_text() == source.read_text()
+
+    def test_removes_pems_no_longer_mounted(self, script, containerd_env):
+        _wire_certs_dir(script, containerd_env["certs_dir"])
+        script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
+        second = containerd_env["private_certs_dir"] / "other-ca"
+        second.mkdir()
+        (second / "other-ca.pem").write_text("-----BEGIN CERTIFICATE-----\nOTHERCERT\n-----END CERTIFICATE-----\n")
+        _sync_ca_certs(script)
+        (containerd_env["certs_dir"] / "hosts.toml").write_text("# not a PEM")
+
+        shutil.rmtree(second)
+        copied = _sync_ca_certs(script)
+
+        assert [p.name for p in copied] == ["my-ca.pem"]
+        assert sorted(p.name for p in containerd_env["certs_dir"].iterdir()) == ["hosts.toml", "my-ca.pem"]
+
+    def test_reconcile_reads_only_the_source_pems(self, script, containerd_env):
+        """Once copied, a PEM is recognised as unchanged by its cached size and
+        digest: the reconcile reads each source once and no destination PEM."""
+        _wire_certs_dir(script, containerd_env["certs_dir"])
+        script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
+        script.REGISTRY_HOST = "registry.example.com"
+        _sync_ca_certs(script)
+        real_read_bytes = Path.read_bytes
+
+        with patch.object(script.Path, "read_bytes", autospec=True, side_effect=real_read_bytes) as read_bytes:
+            script.apply_plan(script.plan_reconcile(2))
+
+        read_pems = [call.args[0] for call in read_bytes.call_args_list if call.args[0].suffix == ".pem"]
+        assert read_pems == [containerd_env["private_certs_dir"] / "my-ca" / "my-ca.pem"]
+        assert "my-ca.pem" in (containerd_env["certs_dir"] / "hosts.toml").read_text()
+
 
 class TestStripRegistryMirrorsBlocks:
     """Unit tests for the mirrors-stripping helper.
@@ -688,7 +774,7 @@ class TestPreserveMirrorsAsHostsToml:
         assert (docker_io_dir / "hosts.toml").read_text() == pre_existing
 
     def test_skips_translation_for_registry_host(self, script, containerd_env):
-        """The private-registry hosts.toml is written by _apply_v2_hosts_toml
+        """The private-registry hosts.toml is written by the reconcile loop
         with a `ca = [...]` key. The mirror translator must not write a
         no-`ca` version that would clobber it."""
         config_toml = containerd_env["containerd_dir"] / "config.toml"
@@ -711,7 +797,7 @@ class TestPreserveMirrorsAsHostsToml:
             script.inject_config_path(containerd_version=2)
 
         # The translator must have skipped REGISTRY_HOST — no hosts.toml
-        # without a `ca` key should be sitting where _apply_v2_hosts_toml
+        # without a `ca` key should be sitting where the reconcile loop
         # is going to write later.
         registry_hosts_toml = containerd_env["containerd_dir"] / "certs.d" / "registry.example.com" / "hosts.toml"
         assert not registry_hosts_toml.exists()
@@ -758,7 +844,96 @@ class TestPreserveMirrorsAsHostsToml:
         assert 'capabilities = ["pull", "resolve"]' in content
 
 
-class TestWriteCustomerConfigToml:
+class TestReconcilePlan:
+    """Tests for the plan/diff/apply path that writes only changed files."""
+
+    @pytest.fixture
+    def gke_133(self, script, containerd_env):
+        config_toml = containerd_env["containerd_dir"] / "config.toml"
+        shutil.copy2(DATA_FILES_DIR / "gke_1_33_containerd_2x_config.toml", config_toml)
+        script.CONFIG_TOML = config_toml
+        script.CONFIG_TOML_BAK = containerd_env["containerd_dir"] / "config.toml.bak"
+        script.CONTAINERD_HOST_PATH = containerd_env["containerd_dir"]
+        script.CERT_CONFIG_PATH = "/etc/containerd/certs.d"
+        script.REGISTRY_HOST = "registry.example.com"
+        return config_toml
+
+    def test_plan_covers_mirrors_then_config_toml(self, script, gke_133):
+        """Preserved mirrors come first so config.toml never drops a mirror
+        before its hosts.toml replacement exists."""
+        plan = script.plan_config_path_injection(2)
+
+        assert [p.path for p in plan] == [gke_133.parent / "certs.d" / "docker.io" / "hosts.toml", gke_133]
+        assert b'config_path = "/etc/containerd/certs.d"' in plan[-1].content
+
+    def test_applies_only_changed_files(self, script, containerd_env, tmp_path):
+        unchanged = tmp_path / "unchanged.toml"
+        unchanged.write_text("same\n")
+        unchanged.chmod(0o600)
+        inode = unchanged.stat().st_ino
+        plan = [
+            script.PlannedFile(unchanged, b"same\n", "test"),
+            script.PlannedFile(tmp_path / "new" / "hosts.toml", b"new\n", "test"),
+        ]
+
+        assert script.apply_plan(plan) == [tmp_path / "new" / "hosts.toml"]
+        assert unchanged.stat().st_ino == inode
+        assert (tmp_path / "new" / "hosts.toml").read_text() == "new\n"
+        assert script.apply_plan(plan) == []
+
+    def test_write_atomic_keeps_mode_and_leaves_no_temp_file(self, script, tmp_path):
+        target = tmp_path / "config.toml"
+        target.write_text("old")
+        target.chmod(0o600)
+
+        script.write_atomic(target, b"new")
+
+        assert target.read_text() == "new"
+        assert target.stat().st_mode & 0o777 == 0o600
+        assert [p.name for p in tmp_path.iterdir()] == ["config.toml"]
+
+    def test_dry_run_writes_nothing(self, script, gke_133, caplog):
+        before = gke_133.read_text()
+
+        with patch.object(script, "restart_containerd") as mock_restart, caplog.at_level("INFO"):
+            script.inject_config_path(containerd_version=2, dry_run=True)
+
+        assert gke_133.read_text() == before
+        assert not (gke_133.parent / "certs.d" / "docker.io").exists()
+        mock_restart.assert_not_called()
+        assert "[dry run] Would write" in caplog.text
+        assert 'config_path = "/etc/containerd/certs.d"' in caplog.text
+
+    def test_second_inject_plans_nothing(self, script, gke_133):
+        with patch.object(script, "restart_containerd") as mock_restart:
+            script.inject_config_path(containerd_version=2)
+            script.inject_config_path(containerd_version=2)
+
+        mock_restart.assert_called_once()
+        assert script.plan_config_path_injection(2) == []
+
+    def test_reconcile_plan_removes_stale_pems_and_dry_run_reports_it(self, script, containerd_env, caplog):
+        _wire_certs_dir(script, containerd_env["certs_dir"])
+        script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
+        script.REGISTRY_HOST = "registry.example.com"
+        stale = containerd_env["certs_dir"] / "dropped-ca.pem"
+        stale.write_text("-----BEGIN CERTIFICATE-----\nDROPPED\n-----END CERTIFICATE-----\n")
+
+        plan = script.plan_reconcile(2)
+
+        assert script.PlannedFile(stale, None, "its CA is no longer mounted") in plan
+        with caplog.at_level("INFO"):
+            assert stale in script.apply_plan(plan, dry_run=True)
+        assert stale.exists()
+        assert f"[dry run] Would remove {stale}" in caplog.text
+
+        assert stale in script.apply_plan(plan)
+        assert not stale.exists()
+        assert script.plan_reconcile(2)[-1].path.name == "hosts.toml"
+        assert script.apply_plan(script.plan_reconcile(2)) == []
+
+
+class TestPlanCustomerConfigToml:
     """Tests for the containerd 1.x operator-supplied-blob strategy.
 
     1.x no longer generates registry-trust TOML itself. It appends whatever the
@@ -782,16 +957,23 @@ class TestWriteCustomerConfigToml:
         shutil.copy2(DATA_FILES_DIR / "gke_1_32_containerd_1x_config.toml", config_toml_bak)
         script.CONFIG_TOML = config_toml
         script.CONFIG_TOML_BAK = config_toml_bak
+        script.CONTAINERD_CONFIG_TOML_FILE = containerd_env["tmp_path"] / "containerd-config-toml"
         return config_toml, config_toml_bak
 
+    @staticmethod
+    def apply_blob(script, blob: str) -> list[Path]:
+        """Mount blob as the operator's containerdConfigToml and apply the planned config.toml."""
+        script.CONTAINERD_CONFIG_TOML_FILE.write_text(blob)
+        return script.apply_plan([script.plan_customer_config_toml()])
+
     def test_appends_blob_and_parses_cleanly(self, script, gke_132_config):
         """Happy path: the blob is appended and the combined file is valid TOML
         with the expected ca_file under the expected key path."""
         config_toml, _ = gke_132_config
 
-        changed = script.write_customer_config_toml(self._BLOB)
+        changed = self.apply_blob(script, self._BLOB)
 
-        assert changed is True
+        assert changed == [config_toml]
         import tomllib as _tomllib
 
         parsed = _tomllib.loads(config_toml.read_text())
@@ -808,7 +990,7 @@ class TestWriteCustomerConfigToml:
         """On 1.x the operator is expected to set containerdConfigToml. Running
         with an empty blob must fail loudly rather than silently doing nothing."""
         with pytest.raises(RuntimeError, match=r"required on containerd 1\.x"):
-            script.write_customer_config_toml("")
+            self.apply_blob(script, "")
 
         combined = " ".join(r.getMessage() for r in caplog.records)
         assert "containerdConfigToml" in combined
@@ -821,27 +1003,27 @@ class TestWriteCustomerConfigToml:
         original = config_toml.read_text()
 
         with pytest.raises(RuntimeError, match="invalid TOML"):
-            script.write_customer_config_toml("this is [[[not valid toml")
+            self.apply_blob(script, "this is [[[not valid toml")
 
         assert config_toml.read_text() == original
 
     def test_idempotent_on_second_call(self, script):
         """Same blob twice → second call reports no change, so caller skips
         the containerd restart."""
-        first = script.write_customer_config_toml(self._BLOB)
-        second = script.write_customer_config_toml(self._BLOB)
+        first = self.apply_blob(script, self._BLOB)
+        second = self.apply_blob(script, self._BLOB)
 
-        assert first is True
-        assert second is False
+        assert first == [script.CONFIG_TOML]
+        assert second == []
 
     def test_changed_blob_triggers_rewrite(self, script):
         """Different blob value → reports change (caller will restart)."""
         other_blob = self._BLOB.replace("my-ca.pem", "rotated-ca.pem")
 
-        script.write_customer_config_toml(self._BLOB)
-        changed = script.write_customer_config_toml(other_blob)
+        self.apply_blob(script, self._BLOB)
+        changed = self.apply_blob(script, other_blob)
 
-        assert changed is True
+        assert changed == [script.CONFIG_TOML]
 
 
 class TestSourcePemChecksum:
@@ -878,6 +1060,284 @@ class TestSourcePemChecksum:
         after = script.source_pem_checksum()
         assert before != after
 
+    def test_unchanged_metadata_skips_hashing(self, script, containerd_env):
+        script.PRIVATE_CA_CERTS_DIR = containerd_env["private_certs_dir"]
+        with patch.object(script, "checksum_of_files", wraps=script.checksum_of_files) as mock_checksum:
+            first = script.source_pem_checksum()
+            for _ in range(3):
+                assert script.source_pem_checksum() == first
+        mock_checksum.assert_called_once()
+        assert script.source_check_counts == {"skipped": 3, "hashed": 1}
+
+    def test_kubelet_swap_changes_fingerprint(self, script, tmp_path):
+        """A rotation is caught by the `..data` target changing, even if the new
+        PEM matches the old one in size."""
+        root = tmp_path / "private-ca-certs"
+        _kubelet_secret_dir(root, "private-ca-cert-foo", "AAAA", "2024_01_01")
+        script.PRIVATE_CA_CERTS_DIR = root
+        before = script.source_pem_checksum()
+        assert ("private-ca-cert-foo", "..data", "..2024_01_01") in script.source_pem_fingerprint()
+
+        _kubelet_secret_dir(root, "private-ca-cert-foo", "BBBB", "2024_02_01")
+        assert ("private-ca-cert-foo", "..data", "..2024_02_01") in script.source_pem_fingerprint()
+
+        assert script.source_pem_checksum() != before
+        assert script.source_check_counts["hashed"] == 2
+
+    def test_kubelet_layout_reads_only_the_projected_pem(self, script, tmp_path):
+        """The `..data` and timestamped directories are not counted as PEMs of their own."""
+        root = tmp_path / "private-ca-certs"
+        _kubelet_secret_dir(root, "private-ca-cert-foo", "AAAA", "2024_01_01")
+        script.PRIVATE_CA_CERTS_DIR = root
+
+        pem_entries = [entry for entry in script.source_pem_fingerprint() if entry[1] != "..data"]
+
+        assert [Path(entry[0]).relative_to(root) for entry in pem_entries] == [Path("private-ca-cert-foo/private-ca-cert-foo.pem")]
+
+
+def _kubelet_secret_dir(root: Path, secret_name: str, cert: str, generation: str) -> Path:
+    """Update a CA secret under root the way kubelet's atomic writer does, in
+    the layout the chart's DaemonSet mounts (the whole secret at
+    /private-ca-certs/<secret>, with cert.pem projected to <secret>.pem; see
+    test_containerd_privateca_secrets_mounted_without_subpath): the PEM is
+    written into a new timestamped directory, a `..data_tmp` symlink to it is
+    renamed over `..data`, and <secret>.pem is a symlink through `..data`.
+    Returns the secret directory."""
+    secret_dir = root / secret_name
+    pem_name = f"{secret_name}.pem"
+    secret_dir.mkdir(parents=True, exist_ok=True)
+    payload = secret_dir / f"..{generation}"
+    payload.mkdir()
+    (payload / pem_name).write_text(cert)
+    old_payload = (secret_dir / "..data").resolve() if (secret_dir / "..data").is_symlink() else None
+    (secret_dir / "..data_tmp").symlink_to(payload.name)
+    (secret_dir / "..data_tmp").rename(secret_dir / "..data")
+    if not (secret_dir / pem_name).is_symlink():
+        (secret_dir / pem_name).symlink_to(f"..data/{pem_name}")
+    if old_payload:
+        shutil.rmtree(old_payload)
+    return secret_dir
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+class TestInotifyWatcher:
+    """Tests for the inotify watcher that replaces the 1s poll."""
+
+    def test_wakes_on_kubelet_secret_swap(self, script, tmp_path):
+        root = tmp_path / "private-ca-certs"
+        secret_dir = _kubelet_secret_dir(root, "private-ca-cert-foo", "FIRST", "2024_01_01")
+        watcher = script.InotifyWatcher(root)
+        try:
+            assert watcher.wait(0.05) is False
+
+            _kubelet_secret_dir(root, "private-ca-cert-foo", "ROTATED", "2024_02_01")
+            assert watcher.wait(5) is True
+            assert (secret_dir / "private-ca-cert-foo.pem").read_text() == "ROTATED"
+            # The whole swap was coalesced into one wake-up
+            assert watcher.wait(0.05) is False
+        finally:
+            watcher.close()
+
+    def test_wakes_on_new_secret_dir_and_its_files(self, script, tmp_path):
+        root = tmp_path / "private-ca-certs"
+        root.mkdir()
+        watcher = script.InotifyWatcher(root)
+        try:
+            (root / "second-ca").mkdir()
+            assert watcher.wait(5) is True
+
+            (root / "second-ca" / "second-ca.pem").write_text("NEW")
+            assert watcher.wait(5) is True
+        finally:
+            watcher.close()
+
+    def test_poll_mode_has_no_watcher(self, script):
+        script.WATCH_MODE = "poll"
+        assert script._make_watcher() is None
+
+
+class TestMetrics:
+    """Tests for the optional Prometheus /metrics endpoint."""
+
+    def test_render_counters_and_histogram(self, script):
+        script.metrics.inc("hosts_toml_writes_total")
+        script.metrics.inc("errors_total", stage="reconcile")
+        script.metrics.observe_duration(0.2)
+        text = script.metrics.render()
+        assert "containerd_ca_updater_hosts_toml_writes_total 1\n" in text
+        assert 'containerd_ca_updater_errors_total{stage="reconcile"} 1\n' in text
+        assert 'containerd_ca_updater_reconcile_duration_seconds_bucket{le="0.1"} 0\n' in text
+        assert 'containerd_ca_updater_reconcile_duration_seconds_bucket{le="0.25"} 1\n' in text
+        assert "containerd_ca_updater_reconcile_duration_seconds_count 1\n" in text
+
+    def test_serves_metrics_over_http(self, script):
+        server = script.start_metrics_server(0)
+        try:
+            script.metrics.inc("containerd_restarts_total")
+            url = f"http://127.0.0.1:{server.server_port}"
+            response = requests.get(f"{url}/metrics", timeout=5)
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "containerd_ca_updater_containerd_restarts_total 1" in response.text
+            assert requests.get(f"{url}/other", timeout=5).status_code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class FakeKubeApiHandler(FakeHandler):
+    """Lease objects of one namespace, with create conflicts and resourceVersion checks like the real API."""
+
+    def do_POST(self):
+        lease = self.read_json()
+        name = lease["metadata"]["name"]
+        with self.server.lock:
+            if name in self.server.leases:
+                self.send_json(409, {"reason": "AlreadyExists"})
+                return
+            lease["metadata"]["resourceVersion"] = "1"
+            self.server.leases[name] = lease
+        self.send_json(201, lease)
+
+    def do_GET(self):
+        with self.server.lock:
+            lease = self.server.leases.get(self.path.rsplit("/", 1)[1])
+        if lease:
+            self.send_json(200, lease)
+        else:
+            self.send_json(404, {"reason": "NotFound"})
+
+    def do_PUT(self):
+        lease = self.read_json()
+        name = self.path.rsplit("/", 1)[1]
+        with self.server.lock:
+            current = self.server.leases[name]
+            if lease["metadata"]["resourceVersion"] != current["metadata"]["resourceVersion"]:
+                self.send_json(409, {"reason": "Conflict"})
+                return
+            lease["metadata"]["resourceVersion"] = str(int(current["metadata"]["resourceVersion"]) + 1)
+            self.server.leases[name] = lease
+        self.send_json(200, lease)
+
+
+@pytest.fixture
+def fake_kube_api():
+    with serve(FakeKubeApiHandler, leases={}) as server:
+        yield server
+
+
+class FakeSystemctl:
+    """Stands in for subprocess.run of `nsenter ... systemctl`: containerd stays
+    inactive for `inactive_polls` is-active checks after each restart."""
+
+    def __init__(self, inactive_polls=2):
+        self.inactive_polls = inactive_polls
+        self.remaining = 0
+        self.commands = []
+
+    def __call__(self, cmd, **kwargs):
+        systemctl_args = cmd[cmd.index("systemctl") + 1 :]
+        self.commands.append(systemctl_args[0])
+        if systemctl_args[0] == "restart":
+            self.remaining = self.inactive_polls
+        elif self.remaining:
+            self.remaining -= 1
+            return _completed_process("", returncode=3)
+        return _completed_process("")
+
+
+class TestRestartCoordination:
+    """Tests for spreading containerd restarts across nodes."""
+
+    def _lease(self, script, server, holder, slots=1):
+        client = script.KubeClient(f"http://127.0.0.1:{server.server_port}")
+        return script.RestartLease(client, "astronomer", "containerd-restart", slots, holder, 180)
+
+    def test_node_jitter_is_stable_and_spread(self, script):
+        delays = [script.node_jitter(f"gke-pool-{i}", 300) for i in range(200)]
+        assert delays[0] == script.node_jitter("gke-pool-0", 300)
+        assert all(0 <= d < 300 for d in delays)
+        assert min(delays) < 30
+        assert max(delays) > 270
+        assert script.node_jitter("gke-pool-0", 0) == 0
+
+    def test_lease_limits_concurrent_holders(self, script, fake_kube_api):
+        node_a = self._lease(script, fake_kube_api, "node-a", slots=2)
+        node_b = self._lease(script, fake_kube_api, "node-b", slots=2)
+        node_c = self._lease(script, fake_kube_api, "node-c", slots=2)
+
+        assert node_a.try_acquire() == "containerd-restart-0"
+        assert node_b.try_acquire() == "containerd-restart-1"
+        assert node_c.try_acquire() is None
+
+        node_a.release("containerd-restart-0")
+        assert node_c.try_acquire() == "containerd-restart-0"
+        assert fake_kube_api.leases["containerd-restart-0"]["spec"]["holderIdentity"] == "node-c"
+
+    def test_expired_lease_is_taken_over(self, script, fake_kube_api):
+        """A node that died while holding the slot doesn't block the others forever."""
+        assert self._lease(script, fake_kube_api, "dead-node").try_acquire()
+        fake_kube_api.leases["containerd-restart-0"]["spec"]["renewTime"] = script._micro_time(time.time() - 600)
+
+        assert self._lease(script, fake_kube_api, "node-b").try_acquire() == "containerd-restart-0"
+
+    def test_release_leaves_a_taken_over_lease_alone(self, script, fake_kube_api):
+        node_a = self._lease(script, fake_kube_api, "node-a")
+        node_a.try_acquire()
+        fake_kube_api.leases["containerd-restart-0"]["spec"]["holderIdentity"] = "node-b"
+
+        node_a.release("containerd-restart-0")
+
+        assert fake_kube_api.leases["containerd-restart-0"]["spec"]["holderIdentity"] == "node-b"
+
+    def test_lease_mode_restarts_and_waits_before_releasing(self, script, fake_kube_api):
+        script.RESTART_ROLLOUT = "lease"
+        script.NODE_NAME = "node-a"
+        client = script.KubeClient(f"http://127.0.0.1:{fake_kube_api.server_port}")
+        systemctl = FakeSystemctl(inactive_polls=2)
+        holders_seen_by_systemctl = []
+
+        def run(cmd, **kwargs):
+            lease = fake_kube_api.leases["containerd-ca-update-restart-0"]
+            holders_seen_by_systemctl.append(lease["spec"]["holderIdentity"])
+            return systemctl(cmd, **kwargs)
+
+        with (
+            patch.object(script.KubeClient, "in_cluster", return_value=client),
+            patch.object(script.subprocess, "run", side_effect=run),
+            patch.object(script.time, "sleep"),
+        ):
+            script.restart_containerd()
+
+        assert systemctl.commands == ["restart", "is-active", "is-active", "is-active"]
+        assert set(holders_seen_by_systemctl) == {"node-a"}
+        assert fake_kube_api.leases["containerd-ca-update-restart-0"]["spec"]["holderIdentity"] is None
+        text = script.metrics.render()
+        assert "containerd_ca_updater_containerd_restarts_total 1\n" in text
+        assert "containerd_ca_updater_restart_recovery_seconds " in text
+
+    def test_lease_mode_falls_back_to_jitter_outside_a_cluster(self, script, monkeypatch):
+        monkeypatch.delenv("KUBERNETES_SERVICE_HOST", raising=False)
+        script.RESTART_ROLLOUT = "lease"
+        script.NODE_NAME = "node-a"
+        systemctl = FakeSystemctl(inactive_polls=0)
+
+        with patch.object(script.subprocess, "run", side_effect=systemctl), patch.object(script.time, "sleep") as sleep:
+            script.restart_containerd()
+
+        sleep.assert_called_once_with(script.node_jitter("node-a", script.RESTART_JITTER_SECONDS))
+        assert systemctl.commands == ["restart", "is-active"]
+
+    def test_gives_up_when_containerd_does_not_come_back(self, script):
+        systemctl = FakeSystemctl(inactive_polls=10**6)
+
+        with (
+            patch.object(script.subprocess, "run", side_effect=systemctl),
+            patch.object(script.time, "sleep"),
+            patch.object(script.time, "monotonic", side_effect=itertools.count(step=50)),
+        ):
+            with pytest.raises(RuntimeError, match="not active"):
+                script.restart_containerd()
+
 
 class _StopLoop(Exception):
     """Sentinel used by end-to-end tests to break out of the main poll loop."""
@@ -913,6 +1373,9 @@ class TestMainEndToEnd:
         # value." Tests that exercise the 1.x path override by writing to this
         # file.
         script.CONTAINERD_CONFIG_TOML_FILE = containerd_env["tmp_path"] / "containerd-config-toml"
+        # Poll mode waits between ticks with time.sleep, which _run_main_once
+        # uses to stop the loop. The inotify watcher is tested on its own.
+        script.WATCH_MODE = "poll"
 
         return {
             "config_toml": config_toml,
@@ -941,6 +1404,28 @@ class TestMainEndToEnd:
                 script.main()
         return mock_restart
 
+    def test_dry_run_logs_plan_without_writing(self, script, wired, caplog):
+        """DRY_RUN makes main() log what startup and one reconcile would write
+        and return, leaving config.toml, certs.d and containerd alone."""
+        shutil.copy2(DATA_FILES_DIR / "gke_1_33_containerd_2x_config.toml", wired["config_toml"])
+        before = wired["config_toml"].read_text()
+        script.DRY_RUN = True
+
+        with (
+            patch.object(script.shutil, "which", return_value="/usr/bin/nsenter"),
+            patch.object(script, "restart_containerd") as mock_restart,
+            patch("subprocess.run", return_value=_completed_process("containerd containerd.io 2.0.5 abcdef")),
+            caplog.at_level("INFO"),
+        ):
+            script.main()
+
+        assert wired["config_toml"].read_text() == before
+        assert not wired["config_toml_bak"].exists()
+        assert list(wired["certs_dir"].iterdir()) == []
+        mock_restart.assert_not_called()
+        assert "my-ca.pem" in caplog.text
+        assert "4 file(s) would change; containerd would be restarted" in caplog.text
+
     def test_gke_132_containerd_1x_applies_customer_config_toml(self, script, wired):
         """On GKE 1.32 the script appends the operator-supplied TOML blob
         (from `global.privateCaCertsAddToHost.containerdConfigToml`) to
@@ -1004,6 +1489,38 @@ class TestMainEndToEnd:
                 script.main()
             assert excinfo.value.code == 1
 
+    def test_gke_132_containerd_1x_retries_restart_that_does_not_recover(self, script, wired):
+        """If containerd isn't active again in time after the restart, the loop
+        logs it, counts it, and restarts again on the retry instead of crashing
+        the pod — config.toml is already written by then, so the retry must not
+        wait for it to change again."""
+        shutil.copy2(DATA_FILES_DIR / "gke_1_32_containerd_1x_config.toml", wired["config_toml"])
+        wired["containerd_config_toml_file"].write_text(
+            '[plugins."io.containerd.grpc.v1.cri".registry.configs."registry.example.com".tls]\n'
+            '  ca_file = "/etc/containerd/certs.d/registry.example.com/my-ca.pem"\n'
+        )
+        run = MagicMock(return_value=_completed_process("containerd github.com/containerd/containerd 1.7.29 abcdef"))
+        not_recovered = RuntimeError("containerd not active 120s after restart")
+
+        with (
+            patch.object(script.shutil, "which", return_value="/usr/bin/nsenter"),
+            patch("subprocess.run", run),
+            patch.object(script, "wait_for_containerd", side_effect=[not_recovered, 1.5]) as wait,
+            # The first sleep is the error back-off, the second the poll interval
+            patch.object(script.time, "sleep", side_effect=[None, _StopLoop]) as sleep,
+        ):
+            with pytest.raises(_StopLoop):
+                script.main()
+
+        assert wait.call_count == 2
+        restarts = [c for c in run.call_args_list if c.args[0][-2:] == ["restart", "containerd"]]
+        assert len(restarts) == 2
+        assert sleep.call_args_list[0].args == (script.ERROR_RETRY_SECONDS,)
+        text = script.metrics.render()
+        assert 'containerd_ca_updater_errors_total{stage="restart"} 1\n' in text
+        assert "containerd_ca_updater_reconciles_total 2\n" in text
+        assert "containerd_ca_updater_last_success_timestamp_seconds " in text
+
     def test_gke_133_containerd_2x_injects_v2_namespace_and_writes_hosts_toml(self, script, wired):
         """Parallel assertion for containerd 2.x — different plugin namespace,
         everything else the same. Proves the two versions really do share a
@@ -1027,6 +1544,12 @@ class TestMainEndToEnd:
         assert "my-ca.pem" in hosts_toml
         assert (wired["certs_dir"] / "my-ca.pem").is_file()
 
+        text = script.metrics.render()
+        assert "containerd_ca_updater_reconciles_total 1\n" in text
+        # The registry's hosts.toml, plus the docker.io mirror carried over from config.toml
+        assert "containerd_ca_updater_hosts_toml_writes_total 2\n" in text
+        assert "containerd_ca_updater_last_success_timestamp_seconds " in text
+
     def test_config_path_already_set_does_not_restart(self, script, wired):
         """If config_path is already configured, startup must not restart
         containerd — steady-state cert rotation never restarts."""
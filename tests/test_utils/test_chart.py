@@ -0,0 +1,66 @@
+"""Tests for tests/utils/chart.py that don't need helm."""
+
+import pickle
+
+import pytest
+
+from tests.utils import chart, render_cache
+
+
+@pytest.fixture
+def cached_chart(tmp_path, monkeypatch):
+    """A tiny chart whose renders are already in a render cache under tmp_path.
+
+    The cache directory is passed through the environment too, so spawned processes use it.
+    """
+    chart_dir = tmp_path / "chart"
+    chart_dir.mkdir()
+    (chart_dir / "Chart.yaml").write_text("apiVersion: v2\nname: tiny\nversion: 0.1.0\n")
+    cache_dir = tmp_path / "render-cache"
+    monkeypatch.setenv("RENDER_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(render_cache, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(render_cache, "ENABLED", True)
+
+    def add_render(name: str) -> dict:
+        key = render_cache.cache_key(
+            chart_dir=str(chart_dir),
+            name=name,
+            values=chart.yaml.dump({}, Dumper=chart.YamlDumper),
+            show_only=[],
+            kube_version=chart.default_version,
+            baseDomain="example.com",
+            namespace=None,
+            validate_objects=False,
+            kinds=None,
+        )
+        docs = [{"kind": "ConfigMap", "metadata": {"name": name}}]
+        render_cache.write_atomic(render_cache._entry_path(key), pickle.dumps(docs))
+        return {"name": name, "chart_dir": str(chart_dir), "validate_objects": False}
+
+    return add_render
+
+
+def test_render_charts_batch_uses_spawned_workers(cached_chart):
+    """Renders come back in request order from processes that did not fork this one's state."""
+    requests = [cached_chart(f"release-{i}") for i in range(3)]
+
+    results = chart.render_charts_batch(requests, max_workers=2)
+
+    assert [docs[0]["metadata"]["name"] for docs in results] == ["release-0", "release-1", "release-2"]
+    assert chart.session_stats["render_cache"]["hits"] >= 3
+
+
+def test_render_charts_batch_pool_is_spawned(cached_chart, monkeypatch):
+    pools = []
+
+    class RecordingPool(chart.ProcessPoolExecutor):
+        def __init__(self, **kwargs):
+            pools.append(kwargs)
+            super().__init__(**kwargs)
+
+    monkeypatch.setattr(chart, "ProcessPoolExecutor", RecordingPool)
+
+    chart.render_charts_batch([cached_chart("a"), cached_chart("b")], max_workers=8)
+
+    assert pools[0]["max_workers"] == 2
+    assert pools[0]["mp_context"].get_start_method() == "spawn"
@@ -0,0 +1,50 @@
+"""Tests for tests/utils/registry_probe.py against a local fake registry."""
+
+import pytest
+
+from tests.utils import registry_probe
+from tests.utils.fake_registry import run_fake_registry
+
+
+@pytest.fixture
+def fake_registry():
+    with run_fake_registry() as server:
+        yield server
+
+
+def test_probe_all_dedupes_and_reuses_tokens(fake_registry):
+    endpoint = f"http://127.0.0.1:{fake_registry.server_port}"
+    prober = registry_probe.RegistryProber(endpoints={"quay.io": endpoint}, max_workers=4)
+    images = [
+        "quay.io/astronomer/ap-commander:1.0.0",
+        "quay.io/astronomer/ap-commander:1.0.1",
+        "quay.io/astronomer/ap-commander:1.0.0",
+        "quay.io/astronomer/ap-commander:9.9.9",
+    ]
+
+    results = prober.probe_all(images)
+    prober.close()
+
+    assert list(results) == images[:2] + images[3:]
+    assert [result.ok for result in results.values()] == [True, True, False]
+    assert results[images[0]].digest.startswith("sha256:")
+    assert results[images[3]].status == 404
+    assert fake_registry.token_requests == ["repository:astronomer/ap-commander:pull"]
+    assert {method for method, _ in fake_registry.authorized_requests} == {"HEAD"}
+
+
+def test_unreachable_registry_is_an_error_result():
+    prober = registry_probe.RegistryProber(endpoints={"quay.io": "http://127.0.0.1:9"}, retries=0, timeout=1)
+
+    result = prober.probe("quay.io/astronomer/ap-commander:1.0.0")
+    prober.close()
+
+    assert not result.ok
+    assert result.error.startswith("ConnectionError")
+
+
+def test_parse_endpoints_expands_docker_io():
+    assert registry_probe.parse_endpoints(" docker.io=http://127.0.0.1:5001/, quay.io=http://127.0.0.1:5000") == {
+        "registry-1.docker.io": "http://127.0.0.1:5001",
+        "quay.io": "http://127.0.0.1:5000",
+    }
@@ -0,0 +1,94 @@
+"""Tests for the on-disk render cache in tests/utils/render_cache.py."""
+
+import pytest
+
+from tests.utils import render_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(render_cache, "CACHE_DIR", tmp_path / "render-cache")
+    return tmp_path / "render-cache"
+
+
+def test_get_or_render_renders_once_and_leaves_no_lock_file(cache_dir):
+    renders = []
+
+    def render():
+        renders.append(1)
+        return [{"kind": "ConfigMap"}]
+
+    assert render_cache.get_or_render("ab" * 32, render) == [{"kind": "ConfigMap"}]
+    assert render_cache.get_or_render("ab" * 32, render) == [{"kind": "ConfigMap"}]
+
+    assert len(renders) == 1
+    assert [path.name for path in cache_dir.rglob("*")] == ["ab", f"{'ab' * 32}.pickle"]
+
+
+def test_failed_render_is_not_cached_and_leaves_no_lock_file(cache_dir):
+    def render():
+        raise RuntimeError("helm failed")
+
+    with pytest.raises(RuntimeError):
+        render_cache.get_or_render("cd" * 32, render)
+
+    assert list(cache_dir.rglob("*.lock")) == []
+    assert render_cache.get_or_render("cd" * 32, lambda: ["rendered"]) == ["rendered"]
+
+
+class TestCacheKey:
+    """The key changes whenever the render it names could change."""
+
+    @pytest.fixture
+    def key_inputs(self, tmp_path, monkeypatch):
+        chart_dir = tmp_path / "chart"
+        (chart_dir / "templates").mkdir(parents=True)
+        (chart_dir / "Chart.yaml").write_text("apiVersion: v2\nname: tiny\nversion: 0.1.0\n")
+        (chart_dir / "templates" / "cm.yaml").write_text("kind: ConfigMap\n")
+        schema_dir = tmp_path / "k8s_schema" / "v1.33.0-standalone"
+        schema_dir.mkdir(parents=True)
+        (schema_dir / "configmap-v1.json").write_text("{}")
+        monkeypatch.setattr(render_cache, "K8S_SCHEMA_DIR", tmp_path / "k8s_schema")
+        monkeypatch.setattr(render_cache, "helm_version", lambda: "v3.18.0")
+        render_cache.chart_tree_fingerprint.cache_clear()
+        render_cache.schema_fingerprint.cache_clear()
+        yield {"chart_dir": chart_dir, "schema_dir": schema_dir}
+        render_cache.chart_tree_fingerprint.cache_clear()
+        render_cache.schema_fingerprint.cache_clear()
+
+    @staticmethod
+    def key(chart_dir, **overrides):
+        render_args = {"name": "release-name", "values": "{}\n", "kube_version": "1.33.0", "validate_objects": True}
+        return render_cache.cache_key(chart_dir=str(chart_dir), **{**render_args, **overrides})
+
+    def test_key_is_stable(self, key_inputs):
+        assert self.key(key_inputs["chart_dir"]) == self.key(key_inputs["chart_dir"])
+
+    def test_chart_change_invalidates(self, key_inputs):
+        before = self.key(key_inputs["chart_dir"])
+        (key_inputs["chart_dir"] / "templates" / "cm.yaml").write_text("kind: Secret\n")
+        render_cache.chart_tree_fingerprint.cache_clear()
+
+        assert self.key(key_inputs["chart_dir"]) != before
+
+    @pytest.mark.parametrize(
+        "override", [{"name": "other"}, {"values": "a: 1\n"}, {"kube_version": "1.32.0"}, {"validate_objects": False}]
+    )
+    def test_argument_change_invalidates(self, key_inputs, override):
+        assert self.key(key_inputs["chart_dir"], **override) != self.key(key_inputs["chart_dir"])
+
+    def test_schema_change_invalidates_validated_renders_only(self, key_inputs):
+        validated = self.key(key_inputs["chart_dir"])
+        unvalidated = self.key(key_inputs["chart_dir"], validate_objects=False)
+        (key_inputs["schema_dir"] / "configmap-v1.json").write_text('{"type": "object"}')
+        render_cache.schema_fingerprint.cache_clear()
+
+        assert self.key(key_inputs["chart_dir"]) != validated
+        assert self.key(key_inputs["chart_dir"], validate_objects=False) == unvalidated
+
+    def test_added_schema_invalidates(self, key_inputs):
+        before = self.key(key_inputs["chart_dir"])
+        (key_inputs["schema_dir"] / "secret-v1.json").write_text("{}")
+        render_cache.schema_fingerprint.cache_clear()
+
+        assert self.key(key_inputs["chart_dir"]) != before
@@ -0,0 +1,126 @@
+"""Tests for the chart_params marker in tests/utils/render_registry.py."""
+
+import os
+
+import pytest
+
+from tests import git_root_dir
+from tests.utils import render_registry
+
+pytest_plugins = ["pytester"]
+
+CONFTEST = """
+from tests.utils import render_registry
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", f"{render_registry.MARKER}(argnames, factory): test")
+
+
+def pytest_generate_tests(metafunc):
+    render_registry.parametrize(metafunc)
+"""
+
+TEST_MODULE = """
+from pathlib import Path
+
+import pytest
+
+CALLS = []
+
+
+def component_params():
+    CALLS.append(1)
+    with Path("factory-calls").open("a") as calls:
+        calls.write("component_params\\n")
+    return {"houston-api": "houston", "houston-worker": "houston", "nginx": "nginx"}
+
+
+class TestComponents:
+    @pytest.mark.chart_params("component", component_params)
+    def test_component(self, component):
+        assert component in ("houston", "nginx")
+
+    @pytest.mark.chart_params("component", component_params)
+    def test_factory_ran_once(self, component):
+        assert len(CALLS) == 1
+
+
+def test_unrelated():
+    pass
+"""
+
+
+@pytest.fixture
+def chart_params_tests(pytester):
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(test_components=TEST_MODULE)
+    return pytester
+
+
+@pytest.mark.parametrize(
+    ("keyword", "passed", "deselected"),
+    [
+        ("", 7, 0),
+        ("TestComponents and houston", 4, 3),
+        ("TestComponents and nginx", 2, 5),
+        ("test_factory_ran_once and not worker", 2, 3),
+        ("not houston", 3, 4),
+    ],
+)
+def test_keyword_selects_parameter_ids_like_parametrize(chart_params_tests, keyword, passed, deselected):
+    result = chart_params_tests.runpytest_inprocess("-k", keyword, "-p", "no:cacheprovider")
+
+    result.assert_outcomes(passed=passed, deselected=deselected)
+    assert (chart_params_tests.path / "factory-calls").read_text() == "component_params\n"
+
+
+@pytest.mark.parametrize(
+    ("args", "passed", "deselected"),
+    [
+        (["-k", "test_unrelated"], 1, 2),
+        (["-k", "houston"], 0, 3),
+        (["-k", "worker or test_unrelated"], 1, 2),
+    ],
+)
+def test_keyword_that_cannot_select_the_test_by_name_skips_the_factory(chart_params_tests, args, passed, deselected):
+    result = chart_params_tests.runpytest_inprocess(*args, "-p", "no:cacheprovider")
+
+    result.assert_outcomes(passed=passed, deselected=deselected)
+    assert not (chart_params_tests.path / "factory-calls").exists()
+
+
+@pytest.mark.parametrize("keyword", ["", "test_unrelated", "TestComponents"])
+def test_collect_only_skips_the_factory(chart_params_tests, keyword):
+    result = chart_params_tests.runpytest_inprocess("--collect-only", "-q", "-k", keyword, "-p", "no:cacheprovider")
+
+    assert result.ret == pytest.ExitCode.OK
+    assert not (chart_params_tests.path / "factory-calls").exists()
+
+
+def test_collecting_chart_tests_for_an_unrelated_keyword_runs_no_helm(pytester, monkeypatch):
+    """Every chart render in tests/chart_tests is deferred, so a collection that selects none of them never runs helm."""
+    helm_calls = pytester.path / "helm-calls"
+    fake_helm = pytester.path / "bin" / "helm"
+    fake_helm.parent.mkdir()
+    fake_helm.write_text(f'#!/bin/sh\necho "$@" >> {helm_calls}\nexit 1\n')
+    fake_helm.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{fake_helm.parent}:{os.environ['PATH']}")
+    monkeypatch.setenv("RENDER_CACHE", "false")
+
+    for args in (["--collect-only", "-k", "test_no_such_chart_test"], ["--collect-only"]):
+        result = pytester.runpytest_subprocess(git_root_dir / "tests" / "chart_tests", *args, "-q", "-p", "no:cacheprovider")
+
+        assert result.ret in (pytest.ExitCode.OK, pytest.ExitCode.NO_TESTS_COLLECTED), result.stdout.str()
+        assert not helm_calls.exists(), helm_calls.read_text()
+
+
+def test_get_params_accepts_dicts_and_lists():
+    def as_dict():
+        return {"a": 1, 2: "b"}
+
+    def as_list():
+        return [1, pytest.param(2, id="two")]
+
+    assert [(param.values, param.id) for param in render_registry.get_params(as_dict)] == [((1,), "a"), (("b",), "2")]
+    assert render_registry.get_params(as_list) == [1, pytest.param(2, id="two")]
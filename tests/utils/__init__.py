@@ -1,10 +1,11 @@
 import re
+from functools import cache
 from pathlib import Path
 
 import yaml
 
 from tests import git_root_dir
-from tests.utils.chart import render_chart
+from tests.utils.chart import RenderedChart, default_version, render_chart, render_charts_batch
 
 # Kinds that manage pods (and therefore carry pod/container securityContexts).
 pod_managers = ["CronJob", "DaemonSet", "Deployment", "Job", "StatefulSet", "ReplicaSet"]
@@ -129,6 +130,12 @@ def get_all_features():
     return yaml.safe_load((Path(__file__).parent.parent / "enable_all_features.yaml").read_text())
 
 
+@cache
+def get_all_features_chart(kube_version: str = default_version) -> RenderedChart:
+    """Return the chart rendered with enable_all_features.yaml, rendering it once per process and kube_version."""
+    return RenderedChart(render_chart(kube_version=kube_version, values=get_all_features()))
+
+
 def get_chart_version():
     with open("charts/astronomer/Chart.yaml") as chart_file:
         return yaml.safe_load(chart_file)["version"]
@@ -148,6 +155,33 @@ def get_chart_containers(
         kube_version=k8s_version,
         values=chart_values,
     )
+    return get_containers_from_docs(k8s_version, docs, exclude_kinds=exclude_kinds, include_kinds=include_kinds)
+
+
+def get_all_chart_containers(
+    k8s_versions: list[str],
+    chart_values: dict,
+    *,  # force the remaining arguments to be keyword-only
+    exclude_kinds: list[str] | None = None,
+    include_kinds: list[str] | None = None,
+) -> dict:
+    """Return get_chart_containers() for every version in k8s_versions merged into one dict, rendering all versions in parallel."""
+
+    all_docs = render_charts_batch([{"kube_version": k8s_version, "values": chart_values} for k8s_version in k8s_versions])
+    containers = {}
+    for k8s_version, docs in zip(k8s_versions, all_docs, strict=True):
+        containers |= get_containers_from_docs(k8s_version, docs, exclude_kinds=exclude_kinds, include_kinds=include_kinds)
+    return containers
+
+
+def get_containers_from_docs(
+    k8s_version: str,
+    docs: list[dict],
+    *,  # force the remaining arguments to be keyword-only
+    exclude_kinds: list[str] | None = None,
+    include_kinds: list[str] | None = None,
+) -> dict:
+    """Return the containers of already rendered docs in the same form as get_chart_containers()."""
 
     specs = [
         {
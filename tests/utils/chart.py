@@ -15,11 +15,20 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import hashlib
 import json
 import os
+import pickle
+import re
 import shlex
 import subprocess
+import time
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
 from functools import cache
+from multiprocessing import get_context
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 from typing import Any
@@ -27,32 +36,89 @@ from typing import Any
 import jsonschema
 import requests
 import yaml
+from filelock import FileLock
 from kubernetes.client.api_client import ApiClient
 from yamllint import linter
 from yamllint.config import YamlLintConfig
 
 from tests import git_root_dir, supported_k8s_versions
+from tests.utils import render_cache
 
 api_client = ApiClient()
 
 BASE_URL_SPEC = "https://raw.githubusercontent.com/yannh/kubernetes-json-schema/refs/heads/master"
 DEBUG = os.getenv("DEBUG", "").lower() in ["yes", "true", "1"]
+# Maximum number of concurrent renders in render_charts_batch. Every pytest-xdist worker runs its
+# own pool, so by default the CPUs are split between the xdist workers instead of each one
+# starting a pool as large as the machine.
+RENDER_BATCH_WORKERS = int(os.getenv("RENDER_BATCH_WORKERS", "0")) or max(
+    1, (os.cpu_count() or 1) // int(os.getenv("PYTEST_XDIST_WORKER_COUNT", "1"))
+)
 default_version = supported_k8s_versions[-1]
+# Use the libyaml C implementations when pyyaml was built with them, they are many times faster.
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CDumper", yaml.Dumper)
+K8S_SCHEMA_DIR = render_cache.K8S_SCHEMA_DIR
+SCHEMA_INDEX_DIR = render_cache.CACHE_DIR.parent / "schema-index"
+
+# Counters for this process, reported by tests/chart_tests/conftest.py at session end
+session_stats = {
+    "render_cache": render_cache.stats,
+    "validation_count": Counter(),
+    "validation_seconds": Counter(),
+    "validation_skipped": Counter(),
+}
+# Hashes of (kube_version, object) pairs this process has already validated
+_validated_objects: set[str] = set()
+
+# helm separates rendered templates with a "---" line followed by a "# Source: <chart name>/<path>" comment
+_document_separator_re = re.compile(r"^---[ \t]*$", re.MULTILINE)
+_source_re = re.compile(r"# Source: [^/]+/(.+)")
+
+
+class RenderedDocs(list):
+    """The k8s objects of a render, with sources[i] holding the template that produced self[i].
+
+    Sources are relative to the chart directory, in the same form as render_chart's show_only,
+    e.g. "charts/astronomer/templates/houston/api/houston-deployment.yaml".
+    """
 
+    def __init__(self, docs=(), sources=()):
+        super().__init__(docs)
+        self.sources = list(sources)
 
-def get_schema_k8s(api_version, kind, kube_version=default_version):
-    """Return a standalone k8s schema for use in validation."""
+    def index_by_template(self) -> dict[str, list[dict]]:
+        """Return {template source: [docs rendered from it]}."""
+        index = {}
+        for source, doc in zip(self.sources, self, strict=True):
+            index.setdefault(source, []).append(doc)
+        return index
+
+    def from_template(self, *templates: str) -> list[dict]:
+        """Return the docs rendered from the given templates, like render_chart(show_only=templates) would.
+
+        This lets one full render answer many show_only style queries without running helm again.
+        """
+        index = self.index_by_template()
+        return [doc for template in templates for doc in index.get(str(template), [])]
+
+
+def get_schema_path(api_version, kind, kube_version=default_version) -> str:
+    """Return the path of a standalone k8s schema, relative to the schema repository root."""
     api_version = api_version.lower()
     kind = kind.lower()
 
     if "/" in api_version:
         ext, _, api_version = api_version.partition("/")
         ext = ext.split(".")[0]
-        schema_path = f"v{kube_version}-standalone/{kind}-{ext}-{api_version}.json"
-    else:
-        schema_path = f"v{kube_version}-standalone/{kind}-{api_version}.json"
+        return f"v{kube_version}-standalone/{kind}-{ext}-{api_version}.json"
+    return f"v{kube_version}-standalone/{kind}-{api_version}.json"
 
-    local_sp = Path(f"{git_root_dir}/tests/k8s_schema/{schema_path}")
+
+def get_schema_k8s(api_version, kind, kube_version=default_version):
+    """Return a standalone k8s schema for use in validation."""
+    schema_path = get_schema_path(api_version, kind, kube_version=kube_version)
+    local_sp = K8S_SCHEMA_DIR / schema_path
     if not local_sp.exists():
         if not local_sp.parent.is_dir():
             local_sp.parent.mkdir(parents=True)
@@ -63,22 +129,73 @@ def get_schema_k8s(api_version, kind, kube_version=default_version):
     return json.loads(local_sp.read_text())
 
 
+def _build_schema_index(schema_dir: Path) -> dict[str, dict]:
+    """Load and check every schema in schema_dir, keyed by schema path."""
+    index = {}
+    for schema_file in sorted(schema_dir.glob("*.json")):
+        schema = json.loads(schema_file.read_text())
+        jsonschema.Draft7Validator.check_schema(schema)
+        index[f"{schema_dir.name}/{schema_file.name}"] = schema
+    return index
+
+
+@cache
+def get_schema_index(kube_version=default_version) -> dict[str, dict]:
+    """Return every local schema for kube_version, already checked against the Draft7 metaschema.
+
+    Parsing the standalone schemas and checking them against the metaschema takes seconds per kube
+    version, and every xdist worker used to pay that separately. The checked schemas are bundled
+    into one pickle per kube version, keyed by the names, sizes and mtimes of the schema files, so
+    only the first process after a schema change does that work.
+    """
+    schema_dir = K8S_SCHEMA_DIR / f"v{kube_version}-standalone"
+    if not schema_dir.is_dir():
+        return {}
+    fingerprint = hashlib.sha256(
+        json.dumps([(x.name, x.stat().st_size, x.stat().st_mtime_ns) for x in sorted(schema_dir.glob("*.json"))]).encode()
+    ).hexdigest()
+    index_path = SCHEMA_INDEX_DIR / f"{schema_dir.name}-{fingerprint[:16]}.pickle"
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(f"{index_path}.lock"):
+        if index_path.is_file():
+            return pickle.loads(index_path.read_bytes())  # noqa: S301 -- written below
+        index = _build_schema_index(schema_dir)
+        render_cache.write_atomic(index_path, pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+    return index
+
+
 @cache
 def create_validator(api_version, kind, kube_version=default_version):
     """Create a k8s validator for the given inputs."""
-    schema = get_schema_k8s(api_version, kind, kube_version=kube_version)
-    jsonschema.Draft7Validator.check_schema(schema)
+    schema_path = get_schema_path(api_version, kind, kube_version=kube_version)
+    if (schema := get_schema_index(kube_version).get(schema_path)) is None:
+        schema = get_schema_k8s(api_version, kind, kube_version=kube_version)
+        jsonschema.Draft7Validator.check_schema(schema)
     return jsonschema.Draft7Validator(schema)
 
 
 def validate_k8s_object(instance, kube_version=default_version):
-    """Validate the k8s object."""
+    """Validate the k8s object.
+
+    Most objects are identical across renders with different values, so an object that already
+    passed validation for kube_version in this process is not validated again.
+    """
     # These kinds are not present in the kubernetes-json-schema repository, so skip validation
     # for them: CRDs, and the cert-manager custom resources the airflow-operator renders.
-    if instance.get("kind") in ("CustomResourceDefinition", "Certificate", "Issuer"):
+    kind = instance.get("kind")
+    if kind in ("CustomResourceDefinition", "Certificate", "Issuer"):
+        return
+    object_hash = hashlib.sha256(json.dumps([kube_version, instance], sort_keys=True, default=str).encode()).hexdigest()
+    if object_hash in _validated_objects:
+        session_stats["validation_skipped"][kind] += 1
         return
-    validate = create_validator(instance.get("apiVersion"), instance.get("kind"), kube_version=kube_version)
+    validate = create_validator(instance.get("apiVersion"), kind, kube_version=kube_version)
+    start = time.perf_counter()
     validate.validate(instance)
+    session_stats["validation_count"][kind] += 1
+    session_stats["validation_seconds"][kind] += time.perf_counter() - start
+    _validated_objects.add(object_hash)
 
 
 def check_yaml(manifests: str, lines_before: int = 10, lines_after: int = 10):
@@ -132,12 +249,69 @@ def render_chart(
     namespace: str | None = None,
     validate_objects: bool = True,
     lint_yaml: bool = False,
+    kinds: list | None = None,
 ):
-    """Render a helm chart into dictionaries."""
+    """Render a helm chart into dictionaries.
+
+    If kinds is given, only objects of those kinds are returned, and only those are validated.
+
+    Results are served from the on-disk render cache when possible. See tests/utils/render_cache.py.
+    """
     values = values or {}
     chart_dir = chart_dir or str(git_root_dir)
+    if isinstance(show_only, str):
+        show_only = [show_only]
+    content = yaml.dump(values, Dumper=YamlDumper)
+
+    def render():
+        return _render_chart_uncached(
+            name=name,
+            content=content,
+            show_only=show_only,
+            chart_dir=chart_dir,
+            kube_version=kube_version,
+            baseDomain=baseDomain,
+            namespace=namespace,
+            validate_objects=validate_objects,
+            lint_yaml=lint_yaml,
+            kinds=kinds,
+        )
+
+    # lint_yaml needs the raw helm output, so it always renders
+    if not render_cache.ENABLED or lint_yaml:
+        return render()
+
+    cache_key = render_cache.cache_key(
+        chart_dir=chart_dir,
+        name=name,
+        values=content,
+        show_only=[str(x) for x in show_only or []],
+        kube_version=kube_version,
+        baseDomain=baseDomain,
+        namespace=namespace,
+        validate_objects=validate_objects,
+        kinds=kinds,
+    )
+    if DEBUG:
+        print(f"render cache key: {cache_key}")
+    return render_cache.get_or_render(cache_key, render)
+
+
+def _render_chart_uncached(
+    *,
+    name: str,
+    content: str,
+    show_only: list | None,
+    chart_dir: str,
+    kube_version: str,
+    baseDomain: str,
+    namespace: str | None,
+    validate_objects: bool,
+    lint_yaml: bool,
+    kinds: list | None,
+) -> list:
+    """Run helm template with the values yaml in content and return the parsed, validated objects."""
     with NamedTemporaryFile(delete=not DEBUG) as tmp_file:  # export DEBUG=true to keep
-        content = yaml.dump(values)
         tmp_file.write(content.encode())
         tmp_file.flush()
         command = [
@@ -155,8 +329,6 @@ def render_chart(
         if namespace:
             command.extend(["--namespace", namespace])
         if show_only:
-            if isinstance(show_only, str):
-                show_only = [show_only]
             for file in show_only:
                 command.extend(["--show-only", str(file)])
 
@@ -165,12 +337,10 @@ def render_chart(
 
         try:
             manifests = subprocess.check_output(command, stderr=subprocess.PIPE).decode("utf-8")
-            if not manifests:
-                return []
         except subprocess.CalledProcessError as error:
             if DEBUG:
                 print("ERROR: subprocess.CalledProcessError:")
-                print(f"Values file contents:\n{'-' * 21}\n{yaml.dump(values)}{'-' * 21}")
+                print(f"Values file contents:\n{'-' * 21}\n{content}{'-' * 21}")
                 print(f"{error.output=}\n{error.stderr=}")
 
                 if "could not find template" in error.stderr.decode("utf-8"):
@@ -184,23 +354,143 @@ def render_chart(
             raise
         if lint_yaml:
             check_yaml(manifests)
-        return load_and_validate_k8s_manifests(manifests, validate_objects=validate_objects, kube_version=kube_version)
+        return load_k8s_manifests_with_sources(manifests, validate_objects=validate_objects, kube_version=kube_version, kinds=kinds)
+
+
+def _render_chart_in_pool(kwargs: dict) -> tuple[list, dict]:
+    """Render a chart in a pool worker, returning its session_stats for the parent to merge."""
+    for counter in session_stats.values():
+        counter.clear()
+    return render_chart(**kwargs), {name: dict(counter) for name, counter in session_stats.items()}
+
+
+def render_charts_batch(render_requests: list[dict], max_workers: int | None = None) -> list[list]:
+    """Render many charts in parallel, returning the results in the same order as render_requests.
+
+    Each request is a dict of render_chart keyword arguments. Renders run in a process pool of at
+    most max_workers (default RENDER_BATCH_WORKERS) processes. Every render goes through the
+    render cache, so this can also be used to prefetch renders that later render_chart calls will
+    read from the cache. The first failed render is raised.
+
+    Pool processes are spawned rather than forked, so they don't inherit the state of this process
+    (e.g. the threads and locks of a pytest-xdist worker).
+
+    Example:
+        docs_by_version = render_charts_batch([{"kube_version": v, "values": values} for v in supported_k8s_versions])
+    """
+    max_workers = min(max_workers or RENDER_BATCH_WORKERS, len(render_requests))
+    if max_workers <= 1:
+        return [render_chart(**kwargs) for kwargs in render_requests]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn")) as executor:
+        for k8s_objects, stats in executor.map(_render_chart_in_pool, render_requests):
+            for name, counts in stats.items():
+                session_stats[name].update(counts)
+            results.append(k8s_objects)
+    return results
+
+
+def _document_source(document: str) -> str | None:
+    """Return the template path from the "# Source:" comment heading a yaml document, if any."""
+    for line in document.lstrip().splitlines():
+        if not line.startswith("#"):
+            break
+        if source_match := _source_re.fullmatch(line.rstrip()):
+            return source_match[1]
+    return None
+
+
+def iter_k8s_manifests_with_sources(
+    manifests: str,
+    validate_objects: bool = True,
+    kube_version: str = default_version,
+    kinds: list | None = None,
+) -> Iterator[tuple[str | None, dict]]:
+    """Yield (template source, k8s object) from multi-document helm output one at a time, optionally validating them.
+
+    Documents are parsed as they are consumed, so a caller that stops iterating early never parses
+    the rest. If kinds is given, objects of other kinds are dropped before validation.
+    """
+    for document in _document_separator_re.split(manifests):
+        source = _document_source(document)
+        for k8s_object in yaml.load_all(document, Loader=YamlLoader):
+            if not k8s_object or (kinds and k8s_object.get("kind") not in kinds):
+                continue
+            if validate_objects:
+                validate_k8s_object(k8s_object, kube_version=kube_version)
+            yield source, k8s_object
+
+
+def iter_k8s_manifests(
+    manifests: str,
+    validate_objects: bool = True,
+    kube_version: str = default_version,
+    kinds: list | None = None,
+) -> Iterator[dict]:
+    """Yield k8s objects from multi-document yaml one at a time, optionally validating them.
+
+    See iter_k8s_manifests_with_sources.
+    """
+    for _, k8s_object in iter_k8s_manifests_with_sources(manifests, validate_objects, kube_version, kinds):
+        yield k8s_object
+
+
+def load_k8s_manifests_with_sources(
+    manifests: str,
+    validate_objects: bool = True,
+    kube_version: str = default_version,
+    kinds: list | None = None,
+) -> RenderedDocs:
+    """Load k8s objects from helm output into a RenderedDocs, optionally validating them."""
+    sourced = list(iter_k8s_manifests_with_sources(manifests, validate_objects, kube_version, kinds))
+    return RenderedDocs([k8s_object for _, k8s_object in sourced], [source for source, _ in sourced])
 
 
 def load_and_validate_k8s_manifests(manifests: str, validate_objects: bool = True, kube_version: str = default_version):
     """Load k8s objecdts from yaml into python, optionally validating them. yaml can contain multiple documents."""
-    k8s_objects = [k8s_object for k8s_object in yaml.full_load_all(manifests) if k8s_object]
+    return list(iter_k8s_manifests(manifests, validate_objects=validate_objects, kube_version=kube_version))
+
+
+class RenderedChart:
+    """A read-only rendered chart, indexed by (kind, name) and by template source.
+
+    Every accessor returns deep copies, so one test can't change what another test sees.
+    """
+
+    def __init__(self, docs: RenderedDocs):
+        self._docs = docs
+        self._by_kind_name = {(doc["kind"], doc["metadata"]["name"]): doc for doc in docs}
+        self._by_source = docs.index_by_template()
+
+    @property
+    def docs(self) -> RenderedDocs:
+        """Return all docs of the render."""
+        return deepcopy(self._docs)
+
+    @property
+    def sources(self) -> list[str]:
+        """Return the templates that rendered at least one doc."""
+        return sorted(x for x in self._by_source if x)
+
+    def get(self, kind: str, name: str) -> dict | None:
+        """Return the doc with the given kind and metadata.name, or None."""
+        return deepcopy(self._by_kind_name.get((kind, name)))
+
+    def of_kind(self, *kinds: str) -> list[dict]:
+        """Return the docs of the given kinds."""
+        return deepcopy([doc for doc in self._docs if doc["kind"] in kinds])
 
-    if validate_objects:
-        for k8s_object in k8s_objects:
-            validate_k8s_object(k8s_object, kube_version=kube_version)
-    return k8s_objects
+    def from_template(self, *templates: str) -> list[dict]:
+        """Return the docs rendered from the given templates, like render_chart(show_only=templates)."""
+        return deepcopy([doc for template in templates for doc in self._by_source.get(str(template), [])])
 
 
 def prepare_k8s_lookup_dict(k8s_objects) -> dict[tuple[str, str], dict[str, Any]]:
     """Helper to create a lookup dict from k8s_objects.
 
-    The keys of the dict are the k8s object's kind and name
+    The keys of the dict are the k8s object's kind and name. For the all-features chart, use
+    tests.utils.get_all_features_chart().get(kind, name) instead.
     """
     return {(k8s_object["kind"], k8s_object["metadata"]["name"]): k8s_object for k8s_object in k8s_objects}
 
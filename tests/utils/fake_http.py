@@ -0,0 +1,70 @@
+"""Run fake HTTP APIs on a local port, for tests of code that talks to registries, control planes
+or the Kubernetes API.
+
+Subclass FakeHandler with do_GET/do_POST/... methods, keep the fake's state on the server, and
+serve it for the duration of a test:
+
+    class FakeApiHandler(FakeHandler):
+        def do_GET(self):
+            self.server.requests.append(self.path)
+            self.send_json(200, {"items": []})
+
+    @pytest.fixture
+    def fake_api():
+        with serve(FakeApiHandler, requests=[]) as server:
+            yield server  # server.url is "http://127.0.0.1:<port>"
+"""
+
+import json
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """A request handler that doesn't log, with helpers for JSON request and response bodies."""
+
+    def log_message(self, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def read_json(self) -> Any:
+        return json.loads(self.read_body())
+
+    def send_json(self, status: int, data: Any = None, headers=()) -> None:
+        """Send a response with data as its JSON body (no body if data is None, or for HEAD requests)."""
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        for header in headers:
+            self.send_header(*header)
+        if data is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+
+@contextmanager
+def serve(handler_class: type[BaseHTTPRequestHandler], **state) -> Iterator[ThreadingHTTPServer]:
+    """Serve handler_class on a free 127.0.0.1 port from a daemon thread for the duration of the block.
+
+    Each keyword argument becomes an attribute of the server, for handlers to read and update as
+    self.server.<name>. The server also gets a `lock` for handlers to guard that state with, and
+    its base `url`.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    for name, value in state.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,68 @@
+"""A local stand-in for an OCI registry, for testing the registry clients in bin/ and tests/utils/.
+
+The registry requires an anonymous bearer token scoped to the repository being read, like
+quay.io and Docker Hub do, and records the token requests and authorized requests it gets.
+"""
+
+import hashlib
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+
+from tests.utils.fake_http import FakeHandler, serve
+
+CONFIGS = {
+    "sha256:" + "1" * 64: {"config": {"User": "1000"}},
+    "sha256:" + "2" * 64: {"config": {}},
+}
+MANIFESTS = {
+    ("astronomer/ap-commander", "1.0.0"): {"config": {"digest": "sha256:" + "1" * 64}},
+    ("astronomer/ap-commander", "1.0.1"): {"config": {"digest": "sha256:" + "2" * 64}},
+    ("astronomer/ap-houston-api", "sha256:" + "3" * 64): {"config": {"digest": "sha256:" + "1" * 64}},
+    ("astronomer/ap-houston-api", "2.0.0"): {
+        "manifests": [
+            {"digest": "sha256:" + "4" * 64, "platform": {"os": "linux", "architecture": "arm64"}},
+            {"digest": "sha256:" + "3" * 64, "platform": {"os": "linux", "architecture": "amd64"}},
+        ]
+    },
+}
+
+
+class FakeRegistryHandler(FakeHandler):
+    """Serves MANIFESTS and CONFIGS over the registry v2 API, to GET and HEAD requests."""
+
+    def do_GET(self):
+        server = self.server
+        if self.path.startswith("/token?"):
+            scope = self.path.split("scope=", 1)[1].replace("%3A", ":").replace("%2F", "/")
+            server.token_requests.append(scope)
+            self.send_json(200, {"token": f"token-for-{scope}"})
+            return
+
+        repository, kind, reference = self.path.removeprefix("/v2/").rsplit("/", 2)
+        scope = f"repository:{repository}:pull"
+        if self.headers.get("Authorization") != f"Bearer token-for-{scope}":
+            challenge = (
+                f'Bearer realm="http://{server.server_address[0]}:{server.server_port}/token",service="fake",scope="{scope}"'
+            )
+            self.send_json(401, {"errors": []}, [("Www-Authenticate", challenge)])
+            return
+        server.authorized_requests.append((self.command, self.path))
+        if kind == "manifests" and (repository, reference) in MANIFESTS:
+            manifest = MANIFESTS[repository, reference]
+            digest = "sha256:" + hashlib.sha256(json.dumps(manifest).encode()).hexdigest()
+            self.send_json(200, manifest, [("Docker-Content-Digest", digest)])
+        elif kind == "blobs" and reference in CONFIGS:
+            self.send_json(200, CONFIGS[reference])
+        else:
+            self.send_json(404, {"errors": [{"code": "MANIFEST_UNKNOWN"}]})
+
+    do_HEAD = do_GET
+
+
+@contextmanager
+def run_fake_registry() -> Iterator[ThreadingHTTPServer]:
+    """Run a fake registry on a free local port for the duration of the block."""
+    with serve(FakeRegistryHandler, token_requests=[], authorized_requests=[]) as server:
+        yield server
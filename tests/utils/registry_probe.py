@@ -0,0 +1,119 @@
+"""Check that container images exist in their registries, without a docker daemon.
+
+Each image is probed with one HEAD request for its manifest over the registry v2 API. Probes run
+concurrently over one connection-pooled session, anonymous bearer tokens are negotiated once per
+(registry, scope) and shared, and every image is probed once however many renders it appears in.
+
+Probing contacts the real registries, so it is opt-in: export REGISTRY_PROBE=true to run the tests
+that probe registries. Registries can instead be redirected to a local stand-in (such as
+`registry:2` or a pull-through cache), which also enables the tests:
+
+    REGISTRY_PROBE_ENDPOINTS="quay.io=http://127.0.0.1:5000,docker.io=http://127.0.0.1:5001"
+
+Image reference parsing and the token cache are shared with bin/show-docker-image-user.py, from
+bin/registry_api.py.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+
+from tests import git_root_dir
+
+if str(git_root_dir / "bin") not in sys.path:
+    sys.path.append(str(git_root_dir / "bin"))
+
+from registry_api import DEFAULT_REGISTRY, MANIFEST_ACCEPT, TokenCache, parse_image_ref
+
+ENABLED = os.getenv("REGISTRY_PROBE", "false").lower() in ["yes", "true", "1"] or bool(os.getenv("REGISTRY_PROBE_ENDPOINTS"))
+MAX_WORKERS = int(os.getenv("REGISTRY_PROBE_WORKERS", "16"))
+
+# Responses worth retrying, in place of rerunning the whole test
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_endpoints(spec: str) -> dict[str, str]:
+    """Parse "registry=url,registry=url" into {registry: url}."""
+    endpoints = {}
+    for item in filter(None, (x.strip() for x in spec.split(","))):
+        registry, _, url = item.partition("=")
+        endpoints[DEFAULT_REGISTRY if registry == "docker.io" else registry] = url.rstrip("/")
+    return endpoints
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """The outcome of probing one image."""
+
+    image: str
+    status: int | None = None
+    digest: str | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
+
+class RegistryProber:
+    """Probes images over a shared, connection-pooled session with a (registry, scope) token cache."""
+
+    def __init__(
+        self, endpoints: dict[str, str] | None = None, max_workers: int = MAX_WORKERS, retries: int = 4, timeout: float = 30
+    ):
+        self.endpoints = parse_endpoints(os.getenv("REGISTRY_PROBE_ENDPOINTS", "")) if endpoints is None else endpoints
+        self.max_workers = max_workers
+        self.retries = retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.tokens = TokenCache(self.session, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+    def endpoint(self, registry: str) -> str:
+        return self.endpoints.get(registry, f"https://{registry}")
+
+    def _head(self, url: str, token: str | None) -> requests.Response:
+        headers = {"Accept": MANIFEST_ACCEPT}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.head(url, headers=headers, timeout=self.timeout)
+            except requests.ConnectionError:
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            time.sleep(min(2**attempt, 10))
+        raise AssertionError("unreachable")
+
+    def probe(self, image: str) -> ProbeResult:
+        """HEAD the manifest of image, acquiring a bearer token if the registry asks for one."""
+        registry, repository, reference = parse_image_ref(image)
+        url = f"{self.endpoint(registry)}/v2/{repository}/manifests/{reference}"
+        try:
+            token = self.tokens.get(registry, f"repository:{repository}:pull")
+            response = self._head(url, token)
+            if response.status_code == 401:
+                token = self.tokens.negotiate(registry, response.headers.get("Www-Authenticate", ""), rejected_token=token)
+                response = self._head(url, token)
+        except requests.RequestException as err:
+            return ProbeResult(image, error=f"{type(err).__name__}: {err}")
+        error = None if response.status_code == 200 else f"HEAD {url} returned HTTP {response.status_code}"
+        return ProbeResult(image, response.status_code, response.headers.get("Docker-Content-Digest"), error)
+
+    def probe_all(self, images) -> dict[str, ProbeResult]:
+        """Probe every distinct image concurrently, returning {image: ProbeResult} in first-seen order."""
+        unique_images = list(dict.fromkeys(images))
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            return dict(zip(unique_images, executor.map(self.probe, unique_images), strict=True))
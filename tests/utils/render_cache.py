@@ -0,0 +1,140 @@
+"""On-disk cache of rendered and parsed helm charts, shared between pytest-xdist workers.
+
+Entries are keyed by a fingerprint of the chart source tree plus the normalized render arguments,
+so any edit under charts/, templates/ or files/ (or to the top-level chart files) produces new
+keys and the stale entries are simply never read again. Renders that were validated also carry a
+fingerprint of the k8s schemas in tests/k8s_schema they were validated against. Entries are written to a temp file and
+renamed into place, so concurrent workers never see a partially written entry.
+
+export RENDER_CACHE=false to disable the cache, or RENDER_CACHE_DIR=/some/path to relocate it.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import subprocess
+from collections import Counter
+from collections.abc import Callable
+from functools import cache
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from filelock import FileLock
+
+from tests import git_root_dir
+
+ENABLED = os.getenv("RENDER_CACHE", "true").lower() not in ["no", "false", "0"]
+CACHE_DIR = Path(os.getenv("RENDER_CACHE_DIR", Path.home() / ".local" / "share" / "astronomer-software" / "tests" / "render-cache"))
+
+# Everything in the umbrella chart that helm reads when rendering. Other top-level paths are
+# either excluded by .helmignore or irrelevant to the rendered output.
+CHART_TREE_PATHS = ["Chart.yaml", "values.yaml", "values.schema.json", "metadata.yaml", "charts", "templates", "files"]
+K8S_SCHEMA_DIR = git_root_dir / "tests" / "k8s_schema"
+
+# Bump when the type of cached objects changes, so entries written by older code are not read
+FORMAT_VERSION = 2
+
+# hit/miss counts for this process, reported by tests/chart_tests/conftest.py at session end
+stats = Counter()
+
+
+@cache
+def chart_tree_fingerprint(chart_dir: str) -> str:
+    """Return a hash of every file helm would read from chart_dir."""
+    chart_path = Path(chart_dir)
+    if chart_path.resolve() == git_root_dir:
+        roots = [chart_path / x for x in CHART_TREE_PATHS]
+    else:
+        roots = [chart_path]
+
+    digest = hashlib.sha256()
+    for root in roots:
+        files = sorted(x for x in root.rglob("*") if x.is_file()) if root.is_dir() else [root]
+        for file in files:
+            if not file.is_file():
+                continue
+            digest.update(str(file.relative_to(chart_path)).encode())
+            digest.update(b"\0")
+            digest.update(hashlib.sha256(file.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+@cache
+def schema_fingerprint(kube_version: str) -> str:
+    """Return a hash of the names, sizes and mtimes of the local k8s schemas for kube_version.
+
+    Computed once per process: schemas downloaded later in the session only add kinds that no
+    render validated yet.
+    """
+    schema_files = sorted((K8S_SCHEMA_DIR / f"v{kube_version}-standalone").glob("*.json"))
+    file_stats = [(x.name, x.stat().st_size, x.stat().st_mtime_ns) for x in schema_files]
+    return hashlib.sha256(json.dumps(file_stats).encode()).hexdigest()
+
+
+@cache
+def helm_version() -> str:
+    """Return the helm client version, so upgrading helm invalidates the cache."""
+    try:
+        return subprocess.check_output(["helm", "version", "--short"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def cache_key(*, chart_dir: str, **render_args) -> str:
+    """Return the cache key for a render of chart_dir with the given normalized arguments."""
+    key_data = {
+        "format_version": FORMAT_VERSION,
+        "chart_tree": chart_tree_fingerprint(chart_dir),
+        "helm_version": helm_version(),
+        **render_args,
+    }
+    if render_args.get("validate_objects"):
+        key_data["schemas"] = schema_fingerprint(render_args["kube_version"])
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / key[:2] / f"{key}.pickle"
+
+
+def _load(key: str) -> list | None:
+    try:
+        return pickle.loads(_entry_path(key).read_bytes())  # noqa: S301 -- written by this module only
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write data to path through a temp file and rename, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(dir=path.parent, prefix=".tmp-", delete=False) as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_file.name, path)
+
+
+def get_or_render(key: str, render: Callable[[], list]) -> list:
+    """Return the cached k8s objects for key, calling render() and caching its result on a miss.
+
+    Concurrent misses on the same key are rendered only once: the first process renders while
+    holding a per-key file lock, and the others wait for it and read its result. This matters for
+    renders done at collection time, which every xdist worker does at the same moment.
+
+    The lock file is removed once the entry is written. A process that still gets the lock after
+    that finds the entry and does not render again.
+    """
+    if (k8s_objects := _load(key)) is None:
+        path = _entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = path.with_suffix(".lock")
+        try:
+            with FileLock(lock_path):
+                if (k8s_objects := _load(key)) is None:
+                    stats["misses"] += 1
+                    k8s_objects = render()
+                    write_atomic(path, pickle.dumps(k8s_objects, protocol=pickle.HIGHEST_PROTOCOL))
+                    return k8s_objects
+        finally:
+            lock_path.unlink(missing_ok=True)
+    stats["hits"] += 1
+    return k8s_objects
@@ -0,0 +1,189 @@
+"""Deferred chart renders for parametrizing tests.
+
+Test classes that parametrize over the objects of a full chart render used to do that render in
+the class body, so merely importing the module rendered the chart, in every xdist worker, whether
+or not any of its tests were collected. Instead, register the render as a parameter factory:
+
+    def pod_labels_params():
+        docs = render_chart(values=get_all_features())
+        return {f"{doc['kind']}_{doc['metadata']['name']}": doc["metadata"]["labels"] for doc in docs}
+
+    class TestPodLabels:
+        @pytest.mark.chart_params("labels", pod_labels_params)
+        def test_pod_labels(self, labels): ...
+
+The factory returns either a dict of {test id: argvalue} or a list of argvalues / pytest.param.
+tests/chart_tests/conftest.py calls it from pytest_generate_tests, when the test is collected, but
+only if the run can select the test:
+
+- `--collect-only` never renders, and neither do tests marked skip. Each chart_params test is
+  listed once, with the id "not-rendered".
+- With `-k`, the factory runs only if the expression can select the test by its module, class or
+  test name or its markers. `-k TestPodLabels`, `-k "TestPodLabels and houston"` and
+  `-k "not houston"` render, and the rendered parameter ids are then matched as they would be for
+  pytest.mark.parametrize. `-k houston` or `-k test_something_else` do not: a match on the
+  parameter ids alone doesn't pay for a render. Those tests get the "not-rendered" placeholder,
+  which the expression deselects.
+
+Each factory runs at most once per process, and because it renders through the render cache, at
+most once across all xdist workers.
+"""
+
+import itertools
+import re
+from collections.abc import Callable
+from functools import cache
+
+import pytest
+
+MARKER = "chart_params"
+
+# Identifiers are lexed like pytest's -k expressions; anything else makes the expression opaque to us.
+_token_re = re.compile(r"\s*(\(|\)|(?:\w|:|\+|-|\.|\[|\]|\\|/)+)")
+
+# Expressions with more identifiers than this that match no keyword of the test are assumed to select it
+MAX_UNKNOWN_IDENTIFIERS = 12
+
+
+@cache
+def get_params(factory: Callable[[], dict | list]) -> list:
+    """Return factory()'s parameters as a list of argvalues or pytest.param, running it once per process."""
+    params = factory()
+    if isinstance(params, dict):
+        return [pytest.param(value, id=str(test_id)) for test_id, value in params.items()]
+    return list(params)
+
+
+def _parse_keyword_expression(expression: str):
+    """Parse a -k expression into nested ("or"|"and", left, right), ("not", operand) and ("ident", name) tuples.
+
+    Raises SyntaxError for anything pytest's -k grammar allows that this doesn't handle.
+    """
+    tokens = []
+    position = 0
+    while position < len(expression.rstrip()):
+        match = _token_re.match(expression, position)
+        if not match:
+            raise SyntaxError(expression)
+        tokens.append(match.group(1))
+        position = match.end()
+    tokens.append(None)
+
+    def parse_or(index):
+        left, index = parse_and(index)
+        while tokens[index] == "or":
+            right, index = parse_and(index + 1)
+            left = ("or", left, right)
+        return left, index
+
+    def parse_and(index):
+        left, index = parse_not(index)
+        while tokens[index] == "and":
+            right, index = parse_not(index + 1)
+            left = ("and", left, right)
+        return left, index
+
+    def parse_not(index):
+        token = tokens[index]
+        if token == "not":
+            operand, index = parse_not(index + 1)
+            return ("not", operand), index
+        if token == "(":
+            operand, index = parse_or(index + 1)
+            if tokens[index] != ")":
+                raise SyntaxError(expression)
+            return operand, index + 1
+        if token in (None, ")", "and", "or"):
+            raise SyntaxError(expression)
+        return ("ident", token), index + 1
+
+    tree, index = parse_or(0)
+    if tokens[index] is not None:
+        raise SyntaxError(expression)
+    return tree
+
+
+def _evaluate(tree, values: dict[str, bool]) -> bool:
+    operator, *operands = tree
+    if operator == "ident":
+        return values[operands[0]]
+    if operator == "not":
+        return not _evaluate(operands[0], values)
+    left, right = (_evaluate(operand, values) for operand in operands)
+    return left and right if operator == "and" else left or right
+
+
+def _identifiers(tree) -> set[str]:
+    if tree[0] == "ident":
+        return {tree[1]}
+    return set().union(*(_identifiers(operand) for operand in tree[1:]))
+
+
+def _test_keywords(definition) -> set[str]:
+    """Return the names -k matches a test against, other than its parameter ids (see pytest's KeywordMatcher)."""
+    names = {
+        node.name
+        for node in definition.listchain()
+        if not isinstance(node, pytest.Session)
+        and not (isinstance(node, pytest.Directory) and isinstance(node.parent, pytest.Session))
+    }
+    names.update(definition.listextrakeywords())
+    names.update(definition.obj.__dict__)
+    names.update(mark.name for mark in definition.iter_markers())
+    return {name.lower() for name in names}
+
+
+def keyword_can_select(expression: str, definition) -> bool:
+    """Return whether the -k expression can select the test at definition other than by parameter id alone.
+
+    Identifiers matching one of the test's own keywords are true. The rest could only match a
+    parameter id, which isn't known until the factory runs. The test can be selected if the
+    expression is true with those all false, or if some parameter ids would make it true for this
+    test but none would for a test without its keywords (e.g. "TestPodLabels and houston").
+    """
+    try:
+        tree = _parse_keyword_expression(expression)
+    except SyntaxError:
+        return True
+    keywords = _test_keywords(definition)
+    known, unknown = set(), []
+    for identifier in _identifiers(tree):
+        if any(identifier.lower() in keyword for keyword in keywords):
+            known.add(identifier)
+        else:
+            unknown.append(identifier)
+    if len(unknown) > MAX_UNKNOWN_IDENTIFIERS:
+        return True
+
+    def satisfiable(known_value: bool) -> bool:
+        return any(
+            _evaluate(tree, {**dict.fromkeys(known, known_value), **dict(zip(unknown, id_matches, strict=True))})
+            for id_matches in itertools.product([False, True], repeat=len(unknown))
+        )
+
+    if _evaluate(tree, {**dict.fromkeys(known, True), **dict.fromkeys(unknown, False)}):
+        return True
+    return satisfiable(True) and not satisfiable(False)
+
+
+def should_render(metafunc: pytest.Metafunc) -> bool:
+    """Return whether this run can select metafunc's test, so its chart_params factories are worth running."""
+    if metafunc.config.option.collectonly or metafunc.definition.get_closest_marker("skip"):
+        return False
+    keyword = metafunc.config.option.keyword
+    return not keyword or keyword_can_select(keyword, metafunc.definition)
+
+
+def parametrize(metafunc: pytest.Metafunc) -> None:
+    """Apply every chart_params marker on metafunc's test."""
+    render = should_render(metafunc)
+    for marker in metafunc.definition.iter_markers(MARKER):
+        argnames, factory = marker.args
+        if render:
+            metafunc.parametrize(argnames, get_params(factory))
+        else:
+            names = [name.strip() for name in argnames.split(",")] if isinstance(argnames, str) else list(argnames)
+            placeholder = pytest.param(
+                *[None] * len(names), id="not-rendered", marks=pytest.mark.skip(reason=f"{factory.__name__} was not rendered")
+            )
+            metafunc.parametrize(argnames, [placeholder])